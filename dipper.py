@@ -12,6 +12,8 @@ import time
 # Invalid constant name "test_suite"
 from tests.test_general import GeneralGraphTestCase
 from dipper.utils.TestUtils import TestUtils
+from dipper.utils.ParquetWriter import ParquetWriter
+from dipper.utils.CompressedFile import CompressedFile
 
 __author__ = 'nlw'
 
@@ -107,9 +109,54 @@ def main():
 
     parser.add_argument(
         '--format',
-        help='serialization format: turtle (default), xml, n3, nt, raw',
+        help='serialization format: turtle (default), xml, n3, nt, raw,'
+        ' neo4j (node and relationship csv files for neo4j-admin import'
+        ' --array-delimiter=U+001F --multiline-fields=true),'
+        ' rdfb (indexed binary rdf, that --query reads without parsing),'
+        ' parquet (triples and associations, needs pyarrow), json-ld,'
+        ' canonical (sorted n-triples, stable from build to build);\n'
+        'several, separated by commas, are written from one pass over'
+        ' the graph',
         type=str)
 
+    parser.add_argument(
+        '--parse_workers', type=int, default=1,
+        help='number of parse steps, or of taxa, to process at once\n'
+        'Steps implemented for: MGI, ZFIN, FlyBase\n'
+        'Taxa implemented for: UCSCBands, Monochrom, Ensembl, AnimalQTLdb,'
+        ' GO')
+    parser.add_argument(
+        '--pipelined', action='store_true',
+        help='stream out of date database tables straight into the parser,\n'
+        'overlapping fetch and parse (caching them as usual)\n'
+        'Implemented for: MGI, FlyBase')
+    parser.add_argument(
+        '--dual_output', action='store_true',
+        help='write the pre-configured test subset along with the full graph,'
+        ' from the same parse\n'
+        'Implemented for: NCBIGene, ClinVar')
+
+    parser.add_argument(
+        '--shards', type=int, default=1,
+        help='write the graph (in turtle) as this many compressed shards,'
+        ' in parallel, with a manifest')
+    parser.add_argument(
+        '--concatenate_shards', action='store_true',
+        help='join the shards into a single file once they are written')
+
+    parser.add_argument(
+        '--compress', choices=['gzip', 'zstd'],
+        help='compress the output files (adding .gz or .zst to them),'
+        ' other than rdfb;\nparquet compresses its columns with it instead.'
+        ' zstd needs zstandard')
+    parser.add_argument(
+        '--compress_level', type=int,
+        help='the compression level (gzip: 1-9, default 6;'
+        ' zstd: 1-22, default 3)')
+    parser.add_argument(
+        '--compress_threads', type=int,
+        help='the number of threads for zstd to compress with')
+
     args = parser.parse_args()
     tax_ids = None
     if args.taxon is not None:
@@ -121,7 +168,12 @@ def main():
     taxa_supported = [
         'Panther', 'NCBIGene', 'BioGrid', 'UCSCBands', 'GeneOntology']
 
-    formats_supported = ['xml', 'n3', 'turtle', 'nt', 'ttl', 'raw']
+    pipeline_supported = ['MGI', 'FlyBase']
+
+    dual_output_supported = ['NCBIGene', 'ClinVar']
+
+    formats_supported = ['xml', 'n3', 'turtle', 'nt', 'ttl', 'raw', 'neo4j',
+                         'rdfb', 'parquet', 'json-ld', 'canonical']
 
     if args.quiet:
         logging.basicConfig(level=logging.ERROR)
@@ -138,15 +190,19 @@ def main():
         test_query = TestUtils()
         for source in args.sources.split(','):
             source = source.lower()
-            mysource = source_to_class_map[source]()
+            src = source_to_class_map[source]
 
             # import source lib
-            module = "dipper.sources.{0}".format(mysource)
+            module = "dipper.sources.{0}".format(src)
             imported_module = importlib.import_module(module)
-            source_class = getattr(imported_module, mysource)
+            source_class = getattr(imported_module, src)
+            if src in taxa_supported:
+                mysource = source_class(tax_ids)
+            else:
+                mysource = source_class()
 
-            test_query.check_query_syntax(args.query, source_class)
-            test_query.load_graph_from_turtle(source_class)
+            test_query.check_query_syntax(args.query, mysource)
+            test_query.load_graph(mysource)
 
         print(test_query.query_graph(args.query, True))
         exit(0)
@@ -157,16 +213,29 @@ def main():
 
     # set serializer
     if args.format is not None:
-        if args.format in formats_supported:
-            if args.format == 'ttl':
-                args.format = 'turtle'
-        else:
-            logger.error(
-                "You have specified an invalid serializer: %s", args.format)
-
-            exit(0)
+        formats = []
+        for fmt in args.format.split(','):
+            if fmt not in formats_supported:
+                logger.error(
+                    "You have specified an invalid serializer: %s", fmt)
+
+                exit(0)
+            if fmt == 'ttl':
+                fmt = 'turtle'
+            if fmt == 'parquet' and not ParquetWriter.is_available():
+                logger.error("Writing parquet needs pyarrow to be installed")
+
+                exit(0)
+            if fmt not in formats:
+                formats.append(fmt)
+        args.format = formats
     else:
-        args.format = 'turtle'
+        args.format = ['turtle']
+
+    if not CompressedFile.is_available(args.compress):
+        logger.error("Compressing with zstd needs zstandard to be installed")
+
+        exit(0)
 
     # iterate through all the sources
     for source in args.sources.split(','):
@@ -183,14 +252,45 @@ def main():
             mysource = source_class(tax_ids)
         else:
             mysource = source_class()
+        if args.pipelined:
+            # the tables are only fetched as they are parsed,
+            # so this needs a fetch followed by a parse, and no tests
+            # in between that would read the tables first
+            if src not in pipeline_supported:
+                logger.warning("Pipelined fetching not supported for %s", src)
+            elif args.parse_only or args.fetch_only or args.test_only \
+                    or (args.no_verify or args.skip_tests) is not True:
+                logger.warning(
+                    "Pipelined fetching needs --skip_tests, "
+                    "and cannot be used with --parse_only, --fetch_only, "
+                    "or --test_only")
+            else:
+                mysource.setpipelined(True)
         if args.parse_only is False:
-            start_fetch = time.clock()
+            start_fetch = time.perf_counter()
             mysource.fetch(args.force)
-            end_fetch = time.clock()
+            end_fetch = time.perf_counter()
             logger.info("Fetching time: %d sec", end_fetch-start_fetch)
 
         mysource.settestonly(args.test_only)
         mysource.setnobnodes(args.no_bnodes)
+        mysource.setparseworkers(args.parse_workers)
+        if args.compress is not None:
+            mysource.setcompression(
+                args.compress, args.compress_level, args.compress_threads)
+        if args.shards > 1:
+            if args.format != ['turtle']:
+                logger.warning(
+                    "Shards are only written when turtle is the only format")
+            else:
+                mysource.setshards(args.shards, args.concatenate_shards)
+        if args.dual_output:
+            if src not in dual_output_supported:
+                logger.warning("Dual output not supported for %s", src)
+            elif args.test_only:
+                logger.warning("Dual output cannot be used with --test_only")
+            else:
+                mysource.setdualoutput(True)
 
         # run tests first
         if (args.no_verify or args.skip_tests) is not True:
@@ -204,13 +304,13 @@ def main():
             logger.info("Skipping Tests for source: %s", source)
 
         if args.test_only is False and args.fetch_only is False:
-            start_parse = time.clock()
+            start_parse = time.perf_counter()
             mysource.parse(args.limit)
-            end_parse = time.clock()
+            end_parse = time.perf_counter()
             logger.info("Parsing time: %d sec", end_parse-start_parse)
-            start_write = time.clock()
+            start_write = time.perf_counter()
             mysource.write(format=args.format)
-            end_write = time.clock()
+            end_write = time.perf_counter()
             logger.info("Writing time: %d sec", end_write-start_write)
         # if args.no_verify is not True:
 
@@ -133,45 +133,16 @@ class AnimalQTLdb(Source):
 
         if self.testOnly:
             self.testMode = True
-            g = self.testgraph
-        else:
-            g = self.graph
 
         tmap = '/'.join((self.rawdir, self.files['trait_mappings']['file']))
         self._process_trait_mappings(tmap, limit)
 
-        geno = Genotype(g)
         # organisms  = ['chicken']
         organisms = [
             'chicken', 'pig', 'horse', 'rainbow_trout', 'sheep', 'cattle']
 
-        for o in organisms:
-            tax_id = self._get_tax_by_common_name(o)
-            geno.addGenome(tax_id, o)
-            build_id = None
-            build = None
-
-            k = o+'_bp'
-            if k in self.files:
-                file = self.files[k]['file']
-                m = re.search(r'QTL_([\w\.]+)\.gff.txt.gz', file)
-                if m is None:
-                    logger.error("Can't match a gff build")
-                else:
-                    build = m.group(1)
-                    build_id = self._map_build_by_abbrev(build)
-                    logger.info("Build = %s", build_id)
-                    geno.addReferenceGenome(build_id, build, tax_id)
-                if build_id is not None:
-                    self._process_QTLs_genomic_location(
-                        '/'.join((self.rawdir, file)), tax_id, build_id, build,
-                        limit)
-
-            k = o+'_cm'
-            if k in self.files:
-                file = self.files[k]['file']
-                self._process_QTLs_genetic_location(
-                    '/'.join((self.rawdir, file)), tax_id, o, limit)
+        # each organism has its own files, so they can be done side by side
+        self.fan_out(lambda o: self._process_organism(o, limit), organisms)
 
         logger.info("Finished parsing")
 
@@ -180,6 +151,49 @@ class AnimalQTLdb(Source):
         logger.info("Found %d nodes", len(self.graph))
         return
 
+    def _process_organism(self, o, limit):
+        """
+        Add the genome, and the QTLs from the genomic and genetic
+        location files, of one organism.
+        :param o: the organism's common name, as used in the file keys
+        :param limit:
+        :return:
+        """
+        if self.testMode:
+            g = self.testgraph
+        else:
+            g = self.graph
+
+        geno = Genotype(g)
+        tax_id = self._get_tax_by_common_name(o)
+        geno.addGenome(tax_id, o)
+        build_id = None
+        build = None
+
+        k = o+'_bp'
+        if k in self.files:
+            file = self.files[k]['file']
+            m = re.search(r'QTL_([\w\.]+)\.gff.txt.gz', file)
+            if m is None:
+                logger.error("Can't match a gff build")
+            else:
+                build = m.group(1)
+                build_id = self._map_build_by_abbrev(build)
+                logger.info("Build = %s", build_id)
+                geno.addReferenceGenome(build_id, build, tax_id)
+            if build_id is not None:
+                self._process_QTLs_genomic_location(
+                    '/'.join((self.rawdir, file)), tax_id, build_id, build,
+                    limit)
+
+        k = o+'_cm'
+        if k in self.files:
+            file = self.files[k]['file']
+            self._process_QTLs_genetic_location(
+                '/'.join((self.rawdir, file)), tax_id, o, limit)
+
+        return
+
     def _process_QTLs_genetic_location(
             self, raw, taxon_id, common_name, limit=None):
         """
@@ -365,8 +379,7 @@ class AnimalQTLdb(Source):
 
                     assoc.add_association_to_graph(g)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         logger.info("Done with QTL genetic info")
@@ -500,8 +513,7 @@ class AnimalQTLdb(Source):
                 qtl_feature.addTaxonToFeature(g, taxon_id)
                 qtl_feature.addFeatureToGraph(g)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         logger.warning("Bad attribute flags in this file")
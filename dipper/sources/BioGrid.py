@@ -13,6 +13,7 @@ from dipper.sources.Source import Source
 from dipper.models.assoc.InteractionAssoc import InteractionAssoc
 from dipper.models.Dataset import Dataset
 from dipper.utils.GraphUtils import GraphUtils
+from dipper.utils.IdFilter import IdFilter
 
 __author__ = 'nicole'
 
@@ -129,6 +130,10 @@ class BioGrid(Source):
         # assume that the first entry is the item
         fname = myzip.namelist()[0]
         matchcounter = 0
+        if self.testMode:
+            id_filter = IdFilter(self.test_ids)
+        else:
+            id_filter = IdFilter(self.tax_ids, strip='taxid:')
 
         with myzip.open(fname, 'r') as csvfile:
             for line in csvfile:
@@ -154,17 +159,14 @@ class BioGrid(Source):
                 if self.testMode:
                     g = self.testgraph
                     # skip any genes that don't match our test set
-                    if (int(gene_a_num) not in self.test_ids) or\
-                            (int(gene_b_num) not in self.test_ids):
+                    if gene_a_num not in id_filter or \
+                            gene_b_num not in id_filter:
                         continue
                 else:
                     g = self.graph
                     # when not in test mode, filter by taxon
-                    if int(re.sub(r'taxid:', '', taxid_a.rstrip())) not in\
-                            self.tax_ids or\
-                            int(re.sub(
-                                r'taxid:', '', taxid_b.rstrip())) not in\
-                            self.tax_ids:
+                    if taxid_a.rstrip() not in id_filter or \
+                            taxid_b.rstrip() not in id_filter:
                         continue
                     else:
                         matchcounter += 1
@@ -196,8 +198,7 @@ class BioGrid(Source):
                 assoc.add_association_to_graph(g)
                 assoc.load_all_properties(g)
 
-                if not self.testMode and (
-                        limit is not None and line_counter > limit):
+                if self.reached_limit(line_counter, limit):
                     break
 
         myzip.close()
@@ -279,8 +280,7 @@ class BioGrid(Source):
                     #   FIXME - i am not sure these are synonyms, altids?
                     #   gu.addSynonym(g,biogrid_id,id_num)
 
-                if not self.testMode and limit is not None \
-                        and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         myzip.close()
@@ -210,8 +210,7 @@ class CTD(Source):
                     elif file == self.files['gene_disease']['file']:
                         self._process_disease2gene(row)
 
-                if not self.testMode and \
-                        limit is not None and row_count >= limit:
+                if self.reached_limit(row_count, limit):
                     break
 
         return
@@ -638,8 +637,7 @@ class CTD(Source):
                     pubids = None
                 self._make_association(chem_id, disease_id, rel_id, pubids)
 
-                if not self.testMode and limit is not None \
-                        and line_counter >= limit:
+                if self.reached_limit(line_counter, limit):
                     break
         return
 
@@ -10,6 +10,7 @@ from dipper.models.Genotype import Genotype
 from dipper.models.assoc.G2PAssoc import G2PAssoc
 # from dipper.models.assoc.Association import Assoc  # unused
 from dipper.utils.GraphUtils import GraphUtils
+from dipper.utils.TestIdIndex import TestIdIndex
 from dipper.models.Reference import Reference
 from dipper import curie_map
 from dipper import config
@@ -74,6 +75,7 @@ class ClinVar(Source):
         if 'test_ids' not in config.get_config() or \
                 'disease' not in config.get_config()['test_ids']:
             logger.warning("not configured with disease test ids.")
+            self.disease_ids = []
         else:
             self.disease_ids = config.get_config()['test_ids']['disease']
 
@@ -85,9 +87,20 @@ class ClinVar(Source):
 
         # note: version set from the file date
         self.get_files(is_dl_forced)
+        # variant_citations is rewritten by scrub(), so isn't indexed
+        self.index_test_rows(['variant_summary'], self._get_test_ids())
 
         return
 
+    def _get_test_ids(self):
+        """
+        The ids that pick the test variants: by gene, variant or disease.
+        :return: list
+        """
+
+        return list(self.gene_ids or []) + self.variant_ids + \
+            list(self.disease_ids)
+
     def scrub(self):
         """
         The var_citations file has a bad row in it with > 6 cols.
@@ -158,7 +171,7 @@ class ClinVar(Source):
         line_counter = 0
         myfile = '/'.join((self.rawdir, self.files['variant_summary']['file']))
         with gzip.open(myfile, 'rb') as f:
-            for line in f:
+            for line in self.test_rows(f, myfile, self._get_test_ids()):
                 # skip comments
                 line = line.decode().strip()
                 if re.match(r'^#', line):
@@ -420,8 +433,7 @@ class ClinVar(Source):
                             # logger.info("xref prefix to add: %s", xrefid)
                             pass
 
-                if not self.testMode and limit is not None \
-                        and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         gu.loadProperties(g, G2PAssoc.object_properties, gu.OBJPROP)
@@ -459,7 +471,13 @@ class ClinVar(Source):
             g = self.graph
 
         with open(myfile, 'r', encoding="utf8") as f:
-            filereader = csv.reader(f, delimiter='\t', quotechar='\"')
+            rows = f
+            if self.dual_output and not self.testMode:
+                # scrub() rewrites this file, so it has no test id index;
+                # just mark the rows of the test variants for the testgraph
+                rows = self._mark_test_rows(
+                    f, TestIdIndex.row_matcher(self.variant_ids))
+            filereader = csv.reader(rows, delimiter='\t', quotechar='\"')
 
             for line in filereader:
                 # skip comments
@@ -505,8 +523,7 @@ class ClinVar(Source):
                     gu.addTriple(
                         g, ref_id, self.properties['is_about'], var_id)
 
-                if not self.testMode \
-                        and (limit is not None and line_counter > limit):
+                if self.reached_limit(line_counter, limit):
                     break
 
         logger.info("Finished processing citations for variants")
@@ -18,6 +18,7 @@ from dipper.models.assoc.G2PAssoc import G2PAssoc
 from dipper.models.Reference import Reference
 from dipper.models.GenomicFeature import Feature, makeChromID
 from dipper.utils.DipperUtil import DipperUtil
+from dipper.utils.TaxonIndex import TaxonIndex
 
 
 logger = logging.getLogger(__name__)
@@ -101,6 +102,11 @@ class Coriell(Source):
         self.dataset = Dataset(
             'coriell', 'Coriell', 'http://ccr.coriell.org/', None)
 
+        # offline NCBI taxonomy, for species missing from _map_species;
+        # fetched and indexed only if one of them turns up
+        self.tax_index = None
+        self.is_dl_forced = False
+
         # data-source specific warnings
         # (will be removed when issues are cleared)
 
@@ -198,6 +204,9 @@ class Coriell(Source):
 
                 self.dataset.setFileAccessUrl(remotef.filename)
                 self.dataset.setVersion(filedate)
+
+        self.is_dl_forced = is_dl_forced
+
         return
 
     def parse(self, limit=None):
@@ -724,8 +733,7 @@ class Coriell(Source):
                                 g, pubmed_id, gu.properties['mentions'],
                                 cell_line_id)
 
-                    if not self.testMode \
-                            and (limit is not None and line_counter > limit):
+                    if self.reached_limit(line_counter, limit):
                         break
 
             Assoc(self.name).load_all_properties(g)
@@ -842,8 +850,27 @@ class Coriell(Source):
 
         return rtype
 
-    @staticmethod
-    def _map_species(species):
+    def _get_tax_index(self):
+        """
+        The NCBI taxonomy, fetched and indexed the first time that
+        a species isn't in _map_species, since most builds never need it.
+        Without it, the index stays empty and finds nothing.
+        :return: TaxonIndex
+        """
+        if self.tax_index is None:
+            self.tax_index = TaxonIndex()
+            try:
+                self.tax_index.fetch(self, self.is_dl_forced)
+            except OSError as e:
+                logger.error("Couldn't fetch the NCBI taxonomy: %s", e)
+            if not self.tax_index.load():
+                logger.error(
+                    "Without the NCBI taxonomy, organisms that aren't "
+                    "mapped here will have no taxon")
+
+        return self.tax_index
+
+    def _map_species(self, species):
         tax = None
         type_map = {
             'Mus musculus': 'NCBITaxon:10090',
@@ -882,7 +909,9 @@ class Coriell(Source):
         if species.strip() in type_map:
             tax = type_map.get(species)
         else:
-            logger.warning("Species type not mapped: %s", species)
+            tax = self._get_tax_index().get_taxon_id(species)
+            if tax is None:
+                logger.warning("Species type not mapped: %s", species)
 
         return tax
 
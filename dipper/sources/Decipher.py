@@ -208,8 +208,7 @@ class Decipher(Source):
                 # are they about the gene?  the omim disease?  something else?
                 # So, we wont create associations until this is clarified
 
-                if not self.testMode and limit is not None \
-                        and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         myzip.close()
@@ -227,7 +227,7 @@ class EOM(PostgreSQLSource):
                 # morphology_term_id has page morphology_term_url
                 gu.addPage(self.graph, morphology_term_id, morphology_term_url)
 
-                if limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
         return
 
@@ -264,7 +264,7 @@ class EOM(PostgreSQLSource):
                     logger.warning('No matching HP term for %s',
                                    morphology_term_label)
 
-                if limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
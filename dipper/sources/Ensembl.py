@@ -101,8 +101,10 @@ class Ensembl(Source):
 
         logger.info("Parsing files...")
 
-        for t in self.tax_ids:
-            self._process_genes(str(t), limit)
+        # each taxon has its own file, so they can be done side by side
+        self.fan_out(
+            lambda taxid: self._process_genes(taxid, limit),
+            [str(t) for t in self.tax_ids])
 
         self.load_core_bindings()
         self.load_bindings()
@@ -230,8 +232,7 @@ class Ensembl(Source):
                     gu.addEquivalentClass(g, gene_id, hgnc_id)
                 geno.addTaxon('NCBITaxon:'+taxid, gene_id)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         gu.loadProperties(g, Feature.object_properties, gu.OBJPROP)
@@ -13,7 +13,9 @@ from dipper.models.Reference import Reference
 from dipper.models.Environment import Environment
 from dipper import curie_map
 from dipper.utils.GraphUtils import GraphUtils
-from dipper.utils.DipperUtil import DipperUtil
+from dipper.utils.TaxonIndex import TaxonIndex
+from dipper.utils.StepScheduler import Step
+from dipper.utils.IdTable import IdTable
 from dipper import config
 # from dipper.models.GenomicFeature import Feature  # unused
 
@@ -59,12 +61,95 @@ class FlyBase(PostgreSQLSource):
         'phenotype_cvterm',     # done
         'phendesc',             # done
         'environment_cvterm',   # done
-        'stockprop'
+        'stockprop',
+        'feature',
         # 'feature_cvterm'
         # TODO to get better feature types than (what) is in the feature table
         # itself  (watch out for is_not)
     ]
 
+    # the databases whose dbxrefs we use
+    dbxref_db_ids = {
+        50: 'PMID',     # pubmed
+        68: 'RO',       # obo-rel
+        71: 'FBdv',     # FBdv
+        74: 'FBbt',     # FBbt
+        # 28:,          # genbank
+        30: 'OMIM',     # MIM
+        # 38,           # ncbi
+        75: 'ISBN',     # ISBN
+        46: 'PMID',     # PUBMED
+        51: 'ISBN',     # isbn
+        52: 'SO',       # so
+        # 76,           # http
+        77: 'PMID',     # PMID
+        80: 'FBcv',     # FBcv
+        # 95,           # MEDLINE
+        98: 'REACT',    # Reactome
+        103: 'CHEBI',   # Chebi
+        102: 'MESH',    # MeSH
+        106: 'OMIM',    # OMIM
+        105: 'KEGG-path',  # KEGG pathway
+        107: 'DOI',     # doi
+        108: 'CL',      # CL
+        114: 'CHEBI',   # CHEBI
+        115: 'KEGG',    # KEGG
+        116: 'PubChem',  # PubChem
+        # 120,          # MA???
+        3: 'GO',        # GO
+        4: 'FlyBase',   # FlyBase
+        # 126,          # URL
+        128: 'PATO',    # PATO
+        # 131,          # IMG
+        2: 'SO',        # SO
+        136: 'MESH',    # MESH
+        139: 'CARO',    # CARO
+        140: 'NCBITaxon',  # NCBITaxon
+        # 151,          # MP  ???
+        161: 'DOI',     # doi
+        36: 'BDGP',     # BDGP
+        # 55,           # DGRC
+        # 54,           # DRSC
+        # 169,          # Transgenic RNAi project???
+        231: 'RO',      # RO ???
+        180: 'NCBIGene',  # entrezgene
+        # 192,          # Bloomington stock center
+        197: 'UBERON',  # Uberon
+        212: 'ENSEMBL',  # Ensembl
+        # 129,          # GenomeRNAi
+        275: 'PMID',    # PubMed
+        286: 'PMID',    # pmid
+        264: 'HGNC',
+        # 265: 'OMIM',  # OMIM_Gene
+        266: 'OMIM',    # OMIM_Phenotype
+        300: 'DOID',    # DOID
+        302: 'MESH',    # MSH
+        347: 'PMID',    # Pubmed
+    }
+
+    # only fetch the columns and rows that the parsers below use
+    table_projections = {
+        'feature': {
+            'columns': [
+                'feature_id', 'organism_id', 'name', 'uniquename', 'type_id',
+                'is_obsolete'],
+            'key': ['feature_id'],
+            'where': 'is_analysis = false'},
+        'dbxref': {
+            'columns': ['dbxref_id', 'db_id', 'accession', 'url'],
+            'key': ['dbxref_id'],
+            'where': "db_id IN ({0}) OR url <> ''".format(
+                ', '.join(str(k) for k in sorted(dbxref_db_ids)))},
+        'cvterm': {
+            'columns': ['cvterm_id', 'dbxref_id', 'name'],
+            'key': ['cvterm_id']},
+        'pub': {
+            'columns': [
+                'pub_id', 'title', 'pyear', 'miniref', 'is_obsolete',
+                'uniquename'],
+            'key': ['pub_id']},
+    }
+
     files = {
         'disease_models': {
             'file': 'allele_human_disease_model_data.tsv.gz',
@@ -125,10 +210,10 @@ class FlyBase(PostgreSQLSource):
         # in the hash.
         # This allows us to do the 'joining' on the fly
         self.idhash = {
-            'allele': {}, 'gene': {}, 'publication': {}, 'stock': {},
-            'genotype': {}, 'annot': {}, 'notes': {}, 'organism': {},
-            'environment': {}, 'feature': {}, 'phenotype': {}, 'cvterm': {},
-            'reagent': {}}
+            t: IdTable.join_table() for t in (
+                'allele', 'gene', 'publication', 'stock', 'genotype',
+                'annot', 'notes', 'organism', 'environment', 'feature',
+                'phenotype', 'cvterm', 'reagent')}
         self.dbxrefs = {}
         # to store if a marker is a class or indiv
         self.markers = {'classes': [], 'indiv': []}
@@ -143,8 +228,10 @@ class FlyBase(PostgreSQLSource):
         self.feature_to_organism_hash = {}
         # store the feature types, they are needed for making some triples
         self.feature_types = {}
-        # when we verify a tax id in eutils
+        # when we verify a tax id in the taxon index
         self.checked_organisms = set()
+        # offline NCBI taxonomy, to resolve organisms without eutils
+        self.tax_index = TaxonIndex()
         self.deprecated_features = set()
 
         # check to see if there's any ids configured in the config;
@@ -178,20 +265,9 @@ class FlyBase(PostgreSQLSource):
         # self.fetch_from_pgdb(self.tables,cxn,100)  #for testing
         self.fetch_from_pgdb(self.tables, cxn, None, is_dl_forced)
 
-        # we want to fetch the features,
-        # but just a subset to reduce the processing time
-        query = \
-            "SELECT " \
-            " feature_id, dbxref_id, organism_id, name, uniquename, " \
-            " null as residues, seqlen, md5checksum, type_id, is_analysis," \
-            " timeaccessioned, timelastmodified, is_obsolete " \
-            "FROM feature WHERE is_analysis = false"
-
-        self.fetch_query_from_pgdb(
-            'feature', query, None, cxn, None, is_dl_forced)
-
         self._get_human_models_file()
         self.get_files(False)
+        self.tax_index.fetch(self, is_dl_forced)
         self.dataset.set_version_by_num(self.version_num)
 
         return
@@ -216,41 +292,96 @@ class FlyBase(PostgreSQLSource):
 
         self.nobnodes = True
 
+        if not self.tax_index.load():
+            logger.error(
+                "Without the NCBI taxonomy, organisms that aren't mapped "
+                "here will have no taxon")
+
+        # The steps are listed in an order that works serially;
+        # the lookups each one builds (outputs) or uses (inputs)
+        # let independent steps run alongside each other.
         # the following will provide us the hash-lookups
-        self._process_dbxref()
-        self._process_cvterm()
-        self._process_genotypes(limit)
-        self._process_pubs(limit)
-        # do this before environments to get the external ids
-        self._process_environment_cvterm()
-        self._process_environments()
-        self._process_organisms(limit)  # must be done before features
-        self._process_organism_dbxref(limit)
-        self._process_features(limit)
-        self._process_phenotype(limit)
-        self._process_phenotype_cvterm()
-        # gets external mappings for features (genes, variants, etc)
-        self._process_feature_dbxref(limit)
-        # do this after organisms to get the right taxonomy
-        self._process_stocks(limit)
-        # figures out types of some of the features
-        self._get_derived_feature_types(limit)
-
-        # These are the associations amongst the objects above
-        self._process_stockprop(limit)
-        self._process_pub_dbxref(limit)
-        self._process_phendesc(limit)
-        self._process_feature_genotype(limit)
-        self._process_feature_pub(limit)
-        self._process_stock_genotype(limit)
-        self._process_phenstatement(limit)   # these are G2P associations
-
-        self._process_feature_relationship(limit)
-
-        self._process_disease_models(limit)
+        steps = [
+            Step(self._process_dbxref,
+                 inputs=['dbxref_db_ids'], outputs=['dbxrefs']),
+            Step(self._process_cvterm,
+                 inputs=['dbxrefs'], outputs=['idhash.cvterm', 'label_hash']),
+            Step(self._process_genotypes, (limit,),
+                 outputs=['idhash.genotype']),
+            Step(self._process_pubs, (limit,),
+                 outputs=['idhash.publication']),
+            # do this before environments to get the external ids
+            Step(self._process_environment_cvterm,
+                 inputs=['idhash.cvterm'], outputs=['idhash.environment']),
+            Step(self._process_environments,
+                 inputs=['idhash.environment'],
+                 outputs=['idhash.environment', 'label_hash']),
+            # must be done before features
+            Step(self._process_organisms, (limit,),
+                 outputs=['idhash.organism', 'label_hash']),
+            Step(self._process_organism_dbxref, (limit,),
+                 inputs=['dbxrefs', 'idhash.organism', 'label_hash']),
+            Step(self._process_features, (limit,),
+                 inputs=['checked_organisms', 'feature_to_organism_hash',
+                         'idhash.cvterm', 'idhash.organism', 'label_hash',
+                         'tax_index'],
+                 outputs=['checked_organisms', 'deprecated_features',
+                          'feature_to_organism_hash', 'feature_types',
+                          'idhash.allele', 'idhash.feature', 'idhash.gene',
+                          'idhash.organism', 'idhash.reagent', 'label_hash']),
+            Step(self._process_phenotype, (limit,),
+                 inputs=['idhash.cvterm', 'label_hash'],
+                 outputs=['idhash.phenotype', 'label_hash']),
+            Step(self._process_phenotype_cvterm,
+                 inputs=['idhash.cvterm', 'idhash.phenotype'],
+                 outputs=['phenocv']),
+            # gets external mappings for features (genes, variants, etc)
+            Step(self._process_feature_dbxref, (limit,),
+                 inputs=['dbxrefs', 'idhash.feature', 'label_hash']),
+            # do this after organisms to get the right taxonomy
+            Step(self._process_stocks, (limit,),
+                 inputs=['idhash.organism', 'label_hash'],
+                 outputs=['idhash.stock']),
+            # figures out types of some of the features
+            Step(self._get_derived_feature_types, (limit,),
+                 inputs=['feature_types', 'idhash.allele'],
+                 outputs=['feature_types']),
+
+            # These are the associations amongst the objects above
+            Step(self._process_stockprop, (limit,),
+                 inputs=['idhash.stock']),
+            Step(self._process_pub_dbxref, (limit,),
+                 inputs=['dbxrefs', 'idhash.publication']),
+            Step(self._process_phendesc, (limit,),
+                 inputs=['idhash.environment', 'idhash.genotype',
+                         'idhash.publication']),
+            Step(self._process_feature_genotype, (limit,),
+                 inputs=['idhash.feature', 'idhash.genotype']),
+            Step(self._process_feature_pub, (limit,),
+                 inputs=['idhash.feature', 'idhash.publication']),
+            Step(self._process_stock_genotype, (limit,),
+                 inputs=['idhash.genotype', 'idhash.stock']),
+            # these are G2P associations
+            Step(self._process_phenstatement, (limit,),
+                 inputs=['idhash.environment', 'idhash.genotype',
+                         'idhash.phenotype', 'idhash.publication',
+                         'label_hash', 'phenocv']),
+
+            Step(self._process_feature_relationship, (limit,),
+                 inputs=['deprecated_features', 'feature_types',
+                         'idhash.allele', 'idhash.feature', 'idhash.gene',
+                         'idhash.reagent', 'label_hash']),
+
+            Step(self._process_disease_models, (limit,))
+        ]
+        # the db ids are fixed, and the taxon index was loaded above
+        self.run_steps(steps, provided=['dbxref_db_ids', 'tax_index'])
+
         # TODO add version info from file somehow
         # (in parser rather than during fetching)
 
+        # in pipelined mode, let the last tables finish saving
+        self.wait_for_table_streams()
         logger.info("Finished parsing.")
 
         self.load_bindings()
@@ -286,7 +417,7 @@ class FlyBase(PostgreSQLSource):
         gu = GraphUtils(curie_map.get())
         geno = Genotype(g)
         fly_tax = 'NCBITaxon:7227'
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             for line in filereader:
@@ -305,8 +436,7 @@ class FlyBase(PostgreSQLSource):
                 if description == '':
                     description = None
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     pass
                 else:
                     if self.testMode and \
@@ -352,7 +482,7 @@ class FlyBase(PostgreSQLSource):
         logger.info("building labels for stocks")
         gu = GraphUtils(curie_map.get())
 
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             for line in filereader:
@@ -373,8 +503,7 @@ class FlyBase(PostgreSQLSource):
                 # from what i can tell, the dbxrefs are just more FBst,
                 # so no added information vs uniquename
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     pass
                 else:
                     if self.testMode \
@@ -408,13 +537,11 @@ class FlyBase(PostgreSQLSource):
         raw = '/'.join((self.rawdir, 'pub'))
         logger.info("building labels for pubs")
         gu = GraphUtils(curie_map.get())
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             for line in filereader:
-                (pub_id, title, volumetitle, volume, series_name, issue, pyear,
-                 pages, miniref, type_id, is_obsolete, publisher, pubplace,
-                 uniquename) = line
+                (pub_id, title, pyear, miniref, is_obsolete, uniquename) = line
 # 2       12153979        1       2       FBst0000002     w[*]; betaTub60D[2] Kr[If-1]/CyO        10670
                 # if self.testMode is True:
                 #     if int(object_key) not in self.test_keys.get('genotype'):
@@ -437,8 +564,7 @@ class FlyBase(PostgreSQLSource):
                 if miniref != '':
                     r.setShortCitation(miniref)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     pass
                 else:
                     if self.testMode \
@@ -475,7 +601,7 @@ class FlyBase(PostgreSQLSource):
         env_parts = {}
         label_map = {}
         env = Environment(g)
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             f.readline()  # read the header row; skip
             for line in filereader:
@@ -536,13 +662,12 @@ class FlyBase(PostgreSQLSource):
 
         line_counter = 0
         gu = GraphUtils(curie_map.get())
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             f.readline()  # read the header row; skip
             for line in filereader:
-                (feature_id, dbxref_id, organism_id, name, uniquename,
-                 residues, seqlen, md5checksum, type_id, is_analysis,
-                 timeaccessioned, timelastmodified, is_obsolete) = line
+                (feature_id, organism_id, name, uniquename, type_id,
+                 is_obsolete) = line
 
                 feature_key = feature_id
                 if re.search(r'[\|\s\[\]\{\}\\<\>]', uniquename):
@@ -638,8 +763,7 @@ class FlyBase(PostgreSQLSource):
                     # make only fly things leaders
                     gu.makeLeader(g, feature_id)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     pass
                 else:
                     if is_gene:
@@ -668,9 +792,6 @@ class FlyBase(PostgreSQLSource):
                         g, feature_id,
                         self._makeInternalIdentifier('feature', feature_key))
 
-            # TODO save checked_organisms fbid to ncbitax mapping to
-            # a local file to speed up subsequent searches
-
         return
 
     def _process_feature_genotype(self, limit):
@@ -685,7 +806,7 @@ class FlyBase(PostgreSQLSource):
         geno = Genotype(g)
         line_counter = 0
 
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             for line in filereader:
@@ -718,8 +839,7 @@ class FlyBase(PostgreSQLSource):
 
                 # TODO we will build up the genotypes here... lots to do
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -743,7 +863,7 @@ class FlyBase(PostgreSQLSource):
 
         line_counter = 0
         gu = GraphUtils(curie_map.get())
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             f.readline()  # read the header row; skip
             for line in filereader:
@@ -781,8 +901,7 @@ class FlyBase(PostgreSQLSource):
                 assoc_id = assoc.get_association_id()
                 gu.addComment(g, assoc_id, phendesc_id)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -807,7 +926,7 @@ class FlyBase(PostgreSQLSource):
         line_counter = 0
         gu = GraphUtils(curie_map.get())
 
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             f.readline()  # read the header row; skip
             for line in filereader:
@@ -832,8 +951,7 @@ class FlyBase(PostgreSQLSource):
 
                 line_counter += 1
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -857,7 +975,7 @@ class FlyBase(PostgreSQLSource):
         line_counter = 0
         gu = GraphUtils(curie_map.get())
 
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             f.readline()  # read the header row; skip
             for line in filereader:
@@ -878,8 +996,7 @@ class FlyBase(PostgreSQLSource):
 
                 line_counter += 1
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -903,7 +1020,7 @@ class FlyBase(PostgreSQLSource):
         line_counter = 0
         gu = GraphUtils(curie_map.get())
 
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             f.readline()  # read the header row; skip
             for line in filereader:
@@ -946,8 +1063,7 @@ class FlyBase(PostgreSQLSource):
                             gu.addSameIndividual(g, pub_id, dbxref_id)
                             line_counter += 1
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -970,71 +1086,15 @@ class FlyBase(PostgreSQLSource):
         logger.info("processing dbxrefs")
         line_counter = 0
 
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             f.readline()  # read the header row; skip
             for line in filereader:
-                (dbxref_id, db_id, accession, version, description, url) = line
-                # dbxref_id	db_id	accession	version	description	url
+                (dbxref_id, db_id, accession, url) = line
+                # dbxref_id	db_id	accession	url
                 # 1	2	SO:0000000	""
 
-                db_ids = {          # the databases to fetch
-                    50: 'PMID',     # pubmed
-                    68: 'RO',       # obo-rel
-                    71: 'FBdv',     # FBdv
-                    74: 'FBbt',     # FBbt
-                    # 28:,          # genbank
-                    30: 'OMIM',     # MIM
-                    # 38,           # ncbi
-                    75: 'ISBN',     # ISBN
-                    46: 'PMID',     # PUBMED
-                    51: 'ISBN',     # isbn
-                    52: 'SO',       # so
-                    # 76,           # http
-                    77: 'PMID',     # PMID
-                    80: 'FBcv',     # FBcv
-                    # 95,           # MEDLINE
-                    98: 'REACT',    # Reactome
-                    103: 'CHEBI',   # Chebi
-                    102: 'MESH',    # MeSH
-                    106: 'OMIM',    # OMIM
-                    105: 'KEGG-path',  # KEGG pathway
-                    107: 'DOI',     # doi
-                    108: 'CL',      # CL
-                    114: 'CHEBI',   # CHEBI
-                    115: 'KEGG',    # KEGG
-                    116: 'PubChem',  # PubChem
-                    # 120,          # MA???
-                    3: 'GO',        # GO
-                    4: 'FlyBase',   # FlyBase
-                    # 126,          # URL
-                    128: 'PATO',    # PATO
-                    # 131,          # IMG
-                    2: 'SO',        # SO
-                    136: 'MESH',    # MESH
-                    139: 'CARO',    # CARO
-                    140: 'NCBITaxon',  # NCBITaxon
-                    # 151,          # MP  ???
-                    161: 'DOI',     # doi
-                    36: 'BDGP',     # BDGP
-                    # 55,           # DGRC
-                    # 54,           # DRSC
-                    # 169,          # Transgenic RNAi project???
-                    231: 'RO',      # RO ???
-                    180: 'NCBIGene',  # entrezgene
-                    # 192,          # Bloomington stock center
-                    197: 'UBERON',  # Uberon
-                    212: 'ENSEMBL',  # Ensembl
-                    # 129,          # GenomeRNAi
-                    275: 'PMID',    # PubMed
-                    286: 'PMID',    # pmid
-                    264: 'HGNC',
-                    # 265: 'OMIM',  # OMIM_Gene
-                    266: 'OMIM',    # OMIM_Phenotype
-                    300: 'DOID',    # DOID
-                    302: 'MESH',    # MSH
-                    347: 'PMID',    # Pubmed
-                }
+                db_ids = self.dbxref_db_ids
 
                 if accession.strip() != '' and int(db_id) in db_ids:
                     # scrub some identifiers here
@@ -1115,7 +1175,7 @@ class FlyBase(PostgreSQLSource):
         line_counter = 0
         gu = GraphUtils(curie_map.get())
 
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             f.readline()  # read the header row; skip
             for line in filereader:
@@ -1165,8 +1225,7 @@ class FlyBase(PostgreSQLSource):
 
                 # assay_id is currently only "undefined" key=60468
 
-                if not self.testMode and\
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     pass
                 else:
                     if phenotype_id is not None:
@@ -1200,7 +1259,7 @@ class FlyBase(PostgreSQLSource):
         line_counter = 0
         gu = GraphUtils(curie_map.get())
 
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             f.readline()  # read the header row; skip
             for line in filereader:
@@ -1261,8 +1320,7 @@ class FlyBase(PostgreSQLSource):
                 gu.addComment(g, assoc_id, phenstatement_id)
                 gu.addDescription(g, assoc_id, phenotype_internal_label)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -1282,7 +1340,7 @@ class FlyBase(PostgreSQLSource):
         raw = '/'.join((self.rawdir, 'phenotype_cvterm'))
         logger.info("processing phenotype cvterm mappings")
 
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             for line in filereader:
@@ -1325,18 +1383,17 @@ class FlyBase(PostgreSQLSource):
         raw = '/'.join((self.rawdir, 'cvterm'))
         logger.info("processing cvterms")
 
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             for line in filereader:
                 line_counter += 1
 
-                (cvterm_id, cv_id, definition, dbxref_id, is_obsolete,
-                 is_relationshiptype, name) = line
+                (cvterm_id, dbxref_id, name) = line
 
-                # 316 6 1665919 0 0 rRNA_cleavage_snoRNA_primary_transcript
-                # 28  5 1663309 0 0 synonym
-                # 455 6 1665920 0 0 tmRNA
+                # 316 1665919 rRNA_cleavage_snoRNA_primary_transcript
+                # 28  1663309 synonym
+                # 455 1665920 tmRNA
 
                 # not sure the following is necessary
                 # cv_prefixes = {
@@ -1388,7 +1445,7 @@ class FlyBase(PostgreSQLSource):
         raw = '/'.join((self.rawdir, 'environment_cvterm'))
         logger.info("processing environment to cvterm mappings")
 
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             for line in filereader:
@@ -1427,7 +1484,7 @@ class FlyBase(PostgreSQLSource):
         raw = '/'.join((self.rawdir, 'feature_dbxref'))
         logger.info("processing feature dbxref mappings")
         gu = GraphUtils(curie_map.get())
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             for line in filereader:
@@ -1482,8 +1539,7 @@ class FlyBase(PostgreSQLSource):
                             gu.addSameIndividual(g, feature_id, did)
                         line_counter += 1
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
                 # FIXME - some flybase genes are xrefed to OMIM diseases!!!!!!
@@ -1513,7 +1569,7 @@ class FlyBase(PostgreSQLSource):
         gu = GraphUtils(curie_map.get())
         raw = '/'.join((self.rawdir, 'feature_relationship'))
         logger.info("determining some feature types based on relationships")
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             for line in filereader:
@@ -1553,7 +1609,7 @@ class FlyBase(PostgreSQLSource):
         raw = '/'.join((self.rawdir, 'feature_relationship'))
         logger.info("processing feature relationships")
         gu = GraphUtils(curie_map.get())
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             for line in filereader:
@@ -1749,8 +1805,7 @@ class FlyBase(PostgreSQLSource):
                     if tp_id is not None and allele_id is not None:
                         geno.addSequenceDerivesFrom(allele_id, tp_id)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
         return
 
@@ -1774,7 +1829,7 @@ class FlyBase(PostgreSQLSource):
         line_counter = 0
         gu = GraphUtils(curie_map.get())
 
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             f.readline()  # read the header row; skip
             for line in filereader:
@@ -1801,8 +1856,7 @@ class FlyBase(PostgreSQLSource):
                         int(organism_id) not in self.test_keys['organism']:
                     continue
 
-                if not self.testMode and\
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     pass
                 else:
                     gu.addClassToGraph(g, tax_id, tax_label)
@@ -1822,10 +1876,9 @@ class FlyBase(PostgreSQLSource):
             # check to see if NCBITaxon has been resolved; if not fetch it
             if not re.match(r'NCBITaxon', organism_id):
                 # NCBITaxon is not available in the dbxref or cvterm tables.
-                # so we look them up using NCBI eutils services
+                # so we look them up in the local NCBI taxonomy index
                 tax_label = self.label_hash[organism_id]
-                # FIXME comment this out to speed things up
-                tax_num = DipperUtil.get_ncbi_taxon_num_by_label(tax_label)
+                tax_num = self.tax_index.get_taxon_num(tax_label)
                 if tax_num is not None:
                     organism_id = ':'.join(('NCBITaxon', tax_num))
                     self.idhash['organism'][organism_key] = organism_id
@@ -1854,7 +1907,7 @@ class FlyBase(PostgreSQLSource):
         raw = '/'.join((self.rawdir, 'organism_dbxref'))
         logger.info("processing organsim dbxref mappings")
         gu = GraphUtils(curie_map.get())
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             for line in filereader:
@@ -1885,8 +1938,7 @@ class FlyBase(PostgreSQLSource):
                             gu.makeLeader(g, did)
                         line_counter += 1
 
-                if not self.testMode and\
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -1956,8 +2008,7 @@ class FlyBase(PostgreSQLSource):
 
                 assoc.add_association_to_graph(g)
 
-                if not self.testMode and\
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -1982,7 +2033,7 @@ class FlyBase(PostgreSQLSource):
         line_counter = 0
         gu = GraphUtils(curie_map.get())
 
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             for line in filereader:
@@ -2010,8 +2061,7 @@ class FlyBase(PostgreSQLSource):
 
                 # TODO add the stockprop_pub table when there is data to pull
 
-                if not self.testMode and\
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
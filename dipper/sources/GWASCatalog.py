@@ -328,8 +328,7 @@ class GWASCatalog(Source):
                             # assoc.set_score(pvalue)
                             assoc.add_association_to_graph(g)
 
-                    if not self.testMode and\
-                            (limit is not None and line_counter > limit):
+                    if self.reached_limit(line_counter, limit):
                         break
 
             Assoc(self.name).load_all_properties(g)
@@ -13,6 +13,7 @@ from dipper.models.Genotype import Genotype
 from dipper.models.Reference import Reference
 from dipper.models.Dataset import Dataset
 from dipper.utils.GraphUtils import GraphUtils
+from dipper.utils.SpillDict import SpillDict
 from dipper import curie_map
 from dipper import config
 
@@ -130,9 +131,7 @@ class GeneOntology(Source):
 
         self.nobnodes = True  # FIXME
 
-        # build the id map for mapping uniprot ids to genes
-        uniprot_entrez_id_map = self.get_uniprot_entrez_id_map()
-
+        gafs = []
         for s in self.files:
 
             if s in ['go-references', 'id-map']:
@@ -141,8 +140,20 @@ class GeneOntology(Source):
             if not self.testMode and int(s) not in self.tax_ids:
                 continue
 
-            file = '/'.join((self.rawdir, self.files.get(s)['file']))
-            self.process_gaf(file, limit, uniprot_entrez_id_map)
+            gafs.append('/'.join((self.rawdir, self.files.get(s)['file'])))
+
+        # build the id map for mapping uniprot ids to genes;
+        # each taxon has its own gaf, so they can be done side by side,
+        # and the worker processes share a single read-only copy of the map
+        frozen = self.parse_workers > 1 and len(gafs) > 1
+        uniprot_entrez_id_map = self.get_uniprot_entrez_id_map(frozen)
+        try:
+            self.fan_out(
+                lambda file: self.process_gaf(
+                    file, limit, uniprot_entrez_id_map), gafs)
+        finally:
+            if frozen:
+                uniprot_entrez_id_map.unlink()
 
         logger.info("Finished parsing.")
 
@@ -353,43 +364,64 @@ class GeneOntology(Source):
                         # TODO should the G2PAssoc be
                         # the evidence for the GO assoc?
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
 
-    def get_uniprot_entrez_id_map(self):
+    def get_uniprot_entrez_id_map(self, frozen=False):
+        """
+        :param frozen: True to build the map straight into a FrozenLookup
+            (to unlink when done), for worker processes to share,
+            rather than into a SpillDict
+        :return: the map of uniprot ids to lists of gene ids
+        """
         logger.info("Mapping Uniprot ids to Entrez/ENSEMBL gene ids")
         import sys
-        id_map = {}
         file = '/'.join((self.rawdir, self.files['id-map']['file']))
         with gzip.open(file, 'rb') as csvfile:
             csv.field_size_limit(sys.maxsize)
             filereader = csv.reader(io.TextIOWrapper(csvfile, newline=""),
                                     delimiter='\t', quotechar='\"')
-            for row in filereader:
-                (uniprotkb_ac, uniprotkb_id, geneid, refseq, gi, pdb, go,
-                 uniref100, unifref90, uniref50, uniparc, pir, ncbitaxon, mim,
-                 unigene, pubmed, embl, embl_cds, ensembl, ensembl_trs,
-                 ensembl_pro, other_pubmed) = row
-
-                if int(ncbitaxon) not in self.tax_ids:
-                    continue
-                if geneid.strip() != '':
-                    idlist = re.split(r';', geneid)
-                    id_map[
-                        uniprotkb_ac.strip()] = [
-                            'NCBIGene:'+i.strip() for i in idlist]
-                elif ensembl.strip() != '':
-                    id_map[
-                        uniprotkb_ac.strip()] = [
-                            'ENSEMBL:'+i.strip() for i in idlist]
+            ids = self._get_uniprot_entrez_ids(filereader)
+            if frozen:
+                # shared memory needs python 3.8, so only import it here;
+                # the rows are sorted on disk, not held in a dict
+                from dipper.utils.FrozenLookup import FrozenLookup
+                id_map = FrozenLookup.build(ids)
+            else:
+                id_map = SpillDict()
+                # in one transaction, if the map is spilled
+                id_map.bulk_load(ids)
 
         logger.info("Acquired %d uniprot-entrez mappings", len(id_map))
 
         return id_map
 
+    def _get_uniprot_entrez_ids(self, filereader):
+        """
+        :param filereader: the rows of the uniprot id mapping file
+        :return: a generator of (uniprot id, list of gene ids)
+        """
+        for row in filereader:
+            (uniprotkb_ac, uniprotkb_id, geneid, refseq, gi, pdb, go,
+             uniref100, unifref90, uniref50, uniparc, pir, ncbitaxon, mim,
+             unigene, pubmed, embl, embl_cds, ensembl, ensembl_trs,
+             ensembl_pro, other_pubmed) = row
+
+            if int(ncbitaxon) not in self.tax_ids:
+                continue
+            if geneid.strip() != '':
+                idlist = re.split(r';', geneid)
+                yield (uniprotkb_ac.strip(),
+                       ['NCBIGene:'+i.strip() for i in idlist])
+            elif ensembl.strip() != '':
+                idlist = re.split(r';', ensembl)
+                yield (uniprotkb_ac.strip(),
+                       ['ENSEMBL:'+i.strip() for i in idlist])
+
+        return
+
     @staticmethod
     def map_go_evidence_code_to_eco(evidence_code):
         """
@@ -179,8 +179,7 @@ class GeneReviews(Source):
 
                 allomimids.add(omim_num)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
             # end looping through file
@@ -360,7 +359,7 @@ class GeneReviews(Source):
             # add the book to the dataset
             self.dataset.setFileAccessUrl(book_item['url'])
 
-            if limit is not None and c > limit:
+            if self.reached_limit(c, limit):
                 break
 
             # finish looping through books
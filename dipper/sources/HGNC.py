@@ -167,8 +167,7 @@ class HGNC(Source):
                         gu.addClassToGraph(g, chrom_id, None)
                         f.addSubsequenceOfFeature(g, chrom_id)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
             # end loop through file
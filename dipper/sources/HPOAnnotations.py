@@ -326,8 +326,7 @@ class HPOAnnotations(Source):
 
                 assoc.add_association_to_graph(g)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
             Assoc(None).load_all_properties(g)
@@ -404,8 +403,7 @@ class HPOAnnotations(Source):
             total_processed += self.process_common_disease_file(raw,
                                                                 unpadded_doids,
                                                                 limit)
-            if not self.testMode \
-                    and limit is not None and total_processed > limit:
+            if self.reached_limit(total_processed, limit):
                 break
         logger.info("Finished iterating over all common disease files.")
         logger.info("Fixed %d/%d incorrectly zero-padded ids",
@@ -544,8 +542,7 @@ class HPOAnnotations(Source):
                     assoc.add_association_to_graph(g)
                     assoc_count += 1
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
             if replace_id_flag:
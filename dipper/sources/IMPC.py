@@ -480,8 +480,7 @@ class IMPC(Source):
                 # resource_id = resource_name
                 # assoc.addSource(g, assoc_id, resource_id)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         gu.loadProperties(g, G2PAssoc.object_properties, gu.OBJPROP)
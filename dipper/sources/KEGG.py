@@ -9,6 +9,8 @@ from dipper.models.assoc.OrthologyAssoc import OrthologyAssoc
 from dipper.models.Genotype import Genotype
 from dipper.models.Reference import Reference
 from dipper.utils.GraphUtils import GraphUtils
+from dipper.utils.IdFilter import IdFilter
+from dipper.utils.SpillDict import SpillDict
 from dipper.models.Pathway import Pathway
 from dipper import curie_map
 from dipper import config
@@ -113,14 +115,18 @@ class KEGG(Source):
 
         # check to see if there are any ids configured in the config;
         # otherwise, warn
+        test_ids = dict(self.test_ids)
         if 'test_ids' not in config.get_config() or\
                 'disease' not in config.get_config()['test_ids']:
             logger.warning("not configured with disease test ids.")
         else:
-            self.test_ids['disease'] += \
+            test_ids['disease'] = test_ids['disease'] + \
                 config.get_config()['test_ids']['disease']
+        # compile the test ids, for checking on every row
+        self.test_ids = dict(
+            (k, IdFilter(v)) for (k, v) in test_ids.items())
 
-        self.label_hash = {}
+        self.label_hash = SpillDict()
         self.omim_disease_hash = {}  # to hold the mappings of omim:kegg ids
         self.kegg_disease_hash = {}  # to hold the mappings of kegg:omim ids
 
@@ -220,8 +226,7 @@ class KEGG(Source):
                     'http://www.genome.jp/kegg/pathway/map/'+image_filename
                 gu.addDepiction(g, pathway_id, image_url)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         logger.info("Done with pathways")
@@ -268,8 +273,7 @@ class KEGG(Source):
                 # not typing the diseases as DOID:4 yet because
                 # I don't want to bulk up the graph unnecessarily
 
-                if (not self.testMode) and (
-                        limit is not None and line_counter > limit):
+                if self.reached_limit(line_counter, limit):
                     break
 
         logger.info("Done with diseases")
@@ -351,8 +355,7 @@ class KEGG(Source):
                         ko = 'KEGG-ko:'+ko_match.group(1)
                         gu.addMemberOf(g, gene_id, ko)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         logger.info("Done with genes")
@@ -424,8 +427,7 @@ class KEGG(Source):
                         for ecm in ec_matches:
                             gu.addXref(g, orthology_class_id, 'EC:'+ecm)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         logger.info("Done with ortholog classes")
@@ -476,8 +478,7 @@ class KEGG(Source):
                 gu.addClassToGraph(g, gene_id, None)
                 gu.addClassToGraph(g, orthology_class_id, None)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         logger.info("Done with orthologs")
@@ -553,8 +554,7 @@ class KEGG(Source):
                     assoc.load_all_properties(g)
                     assoc.add_association_to_graph(g)
 
-                if (not self.testMode) and (
-                        limit is not None and line_counter > limit):
+                if self.reached_limit(line_counter, limit):
                     break
 
         logger.info("Done with KEGG disease to gene")
@@ -635,8 +635,7 @@ class KEGG(Source):
                     logger.warning('Unhandled link type for %s-%s: %s',
                                    kegg_gene_id, omim_id, link_type)
 
-                if (not self.testMode) and (
-                        limit is not None and line_counter > limit):
+                if self.reached_limit(line_counter, limit):
                     break
 
         logger.info("Done with OMIM to KEGG gene")
@@ -700,8 +699,7 @@ class KEGG(Source):
                     omim_disease_id not in self.test_ids['disease']:
                 continue
 
-            if (not self.testMode) and (
-                    limit is not None and line_counter > limit):
+            if self.reached_limit(line_counter, limit):
                 break
             line_counter += 1
 
@@ -766,8 +764,7 @@ class KEGG(Source):
                 gu.addClassToGraph(g, ncbi_gene_id, None)
                 gu.addEquivalentClass(g, kegg_gene_id, ncbi_gene_id)
 
-                if (not self.testMode) and (
-                        limit is not None and line_counter > limit):
+                if self.reached_limit(line_counter, limit):
                     break
 
         logger.info("Done with KEGG gene IDs to NCBI gene IDs")
@@ -809,8 +806,7 @@ class KEGG(Source):
                 gu.addTriple(g, pubmed_id,
                              GraphUtils.object_properties['is_about'], kegg_id)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -855,8 +851,7 @@ class KEGG(Source):
                         'causally_upstream_of_or_within'],
                     disease_id)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -895,8 +890,7 @@ class KEGG(Source):
                 if pathway_id_1 != pathway_id_2:
                     gu.addEquivalentClass(g, pathway_id_1, pathway_id_2)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -932,8 +926,7 @@ class KEGG(Source):
                 p = Pathway(g, self.nobnodes)
                 p.addGeneToPathway(pathway_id, ko_id)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
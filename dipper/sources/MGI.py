@@ -1,5 +1,4 @@
 import csv
-import os
 from datetime import datetime
 import logging
 import re
@@ -13,6 +12,10 @@ from dipper.models.Reference import Reference
 from dipper import config
 from dipper import curie_map
 from dipper.utils.GraphUtils import GraphUtils
+from dipper.utils.IdFilter import IdFilter
+from dipper.utils.StepScheduler import Step
+from dipper.utils.SpillDict import SpillDict
+from dipper.utils.IdTable import IdTable
 from dipper.models.GenomicFeature import Feature, makeChromID
 
 
@@ -77,6 +80,17 @@ class MGI(PostgreSQLSource):
         'mrk_location_cache',  # gene locations
     ]
 
+    # only fetch the columns and rows that the parsers below use
+    table_projections = {
+        'gxd_genotype_view': {
+            'columns': ['_genotype_key', '_strain_key', 'strain', 'mgiid'],
+            'key': ['_genotype_key']},
+    }
+
+    # how many genotypes to look up the labels of at once;
+    # see _get_genotype_parts()
+    label_batch_size = 10000
+
     # for testing purposes, this is a list of internal db keys
     # to match and select only portions of the source
     test_keys = {
@@ -182,17 +196,19 @@ class MGI(PostgreSQLSource):
         # the type-specific-object-keys to MGI public identifiers.
         # then, subsequent views of the table will lookup the identifiers
         # in the hash.  this allows us to do the 'joining' on the fly
+        # (see IdTable.join_table())
         self.idhash = {
-            'allele': {}, 'marker': {}, 'publication': {}, 'strain': {},
-            'genotype': {}, 'annot': {}, 'notes': {}, 'seqalt': {}}
+            t: IdTable.join_table() for t in (
+                'allele', 'marker', 'publication', 'strain', 'genotype',
+                'annot', 'notes', 'seqalt')}
         # to store if a marker is a class or indiv
         self.markers = {
             'classes': [], 'indiv': []}
         # use this to store internally generated labels for various features
-        self.label_hash = {}
+        self.label_hash = SpillDict()
         # use this to store the genotype strain ids
         # for building genotype labels
-        self.geno_bkgd = {}
+        self.geno_bkgd = SpillDict()
         self.strain_to_genotype_map = {}
 
         self.wildtype_alleles = set()
@@ -204,6 +220,12 @@ class MGI(PostgreSQLSource):
             logger.warning("not configured with gene test ids.")
         else:
             self.test_ids = config.get_config()['test_ids']['gene']
+
+        # the test keys are checked on every row in test mode;
+        # compile them into sets of the integer keys
+        self.test_keys = dict(
+            (k, IdFilter(v)) for (k, v) in MGI.test_keys.items())
+
         return
 
     def fetch(self, is_dl_forced=False):
@@ -235,8 +257,8 @@ class MGI(PostgreSQLSource):
         # table mgi_dbinfo, already fetched above
         outfile = '/'.join((self.rawdir, 'mgi_dbinfo'))
 
-        if os.path.exists(outfile):
-            with open(outfile, 'r') as f:
+        if self.has_table(outfile):
+            with self.open_table(outfile) as f:
                 f.readline()  # read the header row; skip
                 info = f.readline()
                 cols = info.split('\t')
@@ -274,32 +296,66 @@ class MGI(PostgreSQLSource):
         if self.testOnly:
             self.testMode = True
 
+        # The steps are listed in an order that works serially;
+        # the lookups each one builds (outputs) or uses (inputs)
+        # let independent steps run alongside each other.
         # the following will provide us the hash-lookups
-        # These must be processed in a specific order
-        self._process_prb_strain_acc_view(limit)
-        self._process_mrk_acc_view()
-        self._process_all_summary_view(limit)
-        self._process_bib_acc_view(limit)
-        self._process_gxd_genotype_summary_view(limit)
-
-        # The following will use the hash populated above
-        # to lookup the ids when filling in the graph
-        self._process_prb_strain_view(limit)
-        # self._process_prb_strain_genotype_view(limit)
-        self._process_gxd_genotype_view(limit)
-        self._process_mrk_marker_view(limit)
-        self._process_mrk_acc_view_for_equiv(limit)
-        self._process_mrk_summary_view(limit)
-        self._process_all_allele_view(limit)
-        self._process_all_allele_mutation_view(limit)
-        self._process_gxd_allele_pair_view(limit)
-        self._process_voc_annot_view(limit)
-        self._process_voc_evidence_view(limit)
-        self._process_mgi_note_vocevidence_view(limit)
-        self._process_mrk_location_cache(limit)
-        self.process_mgi_relationship_transgene_genes(limit)
-        self.process_mgi_note_allele_view(limit)
-
+        steps = [
+            Step(self._process_prb_strain_acc_view, (limit,),
+                 outputs=['idhash.strain']),
+            Step(self._process_mrk_acc_view,
+                 outputs=['idhash.marker']),
+            Step(self._process_all_summary_view, (limit,),
+                 outputs=['idhash.allele', 'label_hash']),
+            Step(self._process_bib_acc_view, (limit,),
+                 outputs=['idhash.publication']),
+            Step(self._process_gxd_genotype_summary_view, (limit,),
+                 outputs=['idhash.genotype']),
+
+            # The following will use the hash populated above
+            # to lookup the ids when filling in the graph
+            Step(self._process_prb_strain_view, (limit,),
+                 inputs=['idhash.strain'], outputs=['label_hash']),
+            # Step(self._process_prb_strain_genotype_view, (limit,)),
+            Step(self._process_gxd_genotype_view, (limit,),
+                 inputs=['idhash.genotype', 'idhash.strain'],
+                 outputs=['geno_bkgd', 'idhash.genotype', 'idhash.strain',
+                          'label_hash']),
+            Step(self._process_mrk_marker_view, (limit,),
+                 inputs=['idhash.marker'], outputs=['label_hash', 'markers']),
+            Step(self._process_mrk_acc_view_for_equiv, (limit,),
+                 inputs=['idhash.marker', 'markers']),
+            Step(self._process_mrk_summary_view, (limit,),
+                 inputs=['idhash.marker', 'markers'],
+                 outputs=['idhash.marker']),
+            Step(self._process_all_allele_view, (limit,),
+                 inputs=['idhash.allele', 'idhash.marker', 'idhash.strain',
+                         'label_hash'],
+                 outputs=['idhash.seqalt', 'label_hash', 'wildtype_alleles']),
+            Step(self._process_all_allele_mutation_view, (limit,),
+                 inputs=['idhash.allele', 'idhash.seqalt', 'label_hash']),
+            Step(self._process_gxd_allele_pair_view, (limit,),
+                 inputs=['geno_bkgd', 'idhash.allele', 'idhash.genotype',
+                         'label_hash', 'wildtype_alleles'],
+                 outputs=['label_hash']),
+            Step(self._process_voc_annot_view, (limit,),
+                 inputs=['idhash.allele', 'idhash.genotype', 'idhash.marker'],
+                 outputs=['idhash.annot']),
+            Step(self._process_voc_evidence_view, (limit,),
+                 inputs=['idhash.annot'], outputs=['idhash.notes']),
+            Step(self._process_mgi_note_vocevidence_view, (limit,),
+                 inputs=['idhash.annot', 'idhash.notes']),
+            Step(self._process_mrk_location_cache, (limit,),
+                 inputs=['idhash.marker', 'markers']),
+            Step(self.process_mgi_relationship_transgene_genes, (limit,),
+                 inputs=['idhash.seqalt']),
+            Step(self.process_mgi_note_allele_view, (limit,),
+                 inputs=['idhash.allele'])
+        ]
+        self.run_steps(steps)
+
+        # in pipelined mode, let the last tables finish saving
+        self.wait_for_table_streams()
         logger.info("Finished parsing.")
 
         self.load_bindings()
@@ -385,14 +441,12 @@ class MGI(PostgreSQLSource):
         raw = '/'.join((self.rawdir, 'gxd_genotype_view'))
         logger.info("getting genotypes and their backgrounds")
         gu = GraphUtils(curie_map.get())
-        with open(raw, 'r') as f1:
+        with self.open_table(raw) as f1:
             f1.readline()  # read the header row; skip
             for line in f1:
                 line_counter += 1
-                (genotype_key, strain_key, isconditional, note, existsas_key,
-                 createdby_key, modifiedby_key, creation_date,
-                 modification_date, strain, mgiid, dbname, createdbymodifiedby,
-                 existsas, empty) = line.split('\t')
+                (genotype_key, strain_key, strain,
+                 mgiid) = line.rstrip('\n').split('\t')
 
                 if self.testMode is True:
                     if int(genotype_key) not in self.test_keys.get('genotype'):
@@ -448,8 +502,7 @@ class MGI(PostgreSQLSource):
                 # add BG to a hash so we can build the genotype label later
                 self.geno_bkgd[mgiid] = strain_id
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -481,7 +534,7 @@ class MGI(PostgreSQLSource):
         raw = '/'.join((self.rawdir, 'gxd_genotype_summary_view'))
         logger.info("building labels for genotypes")
         gu = GraphUtils(curie_map.get())
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             for line in f:
                 line_counter += 1
@@ -510,8 +563,7 @@ class MGI(PostgreSQLSource):
                     pass
                     # TODO what to do with != preferred
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         # now, loop through the hash and add the genotypes as individuals
@@ -554,7 +606,7 @@ class MGI(PostgreSQLSource):
         line_counter = 0
         raw = '/'.join((self.rawdir, 'all_summary_view'))
         logger.info("getting alleles and their labels and descriptions")
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             for line in f:
                 line_counter += 1
@@ -590,8 +642,7 @@ class MGI(PostgreSQLSource):
 
                 # TODO deal with non-preferreds, are these deprecated?
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -633,7 +684,7 @@ class MGI(PostgreSQLSource):
             "adding alleles, mapping to markers, " +
             "extracting their sequence alterations")
         raw = '/'.join((self.rawdir, 'all_allele_view'))
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             for line in f:
                 line_counter += 1
@@ -748,8 +799,7 @@ class MGI(PostgreSQLSource):
                                 'MGI:4867032', 'MGI:5649511']:
                         geno.addSequenceDerivesFrom(allele_id, strain_id)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -779,7 +829,7 @@ class MGI(PostgreSQLSource):
         raw = '/'.join((self.rawdir, 'gxd_allelepair_view'))
         logger.info("processing allele pairs (VSLCs) for genotypes")
         geno_hash = {}
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             for line in f:
                 line_counter += 1
@@ -860,14 +910,17 @@ class MGI(PostgreSQLSource):
                 # else:
                 #     geno_hash[genotype_id] += [vslc_label]
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         # build the gvc and the genotype label
-        for gt in geno_hash.keys():
-            if gt is None:   # not sure why, but sometimes this is the case
-                continue
+        # (not sure why, but sometimes the genotype is None)
+        genotypes = [gt for gt in geno_hash.keys() if gt is not None]
+        for (n, gt) in enumerate(genotypes):
+            if n % self.label_batch_size == 0:
+                # the labels and backgrounds of the next batch, at once
+                (labels, bkgds) = self._get_genotype_parts(
+                    genotypes[n:n + self.label_batch_size], geno_hash)
             vslcs = sorted(list(geno_hash[gt]))
             gvc_label = None
             if len(vslcs) > 1:
@@ -878,7 +931,7 @@ class MGI(PostgreSQLSource):
                     gvc_id = ':'+gvc_id
                 vslc_labels = []
                 for v in vslcs:
-                    vslc_labels.append(self.label_hash[v])
+                    vslc_labels.append(labels[v])
                 gvc_label = '; '.join(vslc_labels)
 
                 gu.addIndividualToGraph(
@@ -895,7 +948,7 @@ class MGI(PostgreSQLSource):
                     geno.object_properties['has_alternate_part'])
             elif len(vslcs) == 1:
                 gvc_id = vslcs[0]
-                gvc_label = self.label_hash[gvc_id]
+                gvc_label = labels[gvc_id]
                 # type the VSLC as also a GVC
                 gu.addIndividualToGraph(
                     g, gvc_id, gvc_label,
@@ -905,9 +958,9 @@ class MGI(PostgreSQLSource):
                 logger.info("No VSLCs for %s", gt)
 
             # make the genotype label = gvc + background
-            bkgd_id = self.geno_bkgd.get(gt)
+            bkgd_id = bkgds[gt]
             if bkgd_id is not None:
-                bkgd_label = self.label_hash.get(bkgd_id)
+                bkgd_label = labels.get(bkgd_id)
                 if bkgd_label is None:
                     bkgd_label = bkgd_id  # just in case
             else:
@@ -922,6 +975,21 @@ class MGI(PostgreSQLSource):
 
         return
 
+    def _get_genotype_parts(self, genotypes, geno_hash):
+        """
+        Look up the labels of the vslcs of some genotypes, and their
+        backgrounds and the labels of those, in a couple of batches.
+        :param genotypes: list of genotype ids
+        :param geno_hash: dict of genotype id -> its vslc ids
+        :return: (dict of id -> label, dict of genotype id -> background)
+        """
+        bkgds = self.geno_bkgd.get_many(genotypes)
+        ids = set(v for gt in genotypes for v in geno_hash[gt])
+        ids.update(b for b in bkgds.values() if b is not None)
+        labels = self.label_hash.get_many(ids)
+
+        return (labels, bkgds)
+
     def _process_all_allele_mutation_view(self, limit):
         """
         This fetches the mutation type for the alleles,
@@ -944,7 +1012,7 @@ class MGI(PostgreSQLSource):
         line_counter = 0
         raw = '/'.join((self.rawdir, 'all_allele_mutation_view'))
         logger.info("getting mutation types for sequence alterations")
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             for line in f:
                 line_counter += 1
@@ -981,8 +1049,7 @@ class MGI(PostgreSQLSource):
 
                 gu.addIndividualToGraph(g, iseqalt_id, None, seq_alt_type_id)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -1014,7 +1081,7 @@ class MGI(PostgreSQLSource):
         line_counter = 0
         logger.info("getting G2P associations")
         raw = '/'.join((self.rawdir, 'voc_annot_view'))
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             for line in f:
 
@@ -1109,8 +1176,7 @@ class MGI(PostgreSQLSource):
                     self.idhash['annot'][annot_key] = assoc_id
                     gu.addComment(g, assoc_id, "annot_key:"+annot_key)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -1141,7 +1207,7 @@ class MGI(PostgreSQLSource):
         line_counter = 0
         logger.info("getting evidence and pubs for annotations")
         raw = '/'.join((self.rawdir, 'voc_evidence_view'))
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             for line in f:
                 line_counter += 1
@@ -1180,8 +1246,7 @@ class MGI(PostgreSQLSource):
                              Assoc.object_properties['has_source'],
                              jnumid)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -1212,7 +1277,7 @@ class MGI(PostgreSQLSource):
         line_counter = 0
         logger.info('populating pub id hash')
         raw = '/'.join((self.rawdir, 'bib_acc_view'))
-        with open(raw, 'r', encoding="utf8") as csvfile:
+        with self.open_table(raw, encoding="utf8") as csvfile:
             filereader = csv.reader(csvfile, delimiter='\t', quotechar='\"')
             for line in filereader:
                 line_counter += 1
@@ -1235,14 +1300,13 @@ class MGI(PostgreSQLSource):
                 r = Reference(accid)
                 r.addRefToGraph(g)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         # 2nd pass, look up the MGI identifier in the hash
         logger.info("getting pub equivalent ids")
         line_counter = 0
-        with open(raw, 'r', encoding="utf8") as csvfile:
+        with self.open_table(raw, encoding="utf8") as csvfile:
             filereader = csv.reader(csvfile, delimiter='\t', quotechar='\"')
             for line in filereader:
                 line_counter += 1
@@ -1293,8 +1357,7 @@ class MGI(PostgreSQLSource):
                     logger.warning("Publication from (%s) not mapped for %s",
                                    logical_db, object_key)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -1326,7 +1389,7 @@ class MGI(PostgreSQLSource):
         geno = Genotype(g)
         raw = '/'.join((self.rawdir, 'prb_strain_view'))
         logger.info("getting strains and adding their taxa")
-        with open(raw, 'r', encoding="utf8") as csvfile:
+        with self.open_table(raw, encoding="utf8") as csvfile:
             filereader = csv.reader(csvfile, delimiter='\t', quotechar='\"')
             for line in filereader:
                 line_counter += 1
@@ -1353,8 +1416,7 @@ class MGI(PostgreSQLSource):
                         geno.addTaxon(sp, strain_id)
                     gu.addIndividualToGraph(g, strain_id, strain, sp)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -1387,7 +1449,7 @@ class MGI(PostgreSQLSource):
         line_counter = 0
         raw = '/'.join((self.rawdir, 'mrk_marker_view'))
         logger.info("getting markers and assigning types")
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             for line in f:
                 line_counter += 1
@@ -1445,8 +1507,7 @@ class MGI(PostgreSQLSource):
                     if taxon_id == 'NCBITaxon:10090':
                         gu.makeLeader(g, marker_id)
 
-                    if not self.testMode and \
-                            limit is not None and line_counter > limit:
+                    if self.reached_limit(line_counter, limit):
                         break
 
         return
@@ -1471,7 +1532,7 @@ class MGI(PostgreSQLSource):
         logger.info("getting markers and equivalent ids from mrk_summary_view")
         line_counter = 0
         raw = '/'.join((self.rawdir, 'mrk_summary_view'))
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             for line in f:
                 line_counter += 1
@@ -1519,8 +1580,7 @@ class MGI(PostgreSQLSource):
                     # could parse the "subtype" string
                     # to get the kind of thing the marker is
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -1539,7 +1599,7 @@ class MGI(PostgreSQLSource):
         line_counter = 0
         logger.info("mapping markers to internal identifiers")
         raw = '/'.join((self.rawdir, 'mrk_acc_view'))
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             for line in f:
                 line_counter += 1
@@ -1580,7 +1640,7 @@ class MGI(PostgreSQLSource):
         # if nothing, then we should remove one or the other.
         logger.info("mapping marker equivalent identifiers in mrk_acc_view")
         line_counter = 0
-        with open('/'.join((self.rawdir, 'mrk_acc_view')), 'r') as f:
+        with self.open_table('/'.join((self.rawdir, 'mrk_acc_view'))) as f:
             f.readline()  # read the header row; skip
             for line in f:
                 line_counter += 1
@@ -1624,8 +1684,7 @@ class MGI(PostgreSQLSource):
                         logger.error("mgiid not in class or indiv hash %s",
                                      mgiid)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -1659,7 +1718,7 @@ class MGI(PostgreSQLSource):
 
         tax_id = 'NCBITaxon:10090'  # hardcode mouse
 
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             for line in f:
                 line_counter += 1
@@ -1711,7 +1770,7 @@ class MGI(PostgreSQLSource):
         # and make the equivalence statements to a subset of the idspaces
         logger.info("mapping strain equivalent identifiers")
         line_counter = 0
-        with open(raw, 'r') as f:
+        with self.open_table(raw) as f:
             f.readline()  # read the header row; skip
             for line in f:
                 line_counter += 1
@@ -1786,8 +1845,7 @@ class MGI(PostgreSQLSource):
                     if comment is not None:
                         gu.addComment(g, strain_id, comment)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -1810,7 +1868,7 @@ class MGI(PostgreSQLSource):
         logger.info("getting free text descriptions for annotations")
         raw = '/'.join((self.rawdir, 'mgi_note_vocevidence_view'))
         gu = GraphUtils(curie_map.get())
-        with open(raw, 'r', encoding="utf8") as csvfile:
+        with self.open_table(raw, encoding="utf8") as csvfile:
             filereader = csv.reader(csvfile, delimiter='\t', quotechar='\"')
             for line in filereader:
                 line_counter += 1
@@ -1833,8 +1891,7 @@ class MGI(PostgreSQLSource):
                 if annot_id is not None:
                     gu.addDescription(g, annot_id, note.strip())
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -1850,7 +1907,7 @@ class MGI(PostgreSQLSource):
         geno = Genotype(g)
 
         gu = GraphUtils(curie_map.get())
-        with open(raw, 'r', encoding="utf8") as csvfile:
+        with self.open_table(raw, encoding="utf8") as csvfile:
             filereader = csv.reader(csvfile, delimiter='\t', quotechar='\"')
             for line in filereader:
                 line_counter += 1
@@ -1914,8 +1971,7 @@ class MGI(PostgreSQLSource):
                     logger.warning('marker key %s not in idhash',
                                    str(marker_key))
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         gu.loadProperties(g, Feature.object_properties, gu.OBJPROP)
@@ -1944,7 +2000,7 @@ class MGI(PostgreSQLSource):
         geno = Genotype(g)
 
         # gu = GraphUtils(curie_map.get())  # TODO unused
-        with open(raw, 'r', encoding="utf8") as csvfile:
+        with self.open_table(raw, encoding="utf8") as csvfile:
             filereader = csv.reader(csvfile, delimiter='\t', quotechar='\"')
             for line in filereader:
                 line_counter += 1
@@ -1968,8 +2024,7 @@ class MGI(PostgreSQLSource):
                     seqalt_id = allele_id
                 geno.addSequenceDerivesFrom(seqalt_id, gene_id)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -1995,7 +2050,7 @@ class MGI(PostgreSQLSource):
 
         gu = GraphUtils(curie_map.get())
         notehash = {}
-        with open(raw, 'r', encoding="utf8") as csvfile:
+        with self.open_table(raw, encoding="utf8") as csvfile:
             filereader = csv.reader(csvfile, delimiter='\t', quotechar='\"')
             for line in filereader:
                 line_counter += 1
@@ -2038,8 +2093,7 @@ class MGI(PostgreSQLSource):
                 notes += ' ['+n+']'
                 gu.addDescription(g, allele_id, notes)
 
-            if not self.testMode and \
-                    limit is not None and line_counter > limit:
+            if self.reached_limit(line_counter, limit):
                 break
 
         return
@@ -2062,7 +2116,7 @@ class MGI(PostgreSQLSource):
         logger.info("Getting genotypes for strains")
         raw = '/'.join((self.rawdir, 'prb_strain_genotype_view'))
         gu = GraphUtils(curie_map.get())
-        with open(raw, 'r', encoding="utf8") as csvfile:
+        with self.open_table(raw, encoding="utf8") as csvfile:
             filereader = csv.reader(csvfile, delimiter='\t', quotechar='\"')
             for line in filereader:
                 line_counter += 1
@@ -2107,8 +2161,7 @@ class MGI(PostgreSQLSource):
                 # else:
                 #     gu.addXref(g, strain_id, genotype_id)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -260,8 +260,7 @@ class MMRRC(Source):
                         logger.info("Phenotypes and no allele for %s",
                                     strain_id)
 
-                if not self.testMode and (
-                        limit is not None and line_counter > limit):
+                if self.reached_limit(line_counter, limit):
                     break
 
             # now that we've collected all of the variant information, build it
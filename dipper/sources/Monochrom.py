@@ -181,8 +181,10 @@ class Monochrom(Source):
         if self.testOnly:
             self.testMode = True
 
-        for taxon in self.tax_ids:
-            self._get_chrbands(limit, str(taxon))
+        # each taxon has its own file, so they can be done side by side
+        self.fan_out(
+            lambda taxon: self._get_chrbands(limit, taxon),
+            [str(taxon) for taxon in self.tax_ids])
 
         self.load_core_bindings()
         self.load_bindings()
@@ -361,7 +363,7 @@ class Monochrom(Source):
                         Feature.object_properties['has_subsequence'],
                         maplocclass_id)
 
-                if limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         self.gu.loadAllProperties(self.graph)
@@ -10,6 +10,8 @@ from dipper.models.assoc.Association import Assoc
 from dipper.models.assoc.OrthologyAssoc import OrthologyAssoc
 from dipper.models.Genotype import Genotype
 from dipper.utils.GraphUtils import GraphUtils
+from dipper.utils.IdFilter import IdFilter
+from dipper.utils.SpillDict import SpillDict
 from dipper import curie_map
 from dipper import config
 from dipper.models.GenomicFeature import Feature, makeChromID, makeChromLabel
@@ -97,13 +99,15 @@ class NCBIGene(Source):
 
         self.properties = Feature.properties
 
-        self.class_or_indiv = {}
+        self.class_or_indiv = SpillDict()
 
         return
 
     def fetch(self, is_dl_forced=False):
 
         self.get_files(is_dl_forced)
+        self.index_test_rows(
+            ['gene_info', 'gene_history', 'gene2pubmed'], self.gene_ids)
 
         return
 
@@ -127,6 +131,26 @@ class NCBIGene(Source):
 
         return
 
+    def _get_id_filter(self):
+        """
+        All of the ncbi gene files start with the taxon and gene columns;
+        in test mode, we keep the test genes, and otherwise our taxa.
+        With dual output, the test genes of other taxa are kept too,
+        for the testgraph only; see test_rows().
+        :return: IdFilter
+        """
+        if self.testMode:
+            return self._get_test_filter()
+
+        return IdFilter(self.tax_ids, columns=[0])
+
+    def _get_test_filter(self):
+        """
+        :return: IdFilter of the rows for the test genes
+        """
+
+        return IdFilter(self.gene_ids, columns=[1])
+
     def _get_gene_info(self, limit):
         """
         Currently loops through the gene_info file and
@@ -156,15 +180,23 @@ class NCBIGene(Source):
         logger.info("FILE: %s", myfile)
 
         # Add taxa and genome classes for those in our filter
-        for tax_num in self.tax_ids:
-            tax_id = ':'.join(('NCBITaxon', str(tax_num)))
-            # tax label can get added elsewhere
-            geno.addGenome(tax_id, str(tax_num))
-            # label added elsewhere
-            gu.addClassToGraph(g, tax_id, None)
+        with self.test_output():
+            for tax_num in self.tax_ids:
+                tax_id = ':'.join(('NCBITaxon', str(tax_num)))
+                # tax label can get added elsewhere
+                geno.addGenome(tax_id, str(tax_num))
+                # label added elsewhere
+                gu.addClassToGraph(g, tax_id, None)
+        id_filter = self._get_id_filter()
+        test_filter = self._get_test_filter()
         with gzip.open(myfile, 'rb') as f:
-            for line in f:
-                # skip comments
+            for line in self.test_rows(
+                    f, myfile, self.gene_ids, test_filter.accept_line,
+                    id_filter.accept_line):
+                # skip the rows we don't want before decoding them;
+                # this also skips the comments
+                if not (id_filter.accept_line(line) or self.in_test_row()):
+                    continue
                 line = line.decode().strip()
                 if re.match(r'^#', line):
                     continue
@@ -182,12 +214,6 @@ class NCBIGene(Source):
                 #         continue
                 # #### end filter
 
-                if self.testMode and int(gene_num) not in self.gene_ids:
-                    continue
-
-                if not self.testMode and int(tax_num) not in self.tax_ids:
-                    continue
-
                 line_counter += 1
 
                 gene_id = ':'.join(('NCBIGene', gene_num))
@@ -204,9 +230,8 @@ class NCBIGene(Source):
                 else:
                     self.class_or_indiv[gene_id] = 'C'
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
-                    continue
+                if self.reached_limit(line_counter, limit):
+                    break
 
                 if self.class_or_indiv[gene_id] == 'C':
                     gu.addClassToGraph(g, gene_id, label, gene_type_id, desc)
@@ -350,10 +375,12 @@ class NCBIGene(Source):
 
                 geno.addTaxon(tax_id, gene_id)
 
-            gu.loadProperties(g, Feature.object_properties, gu.OBJPROP)
-            gu.loadProperties(g, Feature.data_properties, gu.DATAPROP)
-            gu.loadProperties(g, Genotype.object_properties, gu.OBJPROP)
-            gu.loadAllProperties(g)
+            with self.test_output():
+                gu.loadProperties(g, Feature.object_properties, gu.OBJPROP)
+                gu.loadProperties(g, Feature.data_properties, gu.DATAPROP)
+                gu.loadProperties(
+                    g, Genotype.object_properties, gu.OBJPROP)
+                gu.loadAllProperties(g)
 
         return
 
@@ -376,9 +403,26 @@ class NCBIGene(Source):
         line_counter = 0
         myfile = '/'.join((self.rawdir, self.files['gene_history']['file']))
         logger.info("FILE: %s", myfile)
+        id_filter = self._get_id_filter()
+        test_filter = self._get_test_filter()
+
+        def gene_id_of(line):
+            # just for the rows that are kept, below
+            if id_filter.accept_line(line) or self.in_test_row():
+                return self._gene_id_of(line)
+            return None
+
         with gzip.open(myfile, 'rb') as f:
-            for line in f:
-                # skip comments
+            # whether each gene is a class, looked up a batch at a time
+            for (line, gene_kind) in self.looked_up_rows(
+                    self.test_rows(
+                        f, myfile, self.gene_ids, test_filter.accept_line,
+                        id_filter.accept_line),
+                    self.class_or_indiv, gene_id_of):
+                # skip the rows we don't want before decoding them;
+                # this also skips the comments
+                if not (id_filter.accept_line(line) or self.in_test_row()):
+                    continue
                 line = line.decode().strip()
                 if re.match(r'^#', line):
                     continue
@@ -397,18 +441,12 @@ class NCBIGene(Source):
                 if gene_num == '-' or discontinued_num == '-':
                     continue
 
-                if self.testMode and int(gene_num) not in self.gene_ids:
-                    continue
-
-                if not self.testMode and int(tax_num) not in self.tax_ids:
-                    continue
-
                 line_counter += 1
                 gene_id = ':'.join(('NCBIGene', gene_num))
                 discontinued_gene_id = ':'.join(('NCBIGene', discontinued_num))
 
                 # add the two genes
-                if self.class_or_indiv.get(gene_id) == 'C':
+                if gene_kind == 'C':
                     gu.addClassToGraph(g, gene_id, None)
                     gu.addClassToGraph(
                         g, discontinued_gene_id, discontinued_symbol)
@@ -425,8 +463,7 @@ class NCBIGene(Source):
                 # also add the old symbol as a synonym of the new gene
                 gu.addSynonym(g, gene_id, discontinued_symbol)
 
-                if (not self.testMode) and\
-                        (limit is not None and line_counter > limit):
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -455,9 +492,26 @@ class NCBIGene(Source):
         myfile = '/'.join((self.rawdir, self.files['gene2pubmed']['file']))
         logger.info("FILE: %s", myfile)
         assoc_counter = 0
+        id_filter = self._get_id_filter()
+        test_filter = self._get_test_filter()
+
+        def gene_id_of(line):
+            # just for the rows that are kept, below
+            if id_filter.accept_line(line) or self.in_test_row():
+                return self._gene_id_of(line)
+            return None
+
         with gzip.open(myfile, 'rb') as f:
-            for line in f:
-                # skip comments
+            # whether each gene is a class, looked up a batch at a time
+            for (line, gene_kind) in self.looked_up_rows(
+                    self.test_rows(
+                        f, myfile, self.gene_ids, test_filter.accept_line,
+                        id_filter.accept_line),
+                    self.class_or_indiv, gene_id_of):
+                # skip the rows we don't want before decoding them;
+                # this also skips the comments
+                if not (id_filter.accept_line(line) or self.in_test_row()):
+                    continue
                 line = line.decode().strip()
                 if re.match(r'^#', line):
                     continue
@@ -472,12 +526,6 @@ class NCBIGene(Source):
                 #         continue
                 # #### end filter
 
-                if self.testMode and int(gene_num) not in self.gene_ids:
-                    continue
-
-                if not self.testMode and int(tax_num) not in self.tax_ids:
-                    continue
-
                 if gene_num == '-' or pubmed_num == '-':
                     continue
 
@@ -485,7 +533,7 @@ class NCBIGene(Source):
                 gene_id = ':'.join(('NCBIGene', gene_num))
                 pubmed_id = ':'.join(('PMID', pubmed_num))
 
-                if self.class_or_indiv.get(gene_id) == 'C':
+                if gene_kind == 'C':
                     gu.addClassToGraph(g, gene_id, None)
                 else:
                     gu.addIndividualToGraph(g, gene_id, None)
@@ -498,8 +546,7 @@ class NCBIGene(Source):
                 gu.addTriple(
                     g, pubmed_id, gu.object_properties['is_about'], gene_id)
                 assoc_counter += 1
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         logger.info(
@@ -538,6 +585,19 @@ class NCBIGene(Source):
 
         return so_id
 
+    @staticmethod
+    def _gene_id_of(line):
+        """
+        :param line: a raw (bytes) row of one of the gene files,
+            with the gene number in its second field
+        :return: the NCBIGene id, or None for a short line
+        """
+        fields = line.split(b'\t', 2)
+        if len(fields) < 2:
+            return None
+
+        return 'NCBIGene:' + fields[1].decode()
+
     @staticmethod
     def _cleanup_id(i):
         """
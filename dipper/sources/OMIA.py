@@ -1,11 +1,9 @@
 import logging
-import xml.etree.ElementTree as ET
 import re
 import gzip
 import io
-import shutil
 
-from dipper.sources.Source import Source
+from dipper.sources.Source import Source, XMLTable
 from dipper.sources.OMIM import OMIM, filter_keep_phenotype_entry_ids
 #  get_omim_id_from_entry,
 from dipper.models.Dataset import Dataset
@@ -16,7 +14,6 @@ from dipper.models.Genotype import Genotype
 from dipper.models.Reference import Reference
 from dipper.utils.GraphUtils import GraphUtils
 from dipper.sources.NCBIGene import NCBIGene
-from dipper.utils.DipperUtil import DipperUtil
 from dipper import curie_map
 
 
@@ -128,8 +125,6 @@ class OMIA(Source):
         # Landmark, Lida_Links, OMIA_Group, OMIA_author, Omim_Xref, People,
         # Phene, Phene_Gene, Publishers, Resources, Species_gb, Synonyms
 
-        self.scrub()
-
         if limit is not None:
             logger.info("Only parsing first %d rows", limit)
 
@@ -144,15 +139,7 @@ class OMIA(Source):
             self.g = self.graph
         self.geno = Genotype(self.g)
 
-        # we do three passes through the file
-        # first process species (two others reference this one)
-        self.process_species(limit)
-
-        # then, process the breeds, genes, articles, and other static stuff
-        self.process_classes(limit)
-
-        # next process the association data
-        self.process_associations(limit)
+        self.process_tables(limit)
 
         # process the vertebrate orthology for genes
         # that are annotated with phenotypes
@@ -168,69 +155,16 @@ class OMIA(Source):
 
         return
 
-    def scrub(self):
+    def process_tables(self, limit):
         """
-        The XML file seems to have mixed-encoding;
-        we scrub out the control characters
-        from the file for processing.
-        :return:
-
-        """
-
-        logger.info(
-            "Scrubbing out the nasty characters that break our parser.")
-
-        myfile = '/'.join((self.rawdir, self.files['data']['file']))
-        tmpfile = '/'.join((self.rawdir, self.files['data']['file']+'.tmp.gz'))
-        t = gzip.open(tmpfile, 'wb')
-        du = DipperUtil()
-        with gzip.open(myfile, 'rb') as f:
-            filereader = io.TextIOWrapper(f, newline="")
-            for l in filereader:
-                l = du.remove_control_characters(l) + '\n'
-                t.write(l.encode('utf-8'))
-        t.close()
-
-        # move the temp file
-        logger.info("Replacing the original data with the scrubbed file.")
-        shutil.move(tmpfile, myfile)
-        return
-
-    # ###################### XML LOOPING FUNCTIONS ##################
-
-    def process_species(self, limit):
-        """
-        Loop through the xml file and process the species.
-        We add elements to the graph, and store the
-        id-to-label in the label_hash dict.
-        :param limit:
-        :return:
-        """
-
-        myfile = '/'.join((self.rawdir, self.files['data']['file']))
-
-        f = gzip.open(myfile, 'rb')
-        filereader = io.TextIOWrapper(f, newline="")
-
-        filereader.readline()  # remove the xml declaration line
-
-        for event, elem in ET.iterparse(filereader):
-            # Species ids are == genbank species ids!
-            self.process_xml_table(
-                elem, 'Species_gb', self._process_species_table_row, limit)
-
-        f.close()
-
-        return
-
-    def process_classes(self, limit):
-        """
-        Loop through the xml file and process the articles,
-        breed, genes, phenes, and phenotype-grouping classes.
-        We add elements to the graph,
-        and store the id-to-label in the label_hash dict,
-        along with the internal key-to-external id in the id_hash dict.
-        The latter are referenced in the association processing functions.
+        Process all of the tables we use in one pass through the xml file.
+        The breeds, genes, articles, phenes, and other static stuff
+        store the id-to-label in the label_hash dict,
+        along with the internal key-to-external id in the id_hash dict;
+        the tables that look those up (like the associations)
+        are processed after the ones they use.
+        The file seems to have mixed-encoding, so we scrub out the
+        control characters as we read it.
 
         :param limit:
         :return:
@@ -239,72 +173,44 @@ class OMIA(Source):
 
         myfile = '/'.join((self.rawdir, self.files['data']['file']))
 
-        f = gzip.open(myfile, 'rb')
-        filereader = io.TextIOWrapper(f, newline="")
-
-        filereader.readline()  # remove the xml declaration line
-
-        parser = ET.XMLParser(encoding='utf-8')
-
-        for event, elem in ET.iterparse(filereader, parser=parser):
-            self.process_xml_table(
-                elem, 'Articles', self._process_article_row, limit)
-            self.process_xml_table(
-                elem, 'Breed', self._process_breed_row, limit)
-            self.process_xml_table(
-                elem, 'Genes_gb', self._process_gene_row, limit)
-            self.process_xml_table(
-                elem, 'OMIA_Group', self._process_omia_group_row, limit)
-            self.process_xml_table(
-                elem, 'Phene', self._process_phene_row, limit)
-            self.process_xml_table(
-                elem, 'Omim_Xref', self._process_omia_omim_map, limit)
-
-        f.close()
+        # each table, and the tables whose lookups its rows use
+        tables = [
+            XMLTable('Species_gb', self._process_species_table_row),
+            XMLTable('Articles', self._process_article_row),
+            XMLTable(
+                'Breed', self._process_breed_row, ['Species_gb']),
+            XMLTable('Genes_gb', self._process_gene_row),
+            XMLTable('OMIA_Group', self._process_omia_group_row),
+            XMLTable(
+                'Phene', self._process_phene_row,
+                ['Species_gb', 'OMIA_Group']),
+            # filter the genes out of the omia-omim associations
+            # (keep only phenotypes/diseases) before they are used
+            XMLTable(
+                'Omim_Xref', self._process_omia_omim_map,
+                finish=self.clean_up_omim_genes),
+            XMLTable(
+                'Article_Breed', self._process_article_breed_row,
+                ['Articles', 'Breed']),
+            XMLTable(
+                'Article_Phene', self._process_article_phene_row,
+                ['Articles', 'Phene']),
+            XMLTable(
+                'Breed_Phene', self._process_breed_phene_row,
+                ['Breed', 'Phene', 'Omim_Xref']),
+            XMLTable('Lida_Links', self._process_lida_links_row),
+            XMLTable(
+                'Phene_Gene', self._process_phene_gene_row,
+                ['Genes_gb', 'Phene']),
+            XMLTable('Group_MPO', self._process_group_mpo_row)]
 
-        # post-process the omia-omim associations to filter out the genes
-        # (keep only phenotypes/diseases)
-        self.clean_up_omim_genes()
-
-        return
-
-    def process_associations(self, limit):
-        """
-        Loop through the xml file and process the article-breed, article-phene,
-        breed-phene, phene-gene associations, and the external links to LIDA.
-
-        :param limit:
-        :return:
-
-        """
-
-        myfile = '/'.join((self.rawdir, self.files['data']['file']))
-
-        f = gzip.open(myfile, 'rb')
-        filereader = io.TextIOWrapper(f, newline="")
-
-        filereader.readline()  # remove the xml declaration line
-
-        for event, elem in ET.iterparse(filereader):
-            self.process_xml_table(
-                elem, 'Article_Breed', self._process_article_breed_row, limit)
-            self.process_xml_table(
-                elem, 'Article_Phene', self._process_article_phene_row, limit)
-            self.process_xml_table(
-                elem, 'Breed_Phene', self._process_breed_phene_row, limit)
-            self.process_xml_table(
-                elem, 'Lida_Links', self._process_lida_links_row, limit)
-            self.process_xml_table(
-                elem, 'Phene_Gene', self._process_phene_gene_row, limit)
-            self.process_xml_table(
-                elem, 'Group_MPO', self._process_group_mpo_row, limit)
-
-        f.close()
+        with gzip.open(myfile, 'rb') as f:
+            filereader = io.TextIOWrapper(f, newline="")
+            filereader.readline()  # remove the xml declaration line
+            self.process_xml_tables(filereader, tables, limit, scrub=True)
 
         return
 
-    # ############ INDIVIDUAL TABLE-LEVEL PROCESSING FUNCTIONS ################
-
     def _process_species_table_row(self, row):
         # gb_species_id, sci_name, com_name, added_by, date_modified
         tax_id = 'NCBITaxon:'+str(row['gb_species_id'])
@@ -661,8 +661,7 @@ class OMIM(Source):
                         "There are misformatted row %d:%s",
                         line_counter, str(line))
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
             gu.loadProperties(g, geno.object_properties, gu.OBJPROP)
@@ -958,8 +957,7 @@ class OMIM(Source):
                 omim_id = 'OMIM:'+ps_num
                 gu.addClassToGraph(g, omim_id, ps_label)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -6,6 +6,7 @@ from dipper.models.Dataset import Dataset
 from dipper.models.assoc.G2PAssoc import G2PAssoc
 from dipper.models.Genotype import Genotype
 from dipper.utils.GraphUtils import GraphUtils
+from dipper.utils.IdFilter import IdFilter
 from dipper import config
 from dipper import curie_map
 
@@ -87,6 +88,9 @@ class Orphanet(Source):
         gu = GraphUtils(curie_map.get())
 
         myfile = '/'.join((self.rawdir, self.files['disease-gene']['file']))
+        if self.testMode:
+            test_diseases = IdFilter(
+                config.get_config()['test_ids']['disease'])
 
         # PYLINT complains iterparse deprecated,
         # but as of py 3.4 only the optional & unsupplied parse arg is.
@@ -98,10 +102,9 @@ class Orphanet(Source):
 
                 disorder_id = 'Orphanet:'+str(disorder_num)
 
-                if self.testMode and \
-                        disorder_id not in \
-                        config.get_config()['test_ids']['disease']:
+                if self.testMode and disorder_id not in test_diseases:
                     continue
+                line_counter += 1
 
                 disorder_label = elem.find('Name').text
 
@@ -196,8 +199,8 @@ class Orphanet(Source):
                             gu.addEquivalentClass(g, gene_id, eqid)
                 elem.clear()  # discard the element
 
-            if self.testMode and limit is not None and line_counter > limit:
-                return
+            if self.reached_limit(line_counter, limit):
+                break
 
         gu.loadProperties(
             g, G2PAssoc.annotation_properties, G2PAssoc.ANNOTPROP)
@@ -6,6 +6,7 @@ from dipper.sources.Source import Source
 from dipper.models.assoc.OrthologyAssoc import OrthologyAssoc
 from dipper.models.Dataset import Dataset
 from dipper.utils.GraphUtils import GraphUtils
+from dipper.utils.IdFilter import IdFilter
 from dipper import config, curie_map
 
 __author__ = 'nicole'
@@ -160,6 +161,11 @@ class Panther(Source):
 
         unprocessed_gene_ids = set()
 
+        if self.testMode:
+            test_proteins = IdFilter(self.test_ids, strip='UniProtKB=')
+        # without any taxa, this keeps everything
+        taxa = IdFilter(self.tax_ids, strip='NCBITaxon:')
+
         for k in self.files.keys():
             f = '/'.join((self.rawdir, self.files[k]['file']))
             matchcounter = 0
@@ -195,10 +201,8 @@ class Panther(Source):
                     # skip the entries that don't have homolog relationships
                     # with the test ids
                     if self.testMode and not (
-                            re.sub(r'UniProtKB=', '',
-                                   protein_a) in self.test_ids or
-                            re.sub(r'UniProtKB=', '', protein_b)
-                            in self.test_ids):
+                            protein_a in test_proteins or
+                            protein_b in test_proteins):
                         continue
 
                     # map the taxon abbreviations to ncbi taxon ids
@@ -215,15 +219,12 @@ class Panther(Source):
                     # gene1 AND gene2 are in the taxid list (most-filter)
                     # using OR will get you any associations where
                     # gene1 OR gene2 are in the taxid list (some-filter)
-                    if (self.tax_ids is not None and
-                            (int(re.sub(r'NCBITaxon:', '', taxon_a.rstrip())) not in
-                             self.tax_ids) and
-                            (int(re.sub(r'NCBITaxon:', '', taxon_b.rstrip())) not in
-                             self.tax_ids)):
+                    if (taxon_a.rstrip() not in taxa and
+                            taxon_b.rstrip() not in taxa):
                         continue
                     else:
                         matchcounter += 1
-                        if limit is not None and matchcounter > limit:
+                        if self.reached_limit(matchcounter, limit):
                             break
 
                     # ### end code block for filtering on taxon
@@ -273,8 +274,7 @@ class Panther(Source):
                     assoc.add_gene_family_to_graph(
                         g, ':'.join(('PANTHER', panther_id)))
 
-                    if not self.testMode \
-                            and limit is not None and line_counter > limit:
+                    if self.reached_limit(line_counter, limit):
                         break
 
             logger.info("finished processing %s", f)
@@ -1,22 +1,98 @@
 
 import logging
 import os
+import io
+import gzip
+import json
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import psycopg2
 from dipper.sources.Source import Source
+from dipper import config
 
 logger = logging.getLogger(__name__)
 
+COPY_QUERY = "COPY ({0}) TO STDOUT WITH DELIMITER AS '\t' CSV HEADER"
+
 
 class PostgreSQLSource(Source):
     """
     Class for interfacing with remote Postgres databases
+
+    Table exports can be tuned per source in conf.json, like:
+      pgexport : {
+        'mgi' : {'workers' : 4, 'compress' : true, 'compresslevel' : 6}
+      }
+    With more than one worker, tables are COPY'd concurrently,
+    each on its own connection.
+    Compressed exports are written to <table>.gz;
+    use open_table() to read a table regardless of how it was saved.
+
+    Whether a local copy is current is decided by a fingerprint of the
+    remote table, recorded in a manifest (pg_manifest.json in the rawdir)
+    when the table is fetched.  See _get_remote_fingerprint().
+
+    In pipelined mode (see setpipelined()), the fetch only decides which
+    tables are out of date; each of those is then COPY'd when the parser
+    first opens it, straight into the parser through a bounded buffer
+    (pipeline_buffer bytes) while being saved to the rawdir as usual.
+    That way fetching and parsing a table overlap,
+    instead of the parser waiting for every table to land on disk.
     """
 
+    # columns that the databases bump whenever a row is edited
+    modification_columns = ['modification_date', 'timelastmodified']
+
+    # Subclasses declare here what their parsers actually consume from
+    # each table, so that only those columns and rows are fetched, like:
+    #   'dbxref': {
+    #       'columns': ['dbxref_id', 'db_id', 'accession'],
+    #       'key': ['dbxref_id'],
+    #       'where': 'db_id IN (2, 3)'}
+    # The local file has the columns in the order they are listed.
+    # Only the key and the listed columns go into the table's fingerprint.
+    # Tables that are not declared are fetched whole.
+    table_projections = {}
+
     def __init__(self, name=None):
         super().__init__(name)
+        self.export_settings = {
+            'workers': 1, 'compress': False, 'compresslevel': 6,
+            'pipeline_buffer': 4 * 1024 * 1024}
+        if 'pgexport' in config.get_config() \
+                and name in config.get_config()['pgexport']:
+            self.export_settings.update(config.get_config()['pgexport'][name])
+
+        self.manifestfile = '/'.join((self.rawdir, 'pg_manifest.json'))
+        self.manifest = None
+        self.manifest_lock = threading.Lock()
+
+        self.pipelined = False
+        # table path -> (cxn, query, fingerprint) of the out of date tables
+        # that will be streamed when the parser opens them
+        self.deferred_tables = {}
+        # table path -> the thread streaming it
+        self.table_streams = {}
+        # tables may be opened from concurrent parse steps
+        self.stream_lock = threading.Lock()
+        return
+
+    def setpipelined(self, pipelined):
+        """
+        Stream out of date tables into the parser, rather than fetching
+        them up front.  Only use this when parse() follows fetch()
+        on the same instance; otherwise the deferred tables never get
+        fetched.
+        :param pipelined: boolean
+        :return: None
+        """
+        self.pipelined = pipelined
         return
 
-    def fetch_from_pgdb(self, tables, cxn, limit=None, force=False):
+    def fetch_from_pgdb(self, tables, cxn, limit=None, force=False,
+                        workers=None):
         """
         Will fetch all Postgres tables from the specified database
             in the cxn connection parameters.
@@ -25,62 +101,156 @@ class PostgreSQLSource(Source):
         :param tables: Names of tables to fetch
         :param cxn: database connection details
         :param limit: A max row count to fetch for each table
+        :param workers: number of concurrent connections to export with;
+            defaults to the configured export_settings
         :return: None
         """
 
+        if workers is None:
+            workers = self.export_settings['workers']
+        if workers > 1 and len(tables) > 1:
+            self._fetch_tables_in_parallel(tables, cxn, limit, force, workers)
+            return
+
         con = None
         try:
-            con = psycopg2.connect(host=cxn['host'], database=cxn['database'],
-                                   port=cxn['port'], user=cxn['user'],
-                                   password=cxn['password'])
+            con = self._connect(cxn)
             cur = con.cursor()
             for t in tables:
-                logger.info("Fetching data from table %s", t)
-                self._getcols(cur, t)
-                query = ' '.join(("SELECT * FROM", t))
-                countquery = ' '.join(("SELECT COUNT(*) FROM", t))
-                if limit is not None:
-                    query = ' '.join((query, "LIMIT", str(limit)))
-                    countquery = ' '.join((countquery, "LIMIT", str(limit)))
-
-                outfile = '/'.join((self.rawdir, t))
-
-                filerowcount = -1
-                tablerowcount = -1
-                if not force:
-                    # check local copy.  assume that if the # rows are the same,
-                    # that the table is the same
-                    # TODO may want to fix this assumption
-                    if os.path.exists(outfile):
-                        # get rows in the file
-                        filerowcount = self.file_len(outfile)
-                        logger.info("rows in local file: %s", filerowcount)
-
-                    # get rows in the table
-                    # tablerowcount=cur.rowcount
-                    cur.execute(countquery)
-                    tablerowcount = cur.fetchone()[0]
-
-                # rowcount-1 because there's a header
-                if force or filerowcount < 0 or (filerowcount-1) != tablerowcount:
-                    if force:
-                        logger.info("Forcing download of %s", t)
-                    else:
-                        logger.info("%s local (%d) different from remote (%d); fetching.",
-                                    t, filerowcount, tablerowcount)
-                    # download the file
-                    logger.info("COMMAND:%s", query)
-                    outputquery = "COPY ({0}) TO STDOUT WITH DELIMITER AS '\t' CSV HEADER".format(query)
-                    with open(outfile, 'w') as f:
-                        cur.copy_expert(outputquery, f)
-                else:
-                    logger.info("local data same as remote; reusing.")
+                self._fetch_table(cur, t, limit, force, cxn)
 
         finally:
             if con:
                 con.close()
         return
 
+    def _fetch_tables_in_parallel(self, tables, cxn, limit, force, workers):
+        """
+        Run the table exports on a small pool of connections.
+        The biggest tables (by their last local copy) are started first,
+        so that one large table doesn't end up running alone at the end.
+        :param tables:
+        :param cxn:
+        :param limit:
+        :param force:
+        :param workers: the number of connections in the pool
+        :return: None
+        """
+
+        tables = sorted(
+            tables, reverse=True,
+            key=lambda t: self._get_local_table_size('/'.join((self.rawdir, t))))
+        workers = min(workers, len(tables))
+        logger.info(
+            "Fetching %d tables on %d connections", len(tables), workers)
+
+        pool = queue.Queue()
+        connections = []
+
+        def fetch(table):
+            con = pool.get()
+            try:
+                cur = con.cursor()
+                try:
+                    return self._fetch_table(cur, table, limit, force, cxn)
+                finally:
+                    cur.close()
+            finally:
+                pool.put(con)
+
+        try:
+            for i in range(workers):
+                con = self._connect(cxn)
+                connections.append(con)
+                pool.put(con)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                stats = list(executor.map(fetch, tables))
+        finally:
+            for con in connections:
+                con.close()
+
+        for (t, s) in zip(tables, stats):
+            if s is not None:
+                logger.info(
+                    "%s: %d bytes in %.1f sec (%.0f bytes/sec)",
+                    t, s['bytes'], s['seconds'], s['rate'])
+
+        return
+
+    def _fetch_table(self, cur, table, limit=None, force=False, cxn=None):
+        """
+        Fetch a single table, unless the local copy is current.
+        In pipelined mode, the table is instead left for open_table()
+        to stream.
+        :param cur: a cursor on the remote database
+        :param table:
+        :param limit:
+        :param force:
+        :param cxn: the connection details, for streaming the table later
+        :return: transfer statistics if the table was fetched, else None
+        """
+        logger.info("Fetching data from table %s", table)
+        colnames = self._getcols(cur, table)
+        query = self._get_table_query(table)
+        if limit is not None:
+            query = ' '.join((query, "LIMIT", str(limit)))
+
+        outfile = '/'.join((self.rawdir, table))
+
+        # fingerprint the rows we fetch, with all their columns to hand
+        # so we still get the cheap check on a modification column
+        relation = table
+        projection = self.table_projections.get(table, {})
+        where = projection.get('where')
+        if where is not None:
+            relation = ' '.join(("( SELECT * FROM", table, "WHERE", where, ")"))
+        hash_columns = None
+        if projection.get('columns') is not None:
+            hash_columns = projection.get('key', []) + [
+                c for c in projection['columns']
+                if c not in projection.get('key', [])]
+        (tablerowcount, fingerprint) = self._get_remote_fingerprint(
+            cur, relation, colnames, hash_columns,
+            self._is_view(cur, table))
+        if force:
+            logger.info("Forcing download of %s", table)
+        elif self._is_local_copy_current(outfile, query, fingerprint):
+            logger.info("local data same as remote; reusing.")
+            return None
+        else:
+            logger.info(
+                "%s local copy is missing or out of date "
+                "(remote has %d rows); fetching.", table, tablerowcount)
+
+        if self.pipelined and cxn is not None:
+            logger.info("Deferring %s to stream into the parser", table)
+            self.deferred_tables[outfile] = (cxn, query, fingerprint)
+            return None
+
+        # download the file
+        logger.info("COMMAND:%s", query)
+        stats = self._copy_to_file(cur, query, outfile)
+        self._update_manifest(outfile, query, fingerprint)
+
+        return stats
+
+    def _get_table_query(self, table):
+        """
+        Build the query to fetch a table,
+        restricted to any columns and rows declared in table_projections.
+        :param table:
+        :return: the SELECT statement
+        """
+        projection = self.table_projections.get(table, {})
+        columns = '*'
+        if projection.get('columns') is not None:
+            columns = ', '.join(projection['columns'])
+        query = ' '.join(("SELECT", columns, "FROM", table))
+        if projection.get('where') is not None:
+            query = ' '.join((query, "WHERE", projection['where']))
+
+        return query
+
     def fetch_query_from_pgdb(self, qname, query, con, cxn, limit=None,
                               force=False):
         """
@@ -97,67 +267,426 @@ class PostgreSQLSource(Source):
             logger.error("ERROR: you need to supply connection information")
             return
         if con is None and cxn is not None:
-            con = psycopg2.connect(host=cxn['host'], database=cxn['database'],
-                                   port=cxn['port'], user=cxn['user'],
-                                   password=cxn['password'])
+            con = self._connect(cxn)
 
         outfile = '/'.join((self.rawdir, qname))
         cur = con.cursor()
-        # wrap the query to get the count
-        countquery = ' '.join(("SELECT COUNT(*) FROM (", query, ") x"))
+        relation = ' '.join(("(", query, ")"))
+        colnames = self._getcols(cur, relation)
+
+        # a query may join any number of tables, so it is always hashed
+        (tablerowcount, fingerprint) = self._get_remote_fingerprint(
+            cur, relation, colnames, is_view=True)
         if limit is not None:
-            countquery = ' '.join((countquery, "LIMIT", str(limit)))
-
-        # check local copy.  assume that if the # rows are the same,
-        # that the table is the same
-        filerowcount = -1
-        tablerowcount = -1
-        if not force:
-            if os.path.exists(outfile):
-                # get rows in the file
-                filerowcount = self.file_len(outfile)
-                logger.info("INFO: rows in local file: %s", filerowcount)
-
-            # get rows in the table
-            # tablerowcount=cur.rowcount
-            cur.execute(countquery)
-            tablerowcount = cur.fetchone()[0]
+            tablerowcount = min(tablerowcount, limit)
+            query = ' '.join((query, "LIMIT", str(limit)))
 
+        if force:
+            logger.info("Forcing download of %s", qname)
+        elif self._is_local_copy_current(outfile, query, fingerprint):
+            logger.info("local data same as remote; reusing.")
+            return
+        else:
+            logger.info(
+                "%s local copy is missing or out of date "
+                "(remote has %d rows); fetching.", qname, tablerowcount)
+
+        # download the file
+        logger.debug("COMMAND:%s", query)
+        self._copy_to_file(cur, query, outfile)
+        # Regenerate row count to check integrity
         # rowcount-1 because there's a header
-        if force or filerowcount < 0 or (filerowcount-1) != tablerowcount:
-            if force:
-                logger.info("Forcing download of %s", qname)
-            else:
-                logger.info("%s local (%s) different from remote (%s); fetching.",
-                            qname, filerowcount, tablerowcount)
-            # download the file
-            logger.debug("COMMAND:%s", query)
-            outputquery = "COPY ({0}) TO STDOUT WITH DELIMITER AS '\t' CSV HEADER".format(query)
-            with open(outfile, 'w') as f:
-                cur.copy_expert(outputquery, f)
-            # Regenerate row count to check integrity
-            filerowcount = self.file_len(outfile)
-            if (filerowcount-1) != tablerowcount:
-                raise Exception("Download from MGI failed, %s != %s",
-                                (filerowcount-1), tablerowcount)
+        filerowcount = self.file_len(self._get_table_file(outfile))
+        if (filerowcount-1) != tablerowcount:
+            raise Exception("Download from MGI failed, %s != %s",
+                            (filerowcount-1), tablerowcount)
+        self._update_manifest(outfile, query, fingerprint)
+
+        return
+
+    def _get_remote_fingerprint(self, cur, relation, colnames,
+                                hash_columns=None, is_view=False):
+        """
+        Compute a cheap, server-side fingerprint of a table's content,
+        so that we only have to transfer the table when it changed.
+        If the table has a modification column,
+        the fingerprint is the row count plus the latest modification time
+        (deletes change the count, inserts and edits the time).
+        Otherwise, or for a view (whose modification column only follows
+        one of the tables it joins), it is the row count plus an
+        order-independent sum of the hashes of the rows' key and
+        projected columns (or of whole rows, if none are declared),
+        which catches edits that leave the row count unchanged.
+        :param cur:
+        :param relation: a table name, or a parenthesized subquery
+        :param colnames: the column names of the relation
+        :param hash_columns: the columns to hash, or None for all
+        :param is_view: True if the relation is a view or a query
+        :return: tuple of (row count, fingerprint string)
+        """
+        mod_cols = [c for c in self.modification_columns if c in colnames]
+        if len(mod_cols) > 0 and not is_view:
+            query = "SELECT COUNT(*), MAX(x.{0})::text FROM {1} x".format(
+                mod_cols[0], relation)
         else:
-            logger.info("local data same as remote; reusing.")
+            row = 'x'
+            if hash_columns is not None:
+                row = 'ROW({0})'.format(
+                    ', '.join('x.' + c for c in hash_columns))
+            query = \
+                "SELECT COUNT(*), SUM(hashtext({0}::text)::bigint)::text " \
+                "FROM {1} x".format(row, relation)
+
+        cur.execute(query)
+        (rowcount, digest) = cur.fetchone()
+        fingerprint = '|'.join((str(rowcount), str(digest)))
+        logger.info("fingerprint of %s: %s", relation, fingerprint)
+
+        return rowcount, fingerprint
+
+    @staticmethod
+    def _is_view(cur, table):
+        """
+        :param cur:
+        :param table: a table name
+        :return: True if it is a view (or materialized view)
+        """
+        cur.execute(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)",
+            (table,))
+        row = cur.fetchone()
+
+        return row is not None and row[0] in ('v', 'm')
+
+    def _load_manifest(self):
+        if self.manifest is None:
+            self.manifest = {}
+            if os.path.exists(self.manifestfile):
+                with open(self.manifestfile, 'r') as f:
+                    self.manifest = json.load(f)
+
+        return self.manifest
+
+    def _is_local_copy_current(self, raw, query, fingerprint):
+        """
+        The local copy is current if it was fetched with the same query
+        when the remote table had the same fingerprint,
+        and the file is still the one we wrote then.
+        :param raw: the table path, without any compression extension
+        :param query: the query that would fetch the table
+        :param fingerprint: the current remote fingerprint
+        :return: True if the table does not need to be fetched
+        """
+        path = self._get_table_file(raw)
+        with self.manifest_lock:
+            entry = self._load_manifest().get(os.path.basename(raw))
+        if path is None or entry is None:
+            return False
+
+        return entry['fingerprint'] == fingerprint \
+            and entry['query'] == query \
+            and entry['file'] == os.path.basename(path) \
+            and entry['size'] == self.get_local_file_size(path)
+
+    def _update_manifest(self, raw, query, fingerprint):
+        path = self._get_table_file(raw)
+        with self.manifest_lock:
+            manifest = self._load_manifest()
+            manifest[os.path.basename(raw)] = {
+                'fingerprint': fingerprint, 'query': query,
+                'file': os.path.basename(path),
+                'size': self.get_local_file_size(path),
+                'fetched': time.strftime("%Y-%m-%d %H:%M:%S")}
+            tmpfile = self.manifestfile + '.part'
+            with open(tmpfile, 'w') as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+            os.replace(tmpfile, self.manifestfile)
 
         return
 
+    def _connect(self, cxn):
+        con = psycopg2.connect(host=cxn['host'], database=cxn['database'],
+                               port=cxn['port'], user=cxn['user'],
+                               password=cxn['password'])
+        # COPY output is written as bytes; make sure they are utf-8
+        con.set_client_encoding('UTF8')
+
+        return con
+
+    def _copy_to_file(self, cur, query, outfile, tee=None):
+        """
+        Stream the output of the query straight into the local file,
+        gzipped if the export is configured to compress.
+        The data is written to a temporary file that is only moved into place
+        once the COPY has completed.
+        :param cur:
+        :param query:
+        :param outfile: the table path, without any compression extension
+        :param tee: optional function that is also handed each block
+            of the (uncompressed) output
+        :return: dict of transfer statistics
+        """
+        compress = self.export_settings['compress']
+        if compress:
+            target = outfile + '.gz'
+            stale = outfile
+        else:
+            target = outfile
+            stale = outfile + '.gz'
+        tmpfile = target + '.part'
+
+        start = time.time()
+        if compress:
+            f = gzip.open(
+                tmpfile, 'wb',
+                compresslevel=self.export_settings['compresslevel'])
+        else:
+            f = open(tmpfile, 'wb')
+        with f:
+            writer = _CountingWriter(f, tee)
+            cur.copy_expert(COPY_QUERY.format(query), writer)
+        os.replace(tmpfile, target)
+        # never leave another copy of the table around for readers to find
+        if os.path.exists(stale):
+            os.remove(stale)
+        seconds = time.time() - start
+
+        stats = {
+            'bytes': writer.bytes_written, 'seconds': seconds,
+            'rate': writer.bytes_written / max(seconds, 1e-6)}
+        logger.info(
+            "Wrote %s: %d bytes in %.1f sec (%.0f bytes/sec)",
+            target, stats['bytes'], stats['seconds'], stats['rate'])
+
+        return stats
+
+    @staticmethod
+    def _get_table_file(raw):
+        """
+        :param raw: the table path, without any compression extension
+        :return: the path of the local copy of the table
+            (plain or gzipped, whichever is newer), or None
+        """
+        candidates = [f for f in (raw, raw + '.gz') if os.path.exists(f)]
+        if len(candidates) == 0:
+            return None
+
+        return max(candidates, key=os.path.getmtime)
+
+    def has_table(self, raw):
+        """
+        :param raw: the table path, without any compression extension
+        :return: True if the table can be opened with open_table()
+        """
+        return raw in self.deferred_tables \
+            or self._get_table_file(raw) is not None
+
+    def open_table(self, raw, encoding=None):
+        """
+        Open a fetched table for reading as text,
+        whether it was saved plain or compressed.
+        A table deferred by a pipelined fetch starts streaming here;
+        reading it again later waits for the saved copy to be complete.
+        :param raw: the table path, without any compression extension
+        :param encoding:
+        :return: a text file handle
+        """
+        with self.stream_lock:
+            if raw in self.deferred_tables:
+                pipe = self._start_table_stream(raw)
+                return io.TextIOWrapper(
+                    io.BufferedReader(pipe), encoding=encoding)
+            stream = self.table_streams.get(raw)
+        if stream is not None:
+            stream.join()
+
+        path = self._get_table_file(raw)
+        if path is None:
+            raise FileNotFoundError(raw)
+        if path.endswith('.gz'):
+            return gzip.open(path, 'rt', encoding=encoding)
+
+        return open(path, 'r', encoding=encoding)
+
+    def _start_table_stream(self, raw):
+        """
+        COPY a deferred table in a background thread,
+        feeding a pipe for the parser as well as the local file.
+        :param raw: the table path, without any compression extension
+        :return: the read end of the pipe
+        """
+        (cxn, query, fingerprint) = self.deferred_tables.pop(raw)
+        pipe = _TablePipe(max(
+            1, self.export_settings['pipeline_buffer'] // _TablePipe.chunk_size))
+
+        def stream():
+            error = None
+            con = None
+            try:
+                con = self._connect(cxn)
+                cur = con.cursor()
+                logger.info("COMMAND:%s", query)
+                self._copy_to_file(cur, query, raw, pipe.feed)
+                self._update_manifest(raw, query, fingerprint)
+            except Exception as e:
+                logger.error("Streaming %s failed: %s", raw, e)
+                error = e
+            finally:
+                if con is not None:
+                    con.close()
+                pipe.finish(error)
+
+        thread = threading.Thread(target=stream, name=os.path.basename(raw))
+        self.table_streams[raw] = thread
+        logger.info("Streaming %s into the parser", raw)
+        thread.start()
+
+        return pipe
+
+    def wait_for_table_streams(self):
+        """
+        Wait for the tables that are streaming to be saved.
+        Call this at the end of parse() in pipelined mode.
+        :return: None
+        """
+        for (raw, thread) in self.table_streams.items():
+            thread.join()
+        self.table_streams = {}
+        for raw in self.deferred_tables:
+            logger.warning("%s was never read, so was not fetched", raw)
+
+        return
+
+    def _get_local_table_size(self, raw):
+        path = self._get_table_file(raw)
+        if path is None:
+            return 0
+
+        return self.get_local_file_size(path)
+
     # TODO generalize this to a set of utils
     # TODO PYLINT  Method could be a function
     def _getcols(self, cur, table):
         """
         Will execute a pg query to get the column names for the given table.
         :param cur:
-        :param table:
-        :return:
+        :param table: a table name, or a parenthesized subquery
+        :return: list of column names
         """
-        query = ' '.join(("SELECT * FROM", table, "LIMIT 0"))  # for testing
+        query = ' '.join(("SELECT * FROM", table, "x LIMIT 0"))
 
         cur.execute(query)
         colnames = [desc[0] for desc in cur.description]
         logger.info("COLS (%s): %s", table, colnames)
 
+        return colnames
+
+
+class _CountingWriter:
+    """
+    A minimal binary file wrapper that tallies the bytes that pass through,
+    for reporting the transfer rate of a COPY.
+    """
+
+    def __init__(self, f, tee=None):
+        self.f = f
+        self.tee = tee
+        self.bytes_written = 0
+
+    def write(self, data):
+        self.bytes_written += len(data)
+        if self.tee is not None:
+            self.tee(data)
+        return self.f.write(data)
+
+
+class _TablePipe(io.RawIOBase):
+    """
+    A bounded, one-way pipe from a COPY thread to a parser.
+    The writer feed()s it blocks of bytes, which are handed over in chunks
+    of about chunk_size; once maxchunks are waiting, the writer blocks
+    until the parser catches up.
+    If the parser closes its end early (say, because of a row limit),
+    the writer stops feeding the pipe, but still finishes the local file.
+    An error in the writer is raised to the parser at the end of the data.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, maxchunks):
+        super().__init__()
+        self.chunks = queue.Queue(maxsize=maxchunks)
+        self.pending = bytearray()
+        self.current = b''
+        self.offset = 0
+        self.error = None
+        self.eof = False
+        self.abandoned = threading.Event()
+
+    # the writer's side
+
+    def feed(self, data):
+        if self.abandoned.is_set():
+            return
+        self.pending += data
+        if len(self.pending) >= self.chunk_size:
+            self._put(bytes(self.pending))
+            self.pending = bytearray()
+
+        return
+
+    def finish(self, error=None):
+        if len(self.pending) > 0:
+            self._put(bytes(self.pending))
+            self.pending = bytearray()
+        self.error = error
+        self._put(None)
+
+        return
+
+    def _put(self, chunk):
+        while not self.abandoned.is_set():
+            try:
+                self.chunks.put(chunk, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+        return
+
+    # the parser's side
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while self.offset >= len(self.current):
+            if self.eof:
+                return 0
+            chunk = self.chunks.get()
+            if chunk is None:
+                self.eof = True
+                if self.error is not None:
+                    raise IOError(
+                        "table stream failed: {0}".format(self.error))
+                return 0
+            self.current = chunk
+            self.offset = 0
+
+        n = min(len(b), len(self.current) - self.offset)
+        b[:n] = self.current[self.offset:self.offset + n]
+        self.offset += n
+
+        return n
+
+    def close(self):
+        self.abandoned.set()
+        # unblock a writer that is waiting on a full buffer
+        while True:
+            try:
+                self.chunks.get_nowait()
+            except queue.Empty:
+                break
+        super().close()
+
         return
@@ -1,15 +1,26 @@
 import re
 import hashlib
+import gzip
 import os
 import time
 import logging
+import threading
+import unicodedata
+import xml.etree.ElementTree as ET
+import multiprocessing
 import urllib       # TODO tec look @ import requests
+from contextlib import contextmanager
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 from stat import ST_CTIME, ST_SIZE
-from rdflib import ConjunctiveGraph, Namespace
+from rdflib import ConjunctiveGraph
 from rdflib.namespace import FOAF, DC, RDFS, OWL
 from dipper import curie_map
 from dipper.utils.GraphUtils import GraphUtils
+from dipper.utils.CompressedFile import CompressedFile
+from dipper.utils.RDFPatch import RDFPatch
+from dipper.utils.StepScheduler import StepScheduler
+from dipper.utils.TestIdIndex import TestIdIndex
 
 __author__ = 'nicole'
 
@@ -17,6 +28,95 @@ logger = logging.getLogger(__name__)
 core_bindings = {'dc': DC, 'foaf': FOAF, 'rdfs': RDFS}
 CHUNK = 16 * 1024
 
+# the characters that might be control characters;
+# everything else is printable ascii, or a newline
+_maybe_control = re.compile(r'[^\n\x20-\x7e]')
+
+
+def _scrub_control_characters(text):
+    """
+    Remove the control (and other non-printing) characters from text,
+    except for newlines.
+    :param text:
+    :return: str
+    """
+    return _maybe_control.sub(
+        lambda m: '' if unicodedata.category(m.group(0))[0] == 'C'
+        else m.group(0), text)
+
+
+# the source and function of the fan_out() in progress,
+# inherited by its forked worker processes
+_fan_out_work = None
+
+
+def _run_partition(partition):
+    """
+    Run one partition of a fan_out() in a worker process,
+    into empty graphs, and hand back what it added.
+    :param partition:
+    :return: tuple of (graph triples, testgraph triples, seconds)
+    """
+    (source, func) = _fan_out_work
+    source.testgraph = ConjunctiveGraph()
+    source.graph = source._new_graph()
+    start = time.time()
+    func(partition)
+
+    return (list(source.graph.triples((None, None, None))),
+            list(source.testgraph.triples((None, None, None))),
+            time.time() - start)
+
+
+class _TeeGraph(ConjunctiveGraph):
+    """
+    The full graph of a source that is writing its test subset
+    from the same parse: triples added while the source is on a row
+    that mentions the test ids also go to its testgraph,
+    or only there, for a test row that the full graph doesn't keep.
+    """
+
+    def __init__(self, source):
+        super().__init__()
+        self.source = source
+
+        return
+
+    def add(self, triple_or_quad):
+        if self.source.in_test_row():
+            self.source.testgraph.add(tuple(triple_or_quad[:3]))
+            if self.source.in_test_only_row():
+                return self
+
+        return super().add(triple_or_quad)
+
+    def addN(self, quads):
+        if self.source.in_test_row():
+            quads = list(quads)
+            for quad in quads:
+                self.source.testgraph.add(tuple(quad[:3]))
+            if self.source.in_test_only_row():
+                return self
+
+        return super().addN(quads)
+
+
+class XMLTable:
+    """
+    A table of an xml dump, for Source.process_xml_tables():
+    the function to call on each of its rows (as a dict of field values),
+    the tables that must be processed before it, and optionally a function
+    to call once it is done.
+    """
+
+    def __init__(self, name, function, after=(), finish=None):
+        self.name = name
+        self.function = function
+        self.after = frozenset(after)
+        self.finish = finish
+
+        return
+
 
 class Source:
     """
@@ -28,6 +128,8 @@ class Source:
 
     namespaces = {}
     files = {}
+    core_bindings = {'dc': str(DC), 'foaf': str(FOAF), 'rdfs': str(RDFS),
+                     'owl': str(OWL)}
 
     def __init__(self, name=None):
         if name is not None:
@@ -38,6 +140,8 @@ class Source:
         self.graph = ConjunctiveGraph()
         # to be used to store a subset of data for testing downstream.
         self.testgraph = ConjunctiveGraph()
+        # prefix -> namespace, to write the graphs with; see load_bindings()
+        self.prefixes = {}
         self.triple_count = 0
         self.outdir = 'out'
         self.testdir = 'tests'
@@ -45,6 +149,21 @@ class Source:
         self.dataset = None
         # set to True if you want to materialze identifiers for BNodes
         self.nobnodes = False
+        # how many parse steps or partitions may run at once;
+        # see run_steps() and fan_out()
+        self.parse_workers = 1
+        # set to True to write the test subset from the same parse
+        # as the full graph; see test_rows()
+        self.dual_output = False
+        # whether the row being parsed (in this thread) is a test row
+        self.test_row_state = threading.local()
+        # set above 1 to write the graph in that many shards;
+        # see setshards()
+        self.shards = 1
+        self.concatenate_shards = False
+        # the CompressedFile settings to compress the output with;
+        # see setcompression()
+        self.compression = None
         if self.name is not None:
             self.rawdir = '/'.join((self.rawdir, self.name))
             self.outfile = '/'.join((self.outdir, self.name + ".ttl"))
@@ -80,26 +199,24 @@ class Source:
         return
 
     def load_core_bindings(self):
-
-        for g in [self.graph, self.testgraph]:
-            g.bind("dc", DC)
-            g.bind("foaf", FOAF)
-            g.bind("rdfs", RDFS)
-            g.bind('owl', OWL)
+        self.prefixes.update(self.core_bindings)
 
         return
 
     def load_bindings(self):
+        """
+        Gather the prefixes the output may be written with: the core ones,
+        the source's namespaces, and the curie map.
+        They aren't bound into the graphs; when the graphs are written,
+        only the ones that their terms use are declared
+        (see GraphUtils.used_prefixes()), so this is cheap to call again.
+        :return: None
+        """
         self.load_core_bindings()
-        for g in [self.graph, self.testgraph]:
-
-            for k in self.namespaces.keys():
-                v = self.namespaces[k]
-                g.bind(k, Namespace(v))
+        self.prefixes.update(self.namespaces)
+        if curie_map.get() is not None:
+            self.prefixes.update(curie_map.get())
 
-            for k in curie_map.get().keys():
-                v = curie_map.get()[k]
-                g.bind(k, Namespace(v))
         return
 
     def fetch(self, is_dl_forced=False):
@@ -127,6 +244,13 @@ class Source:
         Right now these are hardcoded to be a single "graph" and a "dataset".
         If you do not supply stream='stdout'
         it will default write these to files.
+        The format may be a list of formats (or a comma-separated string),
+        to write each graph in all of them from one pass over it.
+        If compression is set, the files get its extension (.gz or .zst)
+        and are compressed as they are written.
+        When the canonical format of the full graph replaces that of
+        a previous build, an RDF Patch from the one to the other is
+        written beside it, as name.patch.rdfp.
 
         In addition, if the version number isn't yet set in the dataset,
         it will be set to the date on file.
@@ -134,24 +258,33 @@ class Source:
 
         """
         format_to_xtn = {
-            'rdfxml': 'xml', 'turtle': 'ttl'
+            'rdfxml': 'xml', 'turtle': 'ttl', 'neo4j': 'csv',
+            'json-ld': 'jsonld', 'canonical': 'canonical.nt'
         }
-
-        # make the regular graph output file
-        file = None
+        if isinstance(format, str):
+            formats = format.split(',')
+        else:
+            formats = list(format)
+
+        # binary rdf is memory-mapped, and parquet compresses its columns
+        # itself, so their files are left as they are
+        compressed_ext = ''
+        if self.compression is not None:
+            compressed_ext = CompressedFile.extensions[
+                self.compression.codec]
+
+        def output_files(root):
+            return dict(
+                (f, '.'.join((root, format_to_xtn.get(f, f))) +
+                 ('' if f in ('rdfb', 'parquet') else compressed_ext))
+                for f in formats)
+
+        # make the regular graph output files
+        root = None
         if self.name is not None:
-            file = '/'.join((self.outdir, self.name))
-            if format in format_to_xtn:
-                file = '.'.join((file, format_to_xtn.get(format)))
-            else:
-                file = '.'.join((file, format))
+            root = '/'.join((self.outdir, self.name))
             # make the datasetfile name
-            datasetfile = '/'.join((self.outdir, self.name+'_dataset'))
-            if format in format_to_xtn:
-                datasetfile = '.'.join((datasetfile,
-                                        format_to_xtn.get(format)))
-            else:
-                datasetfile = '.'.join((datasetfile, format))
+            datasetroot = '/'.join((self.outdir, self.name+'_dataset'))
 
             logger.info(
                 "No version set for this datasource; setting to date issued.")
@@ -164,34 +297,120 @@ class Source:
 
         # start off with only the dataset descriptions
         graphs = [
-            {'g': self.dataset.getGraph(), 'file': datasetfile},
+            {'g': self.dataset.getGraph(), 'root': datasetroot,
+             'files': output_files(datasetroot)},
         ]
 
         # add the other graphs to the set to write, if not in the test mode
         if self.testMode:
-            graphs += [{'g': self.testgraph, 'file': self.testfile}]
+            testroot = os.path.splitext(self.testfile)[0]
+            graphs += [{
+                'g': self.testgraph, 'root': testroot,
+                'files': output_files(testroot)}]
         else:
-            graphs += [{'g': self.graph, 'file': file}]
-
-        gu = GraphUtils(None)
+            graphs += [{
+                'g': self.graph, 'root': root, 'files': output_files(root),
+                'shard': True, 'patch': True}]
+            if self.dual_output:
+                graphs += [{
+                    'g': self.testgraph, 'root': root+'_test',
+                    'files': output_files(root+'_test')}]
+
+        self.load_bindings()
+        gu = GraphUtils(self.prefixes, compression=self.compression)
         # loop through each of the graphs and print them out
 
         for g in graphs:
-            f = None
             if stream is None:
-                f = g['file']
+                files = g['files']
             elif stream.lower().strip() == 'stdout':
-                f = None
+                if len(formats) > 1:
+                    logger.error("Can't write several formats to stdout")
+                    return
+                files = {formats[0]: None}
             else:
                 logger.error("I don't understand your stream.")
                 return
-            if format == 'raw':
-                gu.write_raw_triples(g['g'], file=f)
-            else:
-                gu.write(g['g'], format, file=f)
+            # the main graph's canonical output is written beside that of
+            # the last build, which it replaces once it is complete and
+            # patched from it
+            canonical = files.get('canonical')
+            previous = None
+            if canonical is not None and g.get('patch'):
+                previous = self._previous_canonical(g['root'])
+                if previous is not None:
+                    files = dict(
+                        files, canonical=g['root'] + '.canonical.new.nt' +
+                        compressed_ext)
+            try:
+                if len(files) > 1:
+                    if self.shards > 1 and g.get('shard'):
+                        logger.warning(
+                            "Shards are only written when turtle is "
+                            "the only format")
+                    gu.write_formats(g['g'], files)
+                else:
+                    (fmt, f) = list(files.items())[0]
+                    if fmt == 'raw':
+                        gu.write_raw_triples(g['g'], file=f)
+                    elif fmt == 'neo4j':
+                        if f is None:
+                            logger.error(
+                                "Can't write neo4j csv files to stdout")
+                            return
+                        gu.write_neo4j_csv(g['g'], f)
+                    elif fmt == 'rdfb':
+                        if f is None:
+                            logger.error("Can't write binary rdf to stdout")
+                            return
+                        gu.write_binary(g['g'], f)
+                    elif fmt == 'parquet':
+                        if f is None:
+                            logger.error("Can't write parquet to stdout")
+                            return
+                        gu.write_parquet(g['g'], f)
+                    elif self.shards > 1 and g.get('shard') and f is not None:
+                        if fmt == 'turtle':
+                            gu.write_shards(
+                                g['g'], f, self.shards,
+                                concatenate=self.concatenate_shards)
+                        else:
+                            logger.warning(
+                                "Shards are only written in turtle; "
+                                "writing %s as one file", f)
+                            gu.write(g['g'], fmt, file=f)
+                    else:
+                        gu.write(g['g'], fmt, file=f)
+                if previous is not None:
+                    patch = g['root'] + '.patch.rdfp' + compressed_ext
+                    RDFPatch.diff(
+                        previous, files['canonical'], patch,
+                        gu.compression_for(patch))
+                    os.replace(files['canonical'], canonical)
+                    if previous != canonical:
+                        os.remove(previous)
+            finally:
+                if previous is not None and \
+                        os.path.exists(files['canonical']):
+                    os.remove(files['canonical'])
 
         return
 
+    @staticmethod
+    def _previous_canonical(root):
+        """
+        Find the canonical output of the last build,
+        wherever it was compressed with.
+        :param root: the output file name, without any extension
+        :return: the file, or None if there isn't one
+        """
+        for ext in [''] + sorted(CompressedFile.extensions.values()):
+            file = root + '.canonical.nt' + ext
+            if os.path.exists(file):
+                return file
+
+        return None
+
     def whoami(self):
         logger.info("I am %s", self.name)
         return
@@ -356,6 +575,128 @@ class Source:
             time.asctime(time.localtime(st[ST_CTIME])))
         return
 
+    def reached_limit(self, count, limit):
+        """
+        The contract for the row limit (-l) of every source:
+        outside of test mode, each step stops reading its file
+        as soon as it has handled more than limit rows,
+        rather than reading (and skipping) the rest of it.
+        Test mode ignores the limit, since the test ids may be anywhere.
+
+        The exceptions are steps whose rows feed a lookup that later steps
+        join against; those keep reading, but stop adding to the graph.
+
+        Usage:
+            if self.reached_limit(line_counter, limit):
+                break
+
+        :param count: the number of rows handled so far
+        :param limit: the limit, or None
+        :return: True if the step should stop
+        """
+
+        return not self.testMode and limit is not None and count > limit
+
+    def process_xml_tables(self, stream, tables, limit, scrub=False):
+        """
+        Process the tables of an xml dump (like from mysqldump --xml)
+        in a single pass over it, calling each table's function on its rows.
+        Elements are dropped as soon as they are read, so memory stays
+        bounded, except for the rows of tables that come before
+        the tables they depend on: those are held until they can be run.
+        Tables that aren't in the dump count as done at its end.
+
+        Usage:
+            self.process_xml_tables(f, [
+                XMLTable('Species', self._process_species_row),
+                XMLTable('Breed', self._process_breed_row,
+                         after=['Species'])], limit)
+
+        :param stream: the dump, open as text
+        :param tables: list of XMLTable
+        :param limit: the most rows to process from each table
+        :param scrub: True to remove control characters as it is read
+        :return: None
+        """
+        handlers = dict((t.name, t) for t in tables)
+        done = set()
+        # rows of finished tables, and of the one being read,
+        # that wait for others
+        held = {}
+        counts = dict((t.name, 0) for t in tables)
+
+        def get_row(elem):
+            return dict(
+                (f.get('name'), f.text) for f in elem.findall('field'))
+
+        def ready(table):
+            return table.after <= done
+
+        def run(table, rows):
+            for row in rows:
+                if self.reached_limit(counts[table.name], limit):
+                    break
+                table.function(row)
+                counts[table.name] += 1
+            return
+
+        def complete(table):
+            if table.finish is not None:
+                table.finish()
+            done.add(table.name)
+            logger.info(
+                "Processed %d rows of %s", counts[table.name], table.name)
+            # and anything that was waiting on it
+            for waiting in tables:
+                if waiting.name in held and ready(waiting):
+                    run(waiting, held.pop(waiting.name))
+                    complete(waiting)
+            return
+
+        parser = ET.XMLPullParser(events=('start', 'end'))
+        table = None
+        table_elem = None
+        for chunk in iter(lambda: stream.read(2**20), ''):
+            if scrub:
+                chunk = _scrub_control_characters(chunk)
+            parser.feed(chunk)
+            for (event, elem) in parser.read_events():
+                if event == 'start':
+                    if elem.tag == 'table_data':
+                        table = handlers.get(elem.get('name'))
+                        table_elem = elem
+                        if table is not None:
+                            logger.info("Processing %s", table.name)
+                            if not ready(table):
+                                held[table.name] = []
+                    continue
+                if elem.tag == 'row' and table_elem is not None:
+                    if table is None:
+                        pass
+                    elif table.name in held:
+                        held[table.name].append(get_row(elem))
+                    elif not self.reached_limit(counts[table.name], limit):
+                        run(table, [get_row(elem)])
+                    table_elem.remove(elem)
+                elif elem.tag == 'table_data':
+                    if table is not None and table.name not in held:
+                        complete(table)
+                    table = None
+                    table_elem = None
+                    elem.clear()
+        parser.close()
+
+        # what is left waits on tables that weren't in the dump;
+        # finish those first, then what waits on them
+        left = [t for t in tables if t.name not in done]
+        while len(left) > 0:
+            t = next((t for t in left if ready(t)), left[0])
+            run(t, held.pop(t.name, []))
+            complete(t)
+            left = [t for t in tables if t.name not in done]
+
+        return
+
     def process_xml_table(self, elem, table_name, processing_function, limit):
         """
         This is a convenience function to process the elements of an
@@ -384,14 +725,165 @@ class Source:
                     row[ats['name']] = f.text
                 processing_function(row)
                 line_counter += 1
-                if self.testMode \
-                        and limit is not None and line_counter > limit:
-                    continue
+                if self.reached_limit(line_counter, limit):
+                    break
 
             elem.clear()  # discard the element
 
         return
 
+    def index_test_rows(self, file_keys, ids):
+        """
+        At fetch time, index where the rows mentioning any of the test ids
+        are in the given raw files, so that test mode can read just those.
+        An index that is current for the file and ids is left alone.
+        :param file_keys: keys of self.files
+        :param ids: the test ids that the rows are filtered on
+        :return: None
+        """
+        if not ids:
+            return
+        for k in file_keys:
+            TestIdIndex('/'.join((self.rawdir, self.files[k]['file']))).build(
+                ids)
+
+        return
+
+    def test_rows(self, f, path, ids, accept=None, keep=None):
+        """
+        The rows of an open raw file for this run: in test mode,
+        when there is a current index of the file for the test ids,
+        just the indexed rows, read by seeking to each of them;
+        otherwise the file itself.
+        The rows still need the source's usual test filter.
+
+        With dual output, every row is read, and those that mention
+        the test ids are marked, so that what is added to the graph
+        while on them also goes to the testgraph.
+
+        Usage:
+            with gzip.open(myfile, 'rb') as f:
+                for line in self.test_rows(f, myfile, self.gene_ids):
+
+        :param f: the file, open in the mode its rows are read in
+        :param path: the path of the file
+        :param ids: the test ids that the index was built with
+        :param accept: for dual output, a function of a line that is True
+            for the test rows; by default, those with any of the ids
+            as a field
+        :param keep: for dual output, a function of a line that is True
+            for the rows of the full graph, if a test row may not be one
+            (say, a test gene of another taxon); the source must then
+            read the rows that either this or in_test_row() accepts
+        :return: an iterable of lines
+        """
+        if self.dual_output and not self.testMode:
+            if accept is None:
+                accept = TestIdIndex.row_matcher(ids or [])
+            return self._mark_test_rows(f, accept, keep)
+        if self.testMode and ids:
+            rows = TestIdIndex(path).read_rows(f, ids)
+            if rows is not None:
+                logger.info("Reading the indexed test rows of %s", path)
+                return rows
+
+        return f
+
+    def _mark_test_rows(self, rows, accept, keep=None):
+        state = self.test_row_state
+        try:
+            for row in rows:
+                state.active = accept(row)
+                state.test_only = state.active and keep is not None \
+                    and not keep(row)
+                yield row
+        finally:
+            state.active = False
+            state.test_only = False
+
+        return
+
+    @contextmanager
+    def test_output(self):
+        """
+        With dual output, what is added to the full graph in this block
+        goes to the testgraph too, like the declarations that a source
+        makes in its testgraph in test mode as well.
+
+        Usage:
+            with self.test_output():
+                gu.loadAllProperties(g)
+
+        """
+        state = self.test_row_state
+        active = getattr(state, 'active', False)
+        state.active = self.dual_output and not self.testMode
+        try:
+            yield
+        finally:
+            state.active = active
+
+    def in_test_row(self):
+        """
+        :return: True if this thread is parsing a row for the test output
+        """
+
+        return getattr(self.test_row_state, 'active', False)
+
+    def in_test_only_row(self):
+        """
+        :return: True if this thread is parsing a row for just
+            the test output, and not the full graph
+        """
+
+        return getattr(self.test_row_state, 'test_only', False)
+
+    def looked_up_rows(self, rows, lookup, key, size=10000):
+        """
+        Read rows a batch ahead, and look up the keys of a batch at once,
+        with lookup.get_many(): for a SpillDict that has spilled,
+        that is a query a batch, rather than one for each row.
+        Each row comes back with its own test row marks (see test_rows()).
+
+        Usage:
+            for (line, kind) in self.looked_up_rows(
+                    self.test_rows(f, myfile, self.gene_ids),
+                    self.class_or_indiv, self._gene_id_of):
+
+        :param rows: iterable of rows
+        :param lookup: a mapping with get_many(keys), like a SpillDict
+        :param key: function of a row to the key to look up,
+            or None for nothing
+        :param size: how many rows to read ahead
+        :return: a generator of (row, its key's value, or None)
+        """
+        state = self.test_row_state
+        batch = []
+        try:
+            for row in rows:
+                batch.append((
+                    row, key(row), getattr(state, 'active', False),
+                    getattr(state, 'test_only', False)))
+                if len(batch) >= size:
+                    yield from self._looked_up_batch(batch, lookup)
+                    batch = []
+            yield from self._looked_up_batch(batch, lookup)
+        finally:
+            state.active = False
+            state.test_only = False
+
+        return
+
+    def _looked_up_batch(self, batch, lookup):
+        state = self.test_row_state
+        values = lookup.get_many(
+            set(k for (row, k, active, test_only) in batch if k is not None))
+        for (row, k, active, test_only) in batch:
+            (state.active, state.test_only) = (active, test_only)
+            yield (row, values.get(k))
+
+        return
+
     def _check_list_len(self, row, length):
         """
         Sanity check for csv parser
@@ -467,8 +959,30 @@ class Source:
         return is_equal
 
     def file_len(self, fname):
-        with open(fname) as f:
-            l = sum(1 for line in f)
+        """
+        Count the lines in a (possibly gzipped) file,
+        by counting newline bytes in large blocks rather than
+        decoding and iterating line by line.
+        A final line without a trailing newline is counted too.
+        :param fname:
+        :return: the number of lines in the file
+        """
+        if fname.endswith('.gz'):
+            f = gzip.open(fname, 'rb')
+        else:
+            f = open(fname, 'rb', buffering=0)
+        l = 0
+        last = b'\n'
+        with f:
+            while True:
+                buffer = f.read(2**20)
+                if not buffer:
+                    break
+                l += buffer.count(b'\n')
+                last = buffer[-1:]
+        if last != b'\n':
+            l += 1
+
         return l
 
     def settestonly(self, testonly):
@@ -519,6 +1033,152 @@ class Source:
 
         return
 
+    def setdualoutput(self, dual_output):
+        """
+        Write the test subset along with the full graph from one parse,
+        rather than parsing again in test mode.
+        The test rows are those that test_rows() marks,
+        so this is for the sources that read their files with it.
+        :param dual_output:
+        :return: None
+        """
+        self.dual_output = dual_output
+        if dual_output and not isinstance(self.graph, _TeeGraph):
+            graph = self._new_graph()
+            for (prefix, namespace) in self.graph.namespaces():
+                graph.bind(prefix, namespace)
+            graph.addN(
+                (s, p, o, graph.default_context)
+                for (s, p, o) in self.graph.triples((None, None, None)))
+            self.graph = graph
+
+        return
+
+    def setshards(self, shards, concatenate=False):
+        """
+        Write the full graph (in turtle) in this many gzipped shards,
+        split by subject and written in parallel, with a manifest;
+        see GraphUtils.write_shards().
+        :param shards:
+        :param concatenate: if True, join the shards into the usual
+            single file once they are written
+        :return: None
+        """
+        self.shards = shards
+        self.concatenate_shards = concatenate
+
+        return
+
+    def setcompression(self, codec, level=None, threads=None):
+        """
+        Compress all of the output files (the dataset description too)
+        as they are written, adding .gz or .zst to their names;
+        see CompressedFile.
+        :param codec: 'gzip' or 'zstd', or None for none
+        :param level: the compression level
+        :param threads: for zstd, the number of threads to compress with
+        :return: None
+        """
+        self.compression = None
+        if codec is not None:
+            self.compression = CompressedFile(codec, level, threads)
+
+        return
+
+    def _new_graph(self):
+        """
+        :return: an empty graph, for this source's full output
+        """
+        if self.dual_output:
+            return _TeeGraph(self)
+
+        return ConjunctiveGraph()
+
+    def setparseworkers(self, workers):
+        """
+        Set how many of the parse steps of a source that declares them,
+        or how many of its partitions (like taxa), may run at once.
+        :param workers:
+        :return: None
+
+        """
+
+        self.parse_workers = workers
+
+        return
+
+    def run_steps(self, steps, provided=()):
+        """
+        Run the declared steps of a parse (a list of dipper.utils.Step),
+        independent ones concurrently when parse_workers > 1.
+        :param steps: the steps, in an order that works when run serially
+        :param provided: lookups that are already built before the steps run
+        :return: None
+
+        """
+        scheduler = StepScheduler(steps, provided, self.parse_workers)
+        scheduler.run([self.graph, self.testgraph])
+
+        return
+
+    def fan_out(self, func, partitions):
+        """
+        Call func(partition) for each of the partitions, like the taxa of
+        a multi-species source, where each partition's work is independent
+        of the others' and only adds to the graphs.
+        With parse_workers > 1, the partitions are run in a pool of
+        forked processes, each starting from empty graphs;
+        the triples they add are then merged into this source's graphs,
+        in the order of the partitions.
+        Anything else a partition changes on the source stays in
+        its worker, so func must not build lookups for later use.
+        :param func: any callable, it is not pickled
+        :param partitions: the (picklable) partitions
+        :return: None
+
+        """
+        global _fan_out_work
+
+        partitions = list(partitions)
+        workers = min(self.parse_workers, len(partitions))
+        if workers > 1 \
+                and 'fork' not in multiprocessing.get_all_start_methods():
+            logger.warning(
+                "Can't fork worker processes here; "
+                "processing the partitions one at a time")
+            workers = 1
+        if workers <= 1:
+            for partition in partitions:
+                func(partition)
+            return
+
+        logger.info(
+            "Processing %d partitions in %d processes",
+            len(partitions), workers)
+        _fan_out_work = (self, func)
+        try:
+            with ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('fork')) \
+                    as executor:
+                for (partition, (triples, test_triples, seconds)) in zip(
+                        partitions, executor.map(_run_partition, partitions)):
+                    logger.info(
+                        "Partition %s: %d triples in %.1f sec",
+                        partition, len(triples) + len(test_triples), seconds)
+                    self._merge_triples(self.graph, triples)
+                    self._merge_triples(self.testgraph, test_triples)
+        finally:
+            _fan_out_work = None
+
+        return
+
+    @staticmethod
+    def _merge_triples(graph, triples):
+        graph.addN((s, p, o, graph.default_context) for (s, p, o) in triples)
+
+        return
+
     def declareAsOntology(self, graph):
         """
         The file we output needs to be declared as an ontology,
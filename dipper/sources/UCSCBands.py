@@ -157,8 +157,10 @@ class UCSCBands(Source):
         if self.testOnly:
             self.testMode = True
 
-        for taxon in self.tax_ids:
-            self._get_chrbands(limit, str(taxon))
+        # each taxon has its own file, so they can be done side by side
+        self.fan_out(
+            lambda taxon: self._get_chrbands(limit, taxon),
+            [str(taxon) for taxon in self.tax_ids])
 
         self._create_genome_builds()
 
@@ -265,8 +265,7 @@ class WormBase(Source):
                 if gene_synonym != '':
                     gu.addSynonym(g, gene_id, gene_synonym)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -323,8 +322,7 @@ class WormBase(Source):
                         descs[d] = text
                         gu.addDescription(g, gene_id, text)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -456,8 +454,7 @@ class WormBase(Source):
 
                         # finish looping through all alleles
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -529,8 +526,7 @@ class WormBase(Source):
                     # eco_id = 'ECO:0000019'  # RNAi evidence  # TODO unused
                     assoc.add_association_to_graph(g)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -584,8 +580,7 @@ class WormBase(Source):
                     r.addRefToGraph(g)
                     gu.addSameIndividual(g, ref_id, xref_id)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -740,8 +735,7 @@ class WormBase(Source):
                 if note is not None:
                     gu.addDescription(g, fid, note)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
                 # RNAi reagents:
@@ -909,8 +903,7 @@ class WormBase(Source):
                 # citation is not a pmid or WBref - get this some other way
                 gu.addDescription(g, assoc_id, summary)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -15,6 +15,7 @@ from dipper.models.GenomicFeature import makeChromID
 from dipper.models.GenomicFeature import Feature
 from dipper.models.Reference import Reference
 from dipper.utils.GraphUtils import GraphUtils
+from dipper.utils.StepScheduler import Step
 from dipper import curie_map
 from dipper import config
 
@@ -342,43 +343,73 @@ class ZFIN(Source):
         else:
             g = self.graph
 
+        # The steps are listed in an order that works serially;
+        # the lookups each one builds (outputs) or uses (inputs)
+        # let independent steps run alongside each other.
         # basic information on classes and instances
-        self._process_genes(limit)
-        self._process_stages(limit)
-        self._process_pubinfo(limit)
-        self._process_pub2pubmed(limit)
+        steps = [
+            Step(self._process_genes, (limit,), outputs=['id_label_map']),
+            Step(self._process_stages, (limit,)),
+            Step(self._process_pubinfo, (limit,)),
+            Step(self._process_pub2pubmed, (limit,))
+        ]
 
         # The knockdown reagents
         for t in ['morph', 'crispr', 'talen']:
-            self._process_targeting_reagents(t, limit)
-
-        self._process_gene_marker_relationships(limit)
-        self._process_features(limit)
-        self._process_feature_affected_genes(limit)
-        # only adds features on chromosomes, not positions
-        self._process_mappings(limit)
-
-        # These must be processed before G2P and expression
-        self._process_wildtypes(limit)
-        self._process_genotype_backgrounds(limit)
-        # REVIEWED - NEED TO REVIEW LABELS ON Deficiencies
-        self._process_genotype_features(limit)
-
-        self.process_fish(limit)
-        # Must be processed after morpholinos/talens/crisprs id/label
-        self._process_pheno_enviro(limit)
-
-        # once the genotypes and environments are processed,
-        # we can associate these with the phenotypes
-        self._process_g2p(limit)
-        self.process_fish_disease_models(limit)
-
-        # zfin-curated orthology calls to human genes
-        self._process_human_orthos(limit)
-        self.process_orthology_evidence(limit)
-
-        # coordinates of all genes - from ensembl
-        self._process_gene_coordinates(limit)
+            steps.append(Step(
+                self._process_targeting_reagents, (t, limit),
+                inputs=['variant_loci_genes'],
+                outputs=['id_label_map', 'variant_loci_genes'],
+                name='_process_targeting_reagents_' + t))
+
+        steps += [
+            Step(self._process_gene_marker_relationships, (limit,),
+                 inputs=['transgenic_parts'],
+                 outputs=['id_label_map', 'transgenic_parts']),
+            Step(self._process_features, (limit,), outputs=['id_label_map']),
+            Step(self._process_feature_affected_genes, (limit,),
+                 inputs=['variant_loci_genes'],
+                 outputs=['id_label_map', 'variant_loci_genes']),
+            # only adds features on chromosomes, not positions
+            Step(self._process_mappings, (limit,)),
+
+            # These must be processed before G2P and expression
+            Step(self._process_wildtypes, (limit,),
+                 outputs=['id_label_map', 'wildtype_genotypes']),
+            Step(self._process_genotype_backgrounds, (limit,),
+                 outputs=['genotype_backgrounds']),
+            # REVIEWED - NEED TO REVIEW LABELS ON Deficiencies
+            Step(self._process_genotype_features, (limit,),
+                 inputs=['genotype_backgrounds', 'id_label_map',
+                         'variant_loci_genes'],
+                 outputs=['geno_alleles', 'id_label_map',
+                          'variant_loci_genes']),
+
+            Step(self.process_fish, (limit,),
+                 inputs=['geno_alleles', 'id_label_map', 'transgenic_parts',
+                         'variant_loci_genes', 'wildtype_genotypes'],
+                 outputs=['fish_parts', 'id_label_map']),
+            # Must be processed after morpholinos/talens/crisprs id/label
+            Step(self._process_pheno_enviro, (limit,),
+                 inputs=['id_label_map'],
+                 outputs=['environment_hash', 'id_label_map']),
+
+            # once the genotypes and environments are processed,
+            # we can associate these with the phenotypes
+            Step(self._process_g2p, (limit,),
+                 inputs=['environment_hash', 'zp_map']),
+            Step(self.process_fish_disease_models, (limit,),
+                 inputs=['id_label_map']),
+
+            # zfin-curated orthology calls to human genes
+            Step(self._process_human_orthos, (limit,)),
+            Step(self.process_orthology_evidence, (limit,)),
+
+            # coordinates of all genes - from ensembl
+            Step(self._process_gene_coordinates, (limit,))
+        ]
+        # the zp mappings were loaded above
+        self.run_steps(steps, provided=['zp_map'])
 
         # FOR THE FUTURE - needs verification
         # self._process_wildtype_expression(limit)
@@ -611,8 +642,7 @@ class ZFIN(Source):
             gu.addSynonym(g, fish_id, fish['fish_label'])
             self.id_label_map[fish_id] = fish_label
 
-            if not self.testMode and \
-                    limit is not None and line_counter > limit:
+            if self.reached_limit(line_counter, limit):
                 break
 
             # ###finish iterating over fish
@@ -817,8 +847,7 @@ class ZFIN(Source):
                         if other_allele is not None:
                             genoparts[gh].append(other_allele)
 
-                if not self.testMode and limit is not None \
-                        and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
                     # end loop through file
@@ -1153,8 +1182,7 @@ class ZFIN(Source):
                 # Add background to the intrinsic genotype
                 geno.addGenomicBackgroundToGenotype(background_id, genotype_id)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         logger.info("Done with genotype backgrounds")
@@ -1215,8 +1243,7 @@ class ZFIN(Source):
                 # store these in a special hash to look up later
                 self.wildtype_genotypes += [genotype_id]
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         logger.info("Done with wildtype genotypes")
@@ -1254,8 +1281,7 @@ class ZFIN(Source):
                 gu.addClassToGraph(g, stage_id, stage_name)
                 gu.addEquivalentClass(g, stage_id, stage_obo_id)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         logger.info("Done with stages")
@@ -1402,8 +1428,7 @@ class ZFIN(Source):
                         gu.addTriple(g, pub_id,
                                      gu.object_properties['mentions'], fish_id)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         myset = set([','.join(x) for x in mapped_zpids])
@@ -1487,8 +1512,7 @@ class ZFIN(Source):
 
                 self.id_label_map[gene_id] = gene_symbol
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     pass
                 else:
                     geno.addGene(gene_id, gene_symbol)
@@ -1558,8 +1582,7 @@ class ZFIN(Source):
                     genomic_feature_id] = genomic_feature_abbreviation
                 self.id_label_map[construct_id] = construct_name
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         logger.info("Done with features")
@@ -1686,8 +1709,7 @@ class ZFIN(Source):
                     # TODO review this
                     pass
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         logger.info("Done with feature affected genes")
@@ -1826,8 +1848,7 @@ class ZFIN(Source):
                 # just in case we haven't seen it before
                 self.id_label_map[gene_id] = gene_symbol
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         logger.info("Done with gene marker relationships")
@@ -1909,8 +1930,7 @@ class ZFIN(Source):
 
                 r.addRefToGraph(g)
 
-                if not self.testMode and \
-                        limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -1958,8 +1978,7 @@ class ZFIN(Source):
                     gu.addSameIndividual(g, pub_id, pubmed_id)
                 r = Reference(pub_id, rtype)
                 r.addRefToGraph(g)
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -2065,8 +2084,7 @@ class ZFIN(Source):
                     if gene_id not in self.variant_loci_genes[reagent_id]:
                         self.variant_loci_genes[reagent_id] += [gene_id]
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         logger.info("Done with Reagent type %s", reagent_type)
@@ -2168,8 +2186,7 @@ class ZFIN(Source):
                 envo.addEnvironmentalCondition(env_component_id,
                                                env_component_label)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
                 # End of loop through pheno_env file
@@ -2281,8 +2298,7 @@ class ZFIN(Source):
                     logger.error("There's a panel (%s) we don't have info for",
                                  panel_symbol)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         logger.info("Done with chromosome mappings")
@@ -2334,8 +2350,7 @@ class ZFIN(Source):
                 gu.addTriple(g, gene_id, gu.properties['has_gene_product'],
                              uniprot_id)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         logger.info("Done with UniProt IDs")
@@ -2405,8 +2420,7 @@ class ZFIN(Source):
 
                 assoc.add_association_to_graph(g)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         gu.loadObjectProperties(g, OrthologyAssoc.ortho_rel)
@@ -2463,8 +2477,7 @@ class ZFIN(Source):
                 f.addFeatureEndLocation(end, chrom_in_build, strand)
                 f.addFeatureToGraph(g, True, None, True)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         gu.loadObjectProperties(g, OrthologyAssoc.ortho_rel)
@@ -2543,8 +2556,7 @@ class ZFIN(Source):
                     gu.makeLeader(g, pubmed_id)
                 assoc.add_association_to_graph(g)
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
 
         return
@@ -2848,8 +2860,7 @@ class ZFIN(Source):
                 # FIXME need to update with proper provenance model
                 # so the papers get attached with the relevant eco code
 
-                if not self.testMode \
-                        and limit is not None and line_counter > limit:
+                if self.reached_limit(line_counter, limit):
                     break
         return
 
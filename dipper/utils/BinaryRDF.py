@@ -0,0 +1,431 @@
+"""
+A compact, indexed binary layout for a graph, in the spirit of HDT
+(a dictionary of terms, and the triples as ids), that can be queried
+straight from the file, memory-mapped, without parsing it first.
+
+    header      magic, counts, and where each section starts
+    prefixes    json, of prefix -> namespace, for queries to use
+    offsets     n_terms + 1 uint64, where each term starts in terms
+    terms       the distinct terms, encoded and sorted, end to end
+    spo         n_triples * 3 uint32 term ids, sorted by s, p, o
+    pos         n_triples uint32 positions in spo, sorted by p, o, s
+    osp         n_triples uint32 positions in spo, sorted by o, s, p
+
+Numbers are little-endian.  Terms are encoded as a kind and their text:
+b'U' + iri, b'B' + label, or b'L' + (b'@' + language | b'^' + datatype)
++ b'\\0' + lexical form, for a literal.
+A term's id is its place in the sorted terms, so a term is found by
+a binary search of the terms, and a pattern with any of s, p, o given
+by a binary search of the index that starts with them.
+"""
+
+import sys
+import json
+import mmap
+import struct
+import logging
+from array import array
+from rdflib import URIRef, BNode, Literal
+from rdflib.store import Store
+
+__author__ = 'nlw'
+
+logger = logging.getLogger(__name__)
+
+
+MAGIC = b'DRDF0001'
+# magic, n_terms, n_triples, and where the prefixes (with their length),
+# offsets, terms, spo, pos and osp start
+HEADER = struct.Struct('<8s9Q')
+
+
+def encode_term(term):
+    """
+    :param term: a URIRef, BNode or Literal
+    :return: bytes
+    """
+    if isinstance(term, Literal):
+        if term.language is not None:
+            tag = '@' + term.language
+        elif term.datatype is not None:
+            tag = '^' + str(term.datatype)
+        else:
+            tag = ''
+        return ('L' + tag + '\0' + str(term)).encode('utf-8')
+    if isinstance(term, BNode):
+        return ('B' + str(term)).encode('utf-8')
+    if isinstance(term, URIRef):
+        return ('U' + str(term)).encode('utf-8')
+
+    raise ValueError("Can't encode {0}".format(repr(term)))
+
+
+def decode_term(data):
+    """
+    :param data: bytes, from encode_term
+    :return: the term
+    """
+    text = bytes(data).decode('utf-8')
+    kind = text[0]
+    if kind == 'U':
+        return URIRef(text[1:])
+    if kind == 'B':
+        return BNode(text[1:])
+    (tag, lexical) = text[1:].split('\0', 1)
+    if tag.startswith('@'):
+        return Literal(lexical, lang=tag[1:])
+    if tag.startswith('^'):
+        return Literal(lexical, datatype=URIRef(tag[1:]))
+
+    return Literal(lexical)
+
+
+def _little_endian(numbers):
+    if sys.byteorder != 'little':
+        numbers.byteswap()
+
+    return numbers.tobytes()
+
+
+class BinaryRDFWriter(object):
+    """
+    Writes a graph in the binary layout described above.
+    The graph is read once, numbering its terms as they come;
+    the terms and triples are then sorted, and the indexes built,
+    in memory, before the file is written.
+
+    Usage:
+        BinaryRDFWriter('out/mgi.rdfb', prefixes).write_graph(graph)
+
+    """
+
+    def __init__(self, file, prefixes=None):
+        """
+        :param file: the path to write to
+        :param prefixes: dict of prefix -> namespace, to keep in the file
+        """
+        self.file = file
+        self.prefixes = dict(
+            (p, str(ns)) for (p, ns) in (prefixes or {}).items())
+
+        return
+
+    def write_triples(self, triples):
+        """
+        :param triples: iterable of (s, p, o)
+        :return: the number of distinct triples written
+        """
+        ids = {}
+        terms = []
+        found = []
+        for triple in triples:
+            for term in triple:
+                i = ids.get(term)
+                if i is None:
+                    i = ids[term] = len(terms)
+                    terms.append(term)
+                found.append(i)
+        ids = None
+
+        # number the terms in the order of their encodings
+        encoded = [encode_term(term) for term in terms]
+        terms = None
+        order = sorted(range(len(encoded)), key=encoded.__getitem__)
+        new_id = array('I', bytes(4 * len(order)))
+        for (n, i) in enumerate(order):
+            new_id[i] = n
+        n_terms = len(order)
+
+        # sort the triples, as single numbers, without duplicates
+        spo = sorted(set(
+            (new_id[found[i]] * n_terms + new_id[found[i + 1]]) * n_terms
+            + new_id[found[i + 2]]
+            for i in range(0, len(found), 3)))
+        found = None
+        n_triples = len(spo)
+        s = array('I', bytes(4 * n_triples))
+        p = array('I', bytes(4 * n_triples))
+        o = array('I', bytes(4 * n_triples))
+        for (i, key) in enumerate(spo):
+            (sp, o[i]) = divmod(key, n_terms)
+            (s[i], p[i]) = divmod(sp, n_terms)
+        spo = None
+        pos = array('I', sorted(
+            range(n_triples), key=lambda i: (p[i], o[i], s[i])))
+        osp = array('I', sorted(
+            range(n_triples), key=lambda i: (o[i], s[i], p[i])))
+        triples = array('I', bytes(12 * n_triples))
+        triples[0::3] = s
+        triples[1::3] = p
+        triples[2::3] = o
+
+        offsets = array('Q', [0])
+        for i in order:
+            offsets.append(offsets[-1] + len(encoded[i]))
+        prefixes = json.dumps(self.prefixes, sort_keys=True).encode('utf-8')
+
+        sections = [prefixes, _little_endian(offsets)]
+        with open(self.file, 'wb') as f:
+            f.write(bytes(HEADER.size))
+            starts = []
+            for section in sections:
+                starts.append(self._align(f))
+                f.write(section)
+            starts.append(self._align(f))
+            for i in order:
+                f.write(encoded[i])
+            for section in (triples, pos, osp):
+                starts.append(self._align(f))
+                f.write(_little_endian(section))
+            f.seek(0)
+            f.write(HEADER.pack(
+                MAGIC, n_terms, n_triples, starts[0], len(prefixes),
+                *starts[1:]))
+        logger.info(
+            "Wrote %d triples, of %d terms, to %s",
+            n_triples, n_terms, self.file)
+
+        return n_triples
+
+    @staticmethod
+    def _align(f):
+        """
+        Pad to a multiple of 8 bytes.
+        :return: the new position
+        """
+        position = f.tell()
+        if position % 8 != 0:
+            f.write(bytes(8 - position % 8))
+            position += 8 - position % 8
+
+        return position
+
+    def write_graph(self, graph):
+        """
+        :param graph: an rdflib graph
+        :return: the number of triples written
+        """
+
+        return self.write_triples(graph.triples((None, None, None)))
+
+
+class BinaryRDFReader(object):
+    """
+    Looks up triple patterns in a file written by BinaryRDFWriter,
+    through a memory map, so that opening it costs nothing
+    whatever its size, and only the pages a lookup touches are read.
+
+    Usage:
+        with BinaryRDFReader('out/mgi.rdfb') as reader:
+            for (s, p, o) in reader.triples((gene, None, None)):
+                ...
+
+    or, for SPARQL, as the store of a graph:
+        graph = Graph(store=BinaryRDFStore('out/mgi.rdfb'))
+
+    """
+
+    def __init__(self, file):
+        """
+        :param file: the path to read
+        """
+        if sys.byteorder != 'little':
+            raise ValueError("Binary RDF can only be read on little-endian")
+        self.file = file
+        self.f = open(file, 'rb')
+        self.map = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.n_terms, self.n_triples, prefixes_at, prefixes_size,
+         offsets_at, terms_at, spo_at, pos_at, osp_at) = \
+            HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(file + " is not binary RDF")
+        self.view = view = memoryview(self.map)
+        self.prefixes = json.loads(
+            bytes(view[prefixes_at:prefixes_at + prefixes_size]).decode())
+        self.offsets = view[
+            offsets_at:offsets_at + 8 * (self.n_terms + 1)].cast('Q')
+        self.terms_at = terms_at
+        self.spo = view[spo_at:spo_at + 12 * self.n_triples].cast('I')
+        self.pos = view[pos_at:pos_at + 4 * self.n_triples].cast('I')
+        self.osp = view[osp_at:osp_at + 4 * self.n_triples].cast('I')
+
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+        return False
+
+    def __len__(self):
+        return self.n_triples
+
+    def close(self):
+        for view in (self.offsets, self.spo, self.pos, self.osp, self.view):
+            view.release()
+        self.map.close()
+        self.f.close()
+
+        return
+
+    def _encoded(self, i):
+        start = self.terms_at + self.offsets[i]
+        return self.map[start:self.terms_at + self.offsets[i + 1]]
+
+    def term(self, i):
+        """
+        :param i: a term id
+        :return: the term
+        """
+
+        return decode_term(self._encoded(i))
+
+    def term_id(self, term):
+        """
+        :param term: a URIRef, BNode or Literal
+        :return: its id, or None if it isn't in the file
+        """
+        key = encode_term(term)
+        (lo, hi) = (0, self.n_terms)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._encoded(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.n_terms and self._encoded(lo) == key:
+            return lo
+
+        return None
+
+    def _triple(self, i):
+        return (self.spo[3 * i], self.spo[3 * i + 1], self.spo[3 * i + 2])
+
+    def _range(self, key_at, prefix):
+        """
+        Binary search an index for the rows that start with a prefix.
+        :param key_at: function of a row number, to its key
+        :param prefix: a tuple of the leading ids
+        :return: (first row, last row + 1)
+        """
+        k = len(prefix)
+        (lo, hi) = (0, self.n_triples)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if key_at(mid)[:k] < prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        start = lo
+        hi = self.n_triples
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if key_at(mid)[:k] <= prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        return (start, lo)
+
+    def triple_ids(self, s=None, p=None, o=None):
+        """
+        :param s: a subject id, or None for any
+        :param p: a predicate id, or None for any
+        :param o: an object id, or None for any
+        :return: a generator of (s, p, o) ids that match
+        """
+        triple = self._triple
+        if s is not None:
+            prefix = (s,) if p is None else (s, p) if o is None else (s, p, o)
+            (start, end) = self._range(triple, prefix)
+            for i in range(start, end):
+                t = triple(i)
+                if o is None or t[2] == o:
+                    yield t
+        elif p is not None:
+            pos = self.pos
+
+            def key_at(i):
+                (ts, tp, to) = triple(pos[i])
+                return (tp, to, ts)
+
+            (start, end) = self._range(
+                key_at, (p,) if o is None else (p, o))
+            for i in range(start, end):
+                yield triple(pos[i])
+        elif o is not None:
+            osp = self.osp
+
+            def key_at(i):
+                (ts, tp, to) = triple(osp[i])
+                return (to, ts, tp)
+
+            (start, end) = self._range(key_at, (o,))
+            for i in range(start, end):
+                yield triple(osp[i])
+        else:
+            for i in range(self.n_triples):
+                yield triple(i)
+
+    def triples(self, pattern):
+        """
+        :param pattern: (s, p, o), with None for any
+        :return: a generator of the (s, p, o) terms that match
+        """
+        ids = []
+        for term in pattern:
+            if term is None:
+                ids.append(None)
+                continue
+            i = self.term_id(term)
+            if i is None:
+                return
+            ids.append(i)
+        terms = {}
+        for t in self.triple_ids(*ids):
+            yield tuple(
+                terms[i] if i in terms else terms.setdefault(i, self.term(i))
+                for i in t)
+            if len(terms) > 2**16:
+                terms.clear()
+
+
+class BinaryRDFStore(Store):
+    """
+    A read-only rdflib store over a BinaryRDFReader,
+    so that a graph (and SPARQL) can use the file as it is.
+    """
+
+    def __init__(self, file):
+        super().__init__()
+        self.reader = BinaryRDFReader(file)
+
+        return
+
+    def triples(self, triple_pattern, context=None):
+        for triple in self.reader.triples(triple_pattern):
+            yield (triple, iter([]))
+
+    def __len__(self, context=None):
+        return len(self.reader)
+
+    def namespaces(self):
+        for (prefix, namespace) in self.reader.prefixes.items():
+            yield (prefix, URIRef(namespace))
+
+    def namespace(self, prefix):
+        namespace = self.reader.prefixes.get(prefix)
+        return None if namespace is None else URIRef(namespace)
+
+    def prefix(self, namespace):
+        for (prefix, ns) in self.reader.prefixes.items():
+            if ns == str(namespace):
+                return prefix
+        return None
+
+    def close(self, commit_pending_transaction=False):
+        self.reader.close()
+
+        return
@@ -0,0 +1,323 @@
+import os
+import heapq
+import shutil
+import hashlib
+import logging
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from rdflib import BNode
+from dipper.utils.CompressedFile import CompressedFile
+from dipper.utils.NTriplesWriter import NTriplesWriter
+
+__author__ = 'nlw'
+
+logger = logging.getLogger(__name__)
+
+
+def _sort_run(lines, file):
+    """
+    Sort a run of lines, and write them out without duplicates.
+    :param lines: list of N-Triples lines
+    :param file: the run file to write
+    :return: the number of lines written
+    """
+    lines.sort()
+    count = 0
+    last = None
+    with open(file, 'w', encoding='utf-8', newline='') as f:
+        for line in lines:
+            if line != last:
+                f.write(line)
+                count += 1
+            last = line
+
+    return count
+
+
+class CanonicalNTriplesWriter(NTriplesWriter):
+    """
+    Writes N-Triples in a canonical form: the lines sorted (by their
+    code points, the same as a byte sort with LC_ALL=C), without
+    duplicates, and with blank node labels that come from what is around
+    each blank node rather than from the run that made it.  The same
+    graph so always gives the same bytes, which makes the outputs of two
+    builds something diff, rsync and comm can work with.
+
+    The lines are sorted externally, so the memory used is bounded
+    whatever the size of the graph: they are collected into runs of
+    run_size, each run is sorted and written to a temporary file
+    (in a pool of forked processes, so the sorting of one run overlaps
+    the collecting of the next), and the runs are then merged.
+    The pool is started when the writer is made, since forking is only
+    safe before there are other threads, such as a FanOutWriter's
+    that may feed this writer later.
+    Only the triples with blank nodes are kept in memory until the end,
+    to label the blank nodes with; see bnode_labels().
+
+    The lines of existing N-Triples files (such as those of shards)
+    can also be sorted and merged without duplicates, with sort_files().
+
+    Usage:
+        with CanonicalNTriplesWriter('out/mgi.canonical.nt.gz') as writer:
+            writer.write_graph(graph)
+
+    """
+
+    # how many characters of lines to sort in memory at a time
+    run_size = 2**26
+
+    def __init__(self, file=None, compress=None, workers=None, tmpdir=None):
+        """
+        :param file: the path to write to, or None for stdout
+        :param compress: True to gzip, 'gzip', 'zstd' or the CompressedFile
+            settings for one; by default, as the extension of file calls for
+        :param workers: how many runs to sort at once
+            (default: one per cpu)
+        :param tmpdir: where to write the runs (default: beside file)
+        """
+        super().__init__(file, compress)
+        if tmpdir is None and file is not None:
+            tmpdir = os.path.dirname(os.path.abspath(file))
+        self.tmpdir = tempfile.mkdtemp(prefix='runs-', dir=tmpdir)
+        self.lines = []
+        self.lines_size = 0
+        self.runs = []
+        self.bnode_triples = []
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.workers = workers
+        self.executor = None
+        if workers > 1 \
+                and 'fork' in multiprocessing.get_all_start_methods():
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('fork'))
+            # a forking pool starts all of its processes with the first job
+            self.executor.submit(int).result()
+
+        return
+
+    def _add_line(self, line):
+        self.lines.append(line)
+        self.lines_size += len(line)
+        if self.lines_size >= self.run_size:
+            self._spill()
+
+        return
+
+    def _spill(self):
+        """
+        Sort the lines collected so far into a new run.
+        """
+        if len(self.lines) == 0:
+            return
+        file = os.path.join(
+            self.tmpdir, 'run-{0:05d}.nt'.format(len(self.runs)))
+        if self.executor is None:
+            _sort_run(self.lines, file)
+            self.runs.append((file, None))
+        else:
+            # don't get further ahead of the sorting than the pool is big
+            pending = [future for (f, future) in self.runs
+                       if future is not None and not future.done()]
+            if len(pending) >= self.workers:
+                pending[0].result()
+            self.runs.append(
+                (file, self.executor.submit(_sort_run, self.lines, file)))
+        self.lines = []
+        self.lines_size = 0
+
+        return
+
+    def write_triples(self, triples):
+        """
+        Add triples; they are written, in order, when the writer is closed.
+        :param triples: iterable of (s, p, o)
+        :return: the number of triples taken
+        """
+        term = self.term
+        count = 0
+        for (s, p, o) in triples:
+            if isinstance(s, BNode) or isinstance(o, BNode):
+                self.bnode_triples.append((s, p, o))
+            else:
+                self._add_line(
+                    term(s) + ' ' + term(p) + ' ' + term(o) + ' .\n')
+            count += 1
+
+        return count
+
+    def _refine(self, nodes, occurs, colours):
+        """
+        Hash each of the blank nodes, round after round, with its own
+        hash and the sorted lines of the triples it is in, where it is
+        written as _:@ and the other blank nodes as their hashes of the
+        last round, until a round tells no more of them apart.
+        :param nodes: the blank nodes to hash
+        :param occurs: dict of BNode -> the triples it is in
+        :param colours: dict of BNode -> hash, updated in place
+        :return: None
+        """
+        term = self.term
+        distinct = len(set(colours[node] for node in nodes))
+        while True:
+            hashes = {}
+            for node in nodes:
+                lines = sorted(
+                    ' '.join(
+                        '_:@' if t == node else '_:' + colours[t]
+                        if isinstance(t, BNode) else term(t)
+                        for t in triple)
+                    for triple in occurs[node])
+                hashes[node] = hashlib.sha1('\n'.join(
+                    [colours[node]] + lines).encode('utf-8')).hexdigest()[:16]
+            colours.update(hashes)
+            count = len(set(hashes.values()))
+            if count <= distinct:
+                break
+            distinct = count
+
+        return
+
+    def bnode_labels(self, triples):
+        """
+        Label blank nodes by what is around them: each one starts with
+        the same hash, and is then hashed with its triples until that
+        tells no more of them apart (see _refine()).
+        While some are still alike, one of the smallest set of alike
+        ones is given a hash of its own, and the blank nodes linked to
+        it are hashed again, until they all differ.  The ones still
+        alike after hashing are interchangeable (in all but contrived
+        graphs), so which of them is picked doesn't change the output,
+        and the labels of blank nodes that are linked stay consistent
+        with each other.
+        :param triples: list of (s, p, o), with blank nodes
+        :return: dict of BNode -> label
+        """
+        occurs = {}
+        for triple in triples:
+            for node in {triple[0], triple[2]}:
+                if isinstance(node, BNode):
+                    occurs.setdefault(node, []).append(triple)
+
+        # the blank nodes linked to each other, which only need to be
+        # hashed again when one of them is singled out
+        linked = dict((node, [node]) for node in occurs)
+        for (s, p, o) in triples:
+            if isinstance(s, BNode) and isinstance(o, BNode) \
+                    and linked[s] is not linked[o]:
+                (small, large) = sorted((linked[s], linked[o]), key=len)
+                large.extend(small)
+                for node in small:
+                    linked[node] = large
+
+        colours = dict.fromkeys(occurs, '')
+        self._refine(list(occurs), occurs, colours)
+        alike = {}
+        for (node, colour) in colours.items():
+            alike.setdefault(colour, set()).add(node)
+        # (size, hash) of the sets of alike blank nodes, smallest first;
+        # those that have changed since they were pushed are skipped
+        tied = [(len(nodes), colour) for (colour, nodes) in alike.items()
+                if len(nodes) > 1]
+        heapq.heapify(tied)
+        while len(tied) > 0:
+            (size, colour) = heapq.heappop(tied)
+            if len(alike.get(colour, ())) != size:
+                continue
+            node = next(iter(alike[colour]))
+            colours[node] = hashlib.sha1(
+                (colour + '*').encode('utf-8')).hexdigest()[:16]
+            before = dict((n, colours[n]) for n in linked[node])
+            before[node] = colour
+            self._refine(linked[node], occurs, colours)
+            changed = set()
+            for (n, old) in before.items():
+                if colours[n] != old:
+                    alike[old].discard(n)
+                    alike.setdefault(colours[n], set()).add(n)
+                    changed.update((old, colours[n]))
+            for c in changed:
+                if len(alike[c]) > 1:
+                    heapq.heappush(tied, (len(alike[c]), c))
+                elif len(alike[c]) == 0:
+                    del alike[c]
+
+        return dict((node, 'b' + colours[node]) for node in occurs)
+
+    def _merged(self):
+        """
+        :return: a generator of the lines of all the runs,
+            in order, without duplicates
+        """
+        files = []
+        try:
+            for (file, future) in self.runs:
+                if future is not None:
+                    future.result()
+                files.append(open(file, encoding='utf-8', newline=''))
+            last = None
+            for line in heapq.merge(*files):
+                if line != last:
+                    yield line
+                last = line
+        finally:
+            for f in files:
+                f.close()
+
+    def close(self):
+        """
+        Label the blank nodes, sort what is left, merge the runs
+        into the file, and close it.
+        :return: None
+        """
+        term = self.term
+        labels = self.bnode_labels(self.bnode_triples)
+        for triple in self.bnode_triples:
+            self._add_line(' '.join(
+                '_:' + labels[t] if isinstance(t, BNode) else term(t)
+                for t in triple) + ' .\n')
+        self.bnode_triples = []
+
+        try:
+            if len(self.runs) == 0:
+                # it all fit in memory
+                lines = sorted(set(self.lines))
+                self.lines = []
+            else:
+                self._spill()
+                lines = self._merged()
+            for line in lines:
+                self._emit(line)
+                self.triple_count += 1
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
+            shutil.rmtree(self.tmpdir, ignore_errors=True)
+        logger.info("Sorted %d runs", len(self.runs))
+        super().close()
+
+        return
+
+    @classmethod
+    def sort_files(cls, files, file, **kwargs):
+        """
+        Sort the lines of N-Triples files (which may be compressed)
+        into one file, without duplicates; their blank node labels are
+        kept as they are.
+        :param files: the files to sort
+        :param file: the file to write
+        :param kwargs: for the writer
+        :return: the number of lines written
+        """
+        writer = cls(file, **kwargs)
+        for input_file in files:
+            with CompressedFile.open(input_file, 'rt', newline='') as f:
+                for line in f:
+                    if line.strip() != '' and not line.startswith('#'):
+                        writer._add_line(line.rstrip('\r\n') + '\n')
+        writer.close()
+
+        return writer.triple_count
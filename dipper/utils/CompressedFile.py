@@ -0,0 +1,151 @@
+import io
+import os
+import gzip
+import logging
+
+try:
+    import zstandard
+except ImportError:
+    # optional; only needed for .zst files
+    zstandard = None
+
+__author__ = 'nlw'
+
+logger = logging.getLogger(__name__)
+
+
+class CompressedFile(object):
+    """
+    Opens files that are compressed according to their extension:
+    gzip for .gz, zstd for .zst, and plain otherwise.
+    The writers all open their files through here, so that any of them
+    can be compressed by giving it a name with one of those extensions.
+
+    Files are compressed at the default level of their codec, unless
+    they are opened with a CompressedFile made with other settings
+    (a level and, for zstd, a number of threads) in place of the codec.
+
+    zstd needs the zstandard package, which is an optional dependency
+    (pip install dipper[zstd]).
+
+    Usage:
+        with CompressedFile.open('out/mgi.ttl.zst', 'wb') as f:
+            f.write(...)
+
+        zstd = CompressedFile('zstd', level=19, threads=4)
+        with CompressedFile.open('out/mgi.ttl.zst', 'wb', zstd) as f:
+            f.write(...)
+
+    """
+
+    # codec -> file extension
+    extensions = {'gzip': '.gz', 'zstd': '.zst'}
+    # codec -> default compression level
+    levels = {'gzip': 6, 'zstd': 3}
+    # threads for zstd to compress with; 0 for none, -1 for one per cpu
+    threads = 0
+
+    def __init__(self, codec, level=None, threads=None):
+        """
+        The settings to compress with; the defaults are left as they are.
+        :param codec: 'gzip' or 'zstd'
+        :param level: the compression level (gzip: 1-9, zstd: 1-22)
+        :param threads: for zstd, how many threads to compress with
+        """
+        if codec not in self.extensions:
+            raise ValueError("Unknown compression: {0}".format(codec))
+        if threads is not None and codec != 'zstd':
+            logger.warning("Only zstd compresses with threads")
+        self.codec = codec
+        self.level = self.levels[codec] if level is None else level
+        if threads is not None:
+            self.threads = threads
+
+        return
+
+    @staticmethod
+    def is_available(codec):
+        """
+        :param codec: 'gzip', 'zstd' or None
+        :return: True if files can be compressed with it here
+        """
+        if codec == 'zstd':
+            return zstandard is not None
+
+        return codec in (None, 'gzip')
+
+    @classmethod
+    def codec_of(cls, file):
+        """
+        :param file: a file name
+        :return: the codec its extension calls for, or None
+        """
+        for (codec, extension) in cls.extensions.items():
+            if file.endswith(extension):
+                return codec
+
+        return None
+
+    @classmethod
+    def splitext(cls, file):
+        """
+        Like os.path.splitext, except that the extension takes in
+        any compression: out/mgi.csv.gz is (out/mgi, .csv.gz).
+        :param file: a file name
+        :return: (root, ext)
+        """
+        codec = cls.codec_of(file)
+        if codec is None:
+            return os.path.splitext(file)
+        extension = cls.extensions[codec]
+        (root, ext) = os.path.splitext(file[:-len(extension)])
+
+        return (root, ext + extension)
+
+    @classmethod
+    def open(cls, file, mode='rb', codec=None, encoding='utf-8',
+             newline=None):
+        """
+        :param file: the path to open
+        :param mode: 'rb', 'wb', 'rt' or 'wt'
+        :param codec: 'gzip', 'zstd', a CompressedFile to compress with
+            its settings, or by default, by the extension
+        :param encoding: for text modes
+        :param newline: for text modes, as for open()
+        :return: a file object
+        """
+        level = None
+        threads = cls.threads
+        if isinstance(codec, CompressedFile):
+            (codec, level, threads) = (codec.codec, codec.level, codec.threads)
+        if codec is None:
+            codec = cls.codec_of(file)
+        if level is None:
+            level = cls.levels.get(codec)
+        writing = mode[0] in 'wa'
+        if codec is None:
+            if 'b' in mode:
+                return open(file, mode)
+            return open(file, mode, encoding=encoding, newline=newline)
+        if codec == 'gzip':
+            # with no timestamp, so that the same output gives the same bytes
+            f = gzip.GzipFile(
+                file, mode[0] + 'b', compresslevel=level, mtime=0)
+        elif codec == 'zstd':
+            if zstandard is None:
+                raise ImportError("zstandard is needed for zstd files")
+            raw = open(file, mode[0] + 'b')
+            if writing:
+                f = zstandard.ZstdCompressor(
+                    level=level, threads=threads).stream_writer(
+                        raw, closefd=True)
+            else:
+                f = io.BufferedReader(
+                    zstandard.ZstdDecompressor().stream_reader(
+                        raw, closefd=True))
+        else:
+            raise ValueError("Unknown compression: {0}".format(codec))
+        if 't' in mode:
+            return io.TextIOWrapper(f, encoding=encoding, newline=newline)
+
+        return f
@@ -1,4 +1,5 @@
 
+import re
 import logging
 
 __author__ = 'condit@sdsc.edu'
@@ -32,6 +33,22 @@ class CurieUtil(object):
             return '%s:%s' % (prefix, uri[len(key):len(uri)])
         return None
 
+    # where a namespace may end, looking from the end of a uri
+    namespace_ends = re.compile(r'[/#_:=]')
+
+    def compact(self, uri):
+        '''
+        Get the CURIE of a URI by the longest namespace that fits,
+        or the URI itself if none do, with a dictionary lookup
+        for each place that a namespace could end, rather than a scan
+        of the whole map.
+        '''
+        for m in reversed(list(self.namespace_ends.finditer(uri))):
+            prefix = self.uri_map.get(uri[:m.end()])
+            if prefix is not None:
+                return '%s:%s' % (prefix, uri[m.end():])
+        return uri
+
     def get_curie_prefix(self, uri):
         ''' Return the CURIE's prefix:'''
         for key, value in self.uri_map.items():
@@ -0,0 +1,132 @@
+import queue
+import logging
+import threading
+from dipper.utils.TurtleWriter import TurtleWriter
+
+__author__ = 'nlw'
+
+logger = logging.getLogger(__name__)
+
+
+class FanOutWriter(object):
+    """
+    Hands one stream of triples to several writers at once
+    (a TurtleWriter, an NTriplesWriter, a Neo4jCSVWriter...),
+    so that a graph is written in several formats from one traversal.
+
+    Each writer runs in its own thread, taking the triples in chunks
+    from a short queue, so they all work through the stream together,
+    and their compression and file writes overlap;
+    a slow writer only holds the others up by as much as its queue.
+    Each writer gets the whole stream in a single write_triples() call,
+    so it sees the subjects grouped as they were given.
+
+    Usage:
+        with FanOutWriter([TurtleWriter(...), NTriplesWriter(...)]) as w:
+            w.write_graph(graph)
+
+    """
+
+    # how many triples to pass at a time
+    chunk_size = 10000
+    # how many chunks a writer may fall behind by
+    queue_size = 8
+
+    def __init__(self, writers):
+        """
+        :param writers: objects with write_triples(triples),
+            and, optionally, close()
+        """
+        self.writers = list(writers)
+        self.queues = [queue.Queue(self.queue_size) for w in self.writers]
+        self.errors = [None] * len(self.writers)
+        self.threads = [
+            threading.Thread(target=self._run, args=(n,), daemon=True)
+            for n in range(len(self.writers))]
+        for thread in self.threads:
+            thread.start()
+        self.closed = False
+
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+        return False
+
+    def _run(self, n):
+        chunks = iter(self.queues[n].get, None)
+        try:
+            self.writers[n].write_triples(
+                triple for chunk in chunks for triple in chunk)
+        except Exception as e:
+            logger.error(
+                "Writer %s failed: %s", type(self.writers[n]).__name__, e)
+            self.errors[n] = e
+            # keep taking the chunks, so that the others aren't held up
+            for chunk in chunks:
+                pass
+
+        return
+
+    def _put(self, chunk):
+        for q in self.queues:
+            q.put(chunk)
+
+        return
+
+    def write_triples(self, triples):
+        """
+        Pass the triples to all of the writers; this can only be called
+        once, since each writer takes one stream.
+        :param triples: iterable of (s, p, o)
+        :return: None
+        """
+        chunk = []
+        for triple in triples:
+            chunk.append(triple)
+            if len(chunk) >= self.chunk_size:
+                self._put(chunk)
+                chunk = []
+        if len(chunk) > 0:
+            self._put(chunk)
+        self._put(None)
+        for thread in self.threads:
+            thread.join()
+
+        return
+
+    def write_graph(self, graph):
+        """
+        :param graph: an rdflib graph
+        :return: None
+        """
+        self.write_triples(TurtleWriter.grouped_triples(graph))
+
+        return
+
+    def close(self):
+        """
+        Close the writers, and raise the first error that any of them had.
+        :return: None
+        """
+        if self.closed:
+            return
+        self.closed = True
+        if any(thread.is_alive() for thread in self.threads):
+            # nothing was written; let the writers finish
+            self._put(None)
+            for thread in self.threads:
+                thread.join()
+        for writer in self.writers:
+            close = getattr(writer, 'close', None)
+            if close is not None:
+                close()
+        for error in self.errors:
+            if error is not None:
+                raise error
+
+        return
@@ -0,0 +1,287 @@
+import heapq
+import pickle
+import struct
+import logging
+import tempfile
+from array import array
+from collections.abc import Mapping
+from multiprocessing import shared_memory, resource_tracker
+
+__author__ = 'nlw'
+
+logger = logging.getLogger(__name__)
+
+
+class FrozenLookup(Mapping):
+    """
+    A read-only lookup table of string keys to string values
+    (or to tuples of strings), laid out in a single block of
+    multiprocessing.shared_memory, so that worker processes can
+    read it without a copy of their own.
+
+    A large dict inherited by forked workers is copied page by page
+    as soon as they touch it (reference counts are written on every read),
+    and one passed to spawned workers is pickled to each of them.
+    Instead, build the table once in the parent; forked workers use it
+    as is, and it pickles as just the name of its block, which a spawned
+    worker attaches to.
+
+    The block holds the number of entries, the key and value offsets,
+    and the utf-8 heaps of the keys (in sorted order) and values.
+    Lookups are a binary search over the keys.
+    The values are either all strings or all sequences of strings;
+    each item of a sequence is stored with a separator after it,
+    so that () and ('',) are told apart.
+
+    It can be built from a mapping, or from a stream of (key, value)
+    pairs (such as the rows of a file) that is sorted on disk in runs,
+    so that no more than run_size of them are held as python objects.
+
+    Usage:
+        table = FrozenLookup.build(id_map)
+        try:
+            table.get('P12345')   # in any worker
+        finally:
+            table.unlink()
+
+    """
+
+    # entry count, key heap size, value heap size, multivalued flag
+    header = struct.Struct('<QQQQ')
+    # ends each item of a tuple value in the value heap
+    separator = '\x1f'
+    # how many pairs to sort in memory at a time, when building
+    run_size = 2**20
+
+    def __init__(self, shm, owner=False):
+        self.shm = shm
+        self.owner = owner
+        buf = shm.buf
+        (self.size, key_heap_size, value_heap_size, multivalued) = \
+            self.header.unpack_from(buf, 0)
+        self.multivalued = bool(multivalued)
+
+        offsets_size = (self.size + 1) * 8
+        start = self.header.size
+        self.key_offsets = buf[start:start + offsets_size].cast('Q')
+        start += offsets_size
+        self.value_offsets = buf[start:start + offsets_size].cast('Q')
+        start += offsets_size
+        self.keys = buf[start:start + key_heap_size]
+        start += key_heap_size
+        self.values = buf[start:start + value_heap_size]
+
+        return
+
+    @classmethod
+    def _encode(cls, key, value, multivalued):
+        """
+        :return: the key and value as they go in the heaps
+        :raises ValueError: if the value isn't of the table's type
+        """
+        if isinstance(value, str) == multivalued:
+            raise ValueError(
+                "The values must be all strings or all sequences "
+                "of strings, but {0} has {1!r}".format(key, value))
+        if multivalued:
+            if any(cls.separator in x for x in value):
+                raise ValueError(
+                    "{0} has a value containing {1!r}".format(
+                        key, cls.separator))
+            value = ''.join(x + cls.separator for x in value)
+
+        return (key.encode('utf-8'), value.encode('utf-8'))
+
+    @classmethod
+    def _sorted_runs(cls, items, runs):
+        """
+        Sort (key, value) pairs, writing them out in sorted runs
+        once there are more than run_size of them.
+        :param items: iterable of (key, value)
+        :param runs: list to add the run files to
+        :return: the values' type (multivalued or not), and an iterator
+            of (key bytes, sequence number, value bytes), in order
+        """
+        multivalued = None
+        run = []
+        for (n, (k, v)) in enumerate(items):
+            if multivalued is None:
+                multivalued = not isinstance(v, str)
+            (k, v) = cls._encode(k, v, multivalued)
+            run.append((k, n, v))
+            if len(run) >= cls.run_size:
+                run.sort()
+                f = tempfile.TemporaryFile()
+                for entry in run:
+                    pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+                f.seek(0)
+                runs.append(f)
+                run = []
+        run.sort()
+        if len(runs) == 0:
+            return (bool(multivalued), iter(run))
+
+        def read(f):
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+
+        return (
+            bool(multivalued),
+            heapq.merge(iter(run), *[read(f) for f in runs]))
+
+    @classmethod
+    def build(cls, items, name=None):
+        """
+        Copy a mapping, or a stream of pairs, into a new shared memory
+        block.  Of pairs with the same key, the last one is kept.
+        :param items: dict of str -> str, or of str -> sequence of str,
+            or an iterable of such (key, value) pairs
+        :param name: optional name for the block
+        :raises ValueError: if the values are of mixed types
+        :return: a FrozenLookup that owns the block
+        """
+        if isinstance(items, Mapping):
+            items = items.items()
+
+        key_offsets = array('Q', [0])
+        value_offsets = array('Q', [0])
+        key_heap = bytearray()
+        value_heap = bytearray()
+        runs = []
+        try:
+            (multivalued, entries) = cls._sorted_runs(items, runs)
+            last = None
+            for (k, n, v) in entries:
+                if k == last:
+                    # a later pair for the same key
+                    value_offsets.pop()
+                    del value_heap[value_offsets[-1]:]
+                    key_offsets.pop()
+                else:
+                    key_heap += k
+                value_heap += v
+                key_offsets.append(len(key_heap))
+                value_offsets.append(len(value_heap))
+                last = k
+        finally:
+            for f in runs:
+                f.close()
+        count = len(key_offsets) - 1
+
+        size = cls.header.size + 2 * len(key_offsets) * 8 \
+            + len(key_heap) + len(value_heap)
+        shm = shared_memory.SharedMemory(
+            name=name, create=True, size=size)
+        buf = shm.buf
+        cls.header.pack_into(
+            buf, 0, count, len(key_heap), len(value_heap),
+            int(multivalued))
+        start = cls.header.size
+        for chunk in (key_offsets.tobytes(), value_offsets.tobytes(),
+                      key_heap, value_heap):
+            buf[start:start + len(chunk)] = chunk
+            start += len(chunk)
+
+        logger.info(
+            "Published %d entries (%d bytes) to shared memory %s",
+            count, size, shm.name)
+
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Open a table built by another process.
+        :param name: the name of the table's block
+        :return: a FrozenLookup
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        # the block belongs to the process that built it;
+        # keep the resource tracker from removing it when we exit
+        resource_tracker.unregister(shm._name, 'shared_memory')
+
+        return cls(shm)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def __reduce__(self):
+        return FrozenLookup.attach, (self.name,)
+
+    def _find(self, key):
+        """
+        :param key:
+        :return: the index of key, or -1
+        """
+        k = key.encode('utf-8')
+        (lo, hi) = (0, self.size)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = self._key_bytes(mid)
+            if current < k:
+                lo = mid + 1
+            elif current > k:
+                hi = mid
+            else:
+                return mid
+
+        return -1
+
+    def _key_bytes(self, i):
+        return bytes(self.keys[self.key_offsets[i]:self.key_offsets[i + 1]])
+
+    def _value(self, i):
+        value = bytes(
+            self.values[self.value_offsets[i]:self.value_offsets[i + 1]]
+        ).decode('utf-8')
+        if self.multivalued:
+            # the item after the last separator is always empty
+            return tuple(value.split(self.separator)[:-1])
+
+        return value
+
+    def __getitem__(self, key):
+        if not isinstance(key, str):
+            raise KeyError(key)
+        i = self._find(key)
+        if i < 0:
+            raise KeyError(key)
+
+        return self._value(i)
+
+    def __contains__(self, key):
+        return isinstance(key, str) and self._find(key) >= 0
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for i in range(self.size):
+            yield self._key_bytes(i).decode('utf-8')
+
+    def close(self):
+        """
+        Release this process's view of the table.
+        :return: None
+        """
+        for view in (self.key_offsets, self.value_offsets,
+                     self.keys, self.values):
+            view.release()
+        self.shm.close()
+
+        return
+
+    def unlink(self):
+        """
+        Close the table and, if this process built it, free the block.
+        :return: None
+        """
+        self.close()
+        if self.owner:
+            self.shm.unlink()
+
+        return
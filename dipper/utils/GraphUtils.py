@@ -1,14 +1,110 @@
 import re
+import os
+import json
+import zlib
+import shutil
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from rdflib import Literal, URIRef, BNode, Namespace
 from rdflib.namespace import DC, RDF, RDFS, OWL, XSD, FOAF
 
 from dipper.utils.CurieUtil import CurieUtil
+from dipper.utils.CompressedFile import CompressedFile
+from dipper.utils.TurtleWriter import TurtleWriter
+from dipper.utils.NTriplesWriter import NTriplesWriter
+from dipper.utils.CanonicalNTriplesWriter import CanonicalNTriplesWriter
+from dipper.utils.JSONLDWriter import JSONLDWriter
+from dipper.utils.FanOutWriter import FanOutWriter
+from dipper.utils.Neo4jCSVWriter import Neo4jCSVWriter
+from dipper.utils.BinaryRDF import BinaryRDFWriter
+from dipper.utils.ParquetWriter import ParquetWriter
 
 __author__ = 'nlw'
 
 logger = logging.getLogger(__name__)
 
+# the triples of each shard, the prefixes and the shard files
+# of the write_shards() in progress, inherited by its forked worker processes
+_shard_work = None
+
+
+def _partition(graph, shards):
+    """
+    Split the triples of a graph into shards, by a stable hash of their
+    subject.  Blank node labels only mean the same node within one file,
+    so each set of blank nodes that are linked to each other goes,
+    with every triple that mentions any of them, to the shard of
+    the (least) IRI subject that links to it; a set that no IRI links
+    to goes in the first shard.
+    :param graph: an rdflib graph
+    :param shards: the number of shards
+    :return: list of the lists of triples of each shard,
+        grouped by subject
+    """
+    def shard_of(iri):
+        return zlib.crc32(iri.encode('utf-8')) % shards
+
+    # union-find of the blank nodes that are linked to each other
+    parent = {}
+
+    def find(node):
+        root = node
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while node != root:
+            following = parent[node]
+            parent[node] = root
+            node = following
+        return root
+
+    anchors = {}
+    for (s, p, o) in graph.triples((None, None, None)):
+        if isinstance(o, BNode):
+            if isinstance(s, BNode):
+                (a, b) = (find(s), find(o))
+                if a != b:
+                    parent[a] = b
+            else:
+                anchors.setdefault(o, []).append(s)
+    # the least IRI linking to any node of a set anchors all of it
+    anchor_of_set = {}
+    for (node, subjects) in anchors.items():
+        root = find(node)
+        anchor = min(subjects)
+        if root not in anchor_of_set or anchor < anchor_of_set[root]:
+            anchor_of_set[root] = anchor
+
+    def bnode_shard(node):
+        anchor = anchor_of_set.get(find(node))
+        return 0 if anchor is None else shard_of(anchor)
+
+    parts = [[] for shard in range(shards)]
+    for (s, p, o) in TurtleWriter.grouped_triples(graph):
+        if isinstance(s, BNode):
+            shard = bnode_shard(s)
+        elif isinstance(o, BNode):
+            shard = bnode_shard(o)
+        else:
+            shard = shard_of(s)
+        parts[shard].append((s, p, o))
+
+    return parts
+
+
+def _write_shard(shard):
+    """
+    Write the triples of one shard of a write_shards().
+    :param shard: the shard number, from 0
+    :return: the number of triples written
+    """
+    (parts, prefixes, files, compress) = _shard_work
+    with TurtleWriter(
+            files[shard], compress=compress, prefixes=prefixes) as writer:
+        count = writer.write_triples(parts[shard])
+
+    return count
+
 
 class GraphUtils:
 
@@ -91,12 +187,30 @@ class GraphUtils:
     properties.update(object_properties)
     properties.update(datatype_properties)
 
-    def __init__(self, curie_map, materialize_bnodes=False):
+    def __init__(self, curie_map, materialize_bnodes=False,
+                 compression=None):
         self.curie_map = curie_map
         self.cu = CurieUtil(curie_map)         # TEC: what is cu really?
         self.nobnodes = materialize_bnodes
+        # the CompressedFile settings to compress with, for the files
+        # whose names call for its codec, and for parquet, inside the file;
+        # the others are compressed as their file names' extensions say
+        self.compression = compression
         return
 
+    def compression_for(self, file):
+        """
+        :param file: a file name
+        :return: the compression settings to open it with, if its
+            extension calls for their codec; otherwise None, to go by
+            the extension alone
+        """
+        if file is not None and self.compression is not None \
+                and CompressedFile.codec_of(file) == self.compression.codec:
+            return self.compression
+
+        return None
+
     def addClassToGraph(self, g, id, label, type=None, description=None):
         """
         Any node added to the graph will get at least 3 triples:
@@ -342,14 +456,28 @@ class GraphUtils:
          this will write raw triples in rdfxml, unless specified.
          to write turtle, specify format='turtle'
          an optional file can be supplied instead of stdout
+         turtle, nt, json-ld and canonical (sorted n-triples)
+         are streamed out with our own writers;
+         only the prefixes that the graph uses are declared.
+         a file ending in .gz or .zst is compressed
         :return: None
 
         """
         filewriter = None
         if fileformat is None:
             fileformat = 'rdfxml'
+        prefixes = self.used_prefixes(graph)
+        if fileformat in ('turtle', 'nt', 'json-ld', 'canonical'):
+            if file is not None:
+                logger.info("Writing triples in %s to %s", fileformat, file)
+            with self.stream_writer(fileformat, file, prefixes) as writer:
+                writer.write_graph(graph)
+            return
+        for (prefix, namespace) in prefixes.items():
+            graph.bind(prefix, Namespace(namespace))
         if file is not None:
-            filewriter = open(file, 'wb')
+            filewriter = CompressedFile.open(
+                file, 'wb', self.compression_for(file))
 
             logger.info("Writing triples in %s to %s", fileformat, file)
             graph.serialize(filewriter, format=fileformat)
@@ -358,6 +486,251 @@ class GraphUtils:
             print(graph.serialize(format=fileformat).decode())
         return
 
+    # the formats that can be written from a stream of triples;
+    # see write_formats()
+    streamed_formats = [
+        'turtle', 'nt', 'json-ld', 'canonical', 'neo4j', 'parquet', 'rdfb']
+
+    def stream_writer(self, fileformat, file, prefixes=None):
+        """
+        Make the writer for one of the streamed_formats.
+        For neo4j and parquet, the file name is the root of the files
+        they write; see write_neo4j_csv() and write_parquet().
+        :param fileformat:
+        :param file: the path to write to (None for stdout,
+            for turtle, nt, json-ld and canonical)
+        :param prefixes: dict of prefix -> namespace to declare,
+            for turtle and json-ld
+        :return: the writer
+        """
+        compress = self.compression_for(file)
+        if fileformat == 'turtle':
+            return TurtleWriter(file, compress=compress, prefixes=prefixes)
+        if fileformat == 'nt':
+            return NTriplesWriter(file, compress)
+        if fileformat == 'json-ld':
+            return JSONLDWriter(file, compress=compress, prefixes=prefixes)
+        if fileformat == 'canonical':
+            return CanonicalNTriplesWriter(file, compress)
+        if file is None:
+            raise ValueError("Can't write {0} to stdout".format(fileformat))
+        (root, ext) = CompressedFile.splitext(file)
+        if fileformat == 'neo4j':
+            return Neo4jCSVWriter(
+                root + '_nodes' + ext, root + '_relationships' + ext,
+                self.curie_map, compress)
+        if fileformat == 'parquet':
+            return ParquetWriter(
+                file, self.curie_map, root + '_associations' + ext,
+                self.compression)
+        if fileformat == 'rdfb':
+            return BinaryRDFWriter(file, prefixes)
+
+        raise ValueError("Can't stream {0}".format(fileformat))
+
+    def write_formats(self, graph, files):
+        """
+        Write a graph in several formats, from one traversal of it:
+        the streamed_formats all take their triples from the same stream,
+        together; any others are then written by rdflib, one by one.
+        :param graph:
+        :param files: dict of format -> file
+        :return: None
+        """
+        streamed = [f for f in files if f in self.streamed_formats]
+        prefixes = self.used_prefixes(graph)
+        writers = []
+        try:
+            for fileformat in streamed:
+                logger.info(
+                    "Writing triples in %s to %s",
+                    fileformat, files[fileformat])
+                writers.append(self.stream_writer(
+                    fileformat, files[fileformat], prefixes))
+        except Exception:
+            for writer in writers:
+                if hasattr(writer, 'close'):
+                    writer.close()
+            raise
+        with FanOutWriter(writers) as writer:
+            writer.write_graph(graph)
+        for fileformat in files:
+            if fileformat == 'raw':
+                self.write_raw_triples(graph, file=files[fileformat])
+            elif fileformat not in streamed:
+                self.write(graph, fileformat, files[fileformat])
+
+        return
+
+    def used_prefixes(self, graph):
+        """
+        Work out which prefixes to write a graph with: those of the
+        curie map (or whatever prefixes this was made with), and of the
+        graph's own bindings, that any of its terms are in.
+        :param graph:
+        :return: dict of prefix -> namespace
+        """
+        table = dict(
+            (prefix, str(namespace))
+            for (prefix, namespace) in graph.namespaces())
+        if self.curie_map is not None:
+            table.update(self.curie_map)
+        prefixes = TurtleWriter.used_prefixes(
+            graph.triples((None, None, None)), prefixes=table)
+        logger.info(
+            "Using %d of %d prefixes", len(prefixes), len(table))
+
+        return prefixes
+
+    def write_shards(self, graph, file, shards, workers=None,
+                     concatenate=False):
+        """
+        Write a graph in turtle as a number of compressed shards,
+        split by subject, so that they can be written (and loaded)
+        in parallel: for out/mgi.ttl, they are out/mgi.part-0001.ttl.gz
+        and so on, listed with their triple counts in out/mgi.manifest.json;
+        for out/mgi.ttl.zst, they are out/mgi.part-0001.ttl.zst.
+        Each shard is a complete turtle file with all the prefixes.
+        The graph is split into the shards once (see _partition), and then
+        they are written in a pool of forked processes.
+        :param graph: the graph to write
+        :param file: the name of the single file
+        :param shards: the number of shards
+        :param workers: how many to write at once (default: one per cpu)
+        :param concatenate: if True, join the shards into the single file
+            when they are written, and remove them
+        :return: None
+
+        """
+        global _shard_work
+
+        (root, ext) = CompressedFile.splitext(file)
+        if CompressedFile.codec_of(file) is None:
+            ext += CompressedFile.extensions['gzip']
+        files = [
+            '{0}.part-{1:04d}{2}'.format(root, shard + 1, ext)
+            for shard in range(shards)]
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = min(workers, shards)
+        if workers > 1 \
+                and 'fork' not in multiprocessing.get_all_start_methods():
+            logger.warning(
+                "Can't fork worker processes here; "
+                "writing the shards one at a time")
+            workers = 1
+
+        logger.info(
+            "Writing triples in %d shards to %s (%d at once)",
+            shards, root + '.part-*', workers)
+        _shard_work = (
+            _partition(graph, shards), self.used_prefixes(graph), files,
+            self.compression_for(files[0]))
+        try:
+            if workers <= 1:
+                counts = [_write_shard(shard) for shard in range(shards)]
+            else:
+                with ProcessPoolExecutor(
+                        max_workers=workers,
+                        mp_context=multiprocessing.get_context('fork')) \
+                        as executor:
+                    counts = list(executor.map(_write_shard, range(shards)))
+        finally:
+            _shard_work = None
+
+        if concatenate:
+            self.concatenate_shards(files, file, self.compression_for(file))
+            for shard_file in files:
+                os.remove(shard_file)
+            return
+
+        manifest = {
+            'format': 'turtle',
+            'triples': sum(counts),
+            'shards': [
+                {'file': os.path.basename(shard_file), 'triples': count}
+                for (shard_file, count) in zip(files, counts)]}
+        with open(root + '.manifest.json', 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        return
+
+    @staticmethod
+    def concatenate_shards(files, file, compress=None):
+        """
+        Join compressed turtle shards into one turtle file (itself
+        compressed if its name says so), keeping only the first one's
+        prefixes (which they all share).
+        :param files: the shard files, in order
+        :param file: the file to write
+        :param compress: the CompressedFile settings to write it with
+            (default: by its extension)
+        :return: None
+        """
+        logger.info("Concatenating %d shards into %s", len(files), file)
+        with CompressedFile.open(file, 'wb', compress) as out:
+            for (n, shard_file) in enumerate(files):
+                with CompressedFile.open(shard_file, 'rb') as f:
+                    if n > 0:
+                        # skip the prefixes, up to the first blank line
+                        for line in f:
+                            if line.strip() == b'':
+                                break
+                    shutil.copyfileobj(f, out, 2**20)
+
+        return
+
+    def write_neo4j_csv(self, graph, file):
+        """
+        Write a graph as csv files for neo4j-admin import:
+        for out/mgi.csv, they are out/mgi_nodes.csv and
+        out/mgi_relationships.csv, with CURIEs from the curie map as ids.
+        :param graph:
+        :param file:
+        :return: None
+        """
+        (root, ext) = CompressedFile.splitext(file)
+        logger.info("Writing nodes and relationships to %s_*%s", root, ext)
+        with self.stream_writer('neo4j', file) as writer:
+            writer.write_graph(graph)
+
+        return
+
+    def write_binary(self, graph, file):
+        """
+        Write a graph in the indexed binary layout of dipper.utils.BinaryRDF,
+        which can be queried without parsing it.
+        :param graph:
+        :param file:
+        :return: None
+        """
+        logger.info("Writing triples in binary to %s", file)
+        BinaryRDFWriter(file, self.used_prefixes(graph)).write_graph(graph)
+
+        return
+
+    def write_parquet(self, graph, file, associations=True):
+        """
+        Write a graph's triples as parquet, and (for out/mgi.parquet)
+        its associations as out/mgi_associations.parquet;
+        this needs pyarrow.
+        :param graph:
+        :param file:
+        :param associations: False to leave out the associations
+        :return: None
+        """
+        associations_file = None
+        if associations:
+            (root, ext) = os.path.splitext(file)
+            associations_file = root + '_associations' + ext
+        logger.info("Writing triples in parquet to %s", file)
+        with ParquetWriter(
+                file, self.curie_map, associations_file,
+                self.compression) as writer:
+            writer.write_graph(graph)
+
+        return
+
     def write_raw_triples(self, graph, file=None):
         """
          a basic graph writer (to stdout) for any of the sources.
@@ -368,7 +741,8 @@ class GraphUtils:
         """
         filewriter = None
         if file is not None:
-            filewriter = open(file, 'w')
+            filewriter = CompressedFile.open(
+                file, 'wt', self.compression_for(file))
             logger.info("Writing raw triples to %s", file)
 
         for (s, p, o) in graph:
@@ -0,0 +1,165 @@
+import logging
+
+__author__ = 'nlw'
+
+logger = logging.getLogger(__name__)
+
+
+class IdFilter(object):
+    """
+    A compiled set of identifiers, such as the test ids or the taxa
+    to keep, for skipping the rows of a source that we don't want
+    with as little work per row as possible.
+
+    Numeric ids (ints, or strings of digits like the local part of
+    'NCBIGene:1234') are kept as integers: in a bitmap, when they are
+    dense enough for one to be small, and otherwise in a frozenset.
+    Anything else is matched as an exact string.
+    A number given as a string matches the same number given as an int,
+    so '9606', b'9606' and 9606 are all in IdFilter([9606]).
+    With strip, that prefix is removed from each value before matching,
+    as in IdFilter(tax_ids, strip='taxid:').
+
+    A filter built from None accepts everything, so that a source can
+    always filter its rows, and the unfiltered case costs one test.
+
+    Rows are checked with accept(row), on the given columns
+    (any or all of them, by match), or as raw lines from a file with
+    accept_line(line), which for the first column only finds the end
+    of its field, without decoding or splitting the line, and looks
+    that up as accept() does.
+
+    Usage:
+        taxa = IdFilter(self.tax_ids, columns=[0])
+        for line in f:
+            if not taxa.accept_line(line):
+                continue
+            ...
+
+    """
+
+    # use a bitmap when it would take no more than this many bytes per id
+    max_bitmap_bytes_per_id = 64
+
+    def __init__(self, ids=None, columns=(0,), match='all', strip=None,
+                 sep='\t'):
+        """
+        :param ids: iterable of ids, or None to accept everything
+        :param columns: the row columns that accept(row) checks
+        :param match: 'all' if every one of the columns must be
+            in the set, 'any' if one is enough
+        :param strip: a prefix to remove from the values before matching
+        :param sep: the column separator of lines given to accept_line
+        """
+        if match not in ('all', 'any'):
+            raise ValueError("match must be 'all' or 'any', not "+str(match))
+        self.columns = tuple(columns)
+        self.match = match
+        self.strip = strip
+        self.sep = sep
+        self.line_sep = sep.encode('utf-8')
+        self.accepts_all = ids is None
+
+        numbers = set()
+        strings = set()
+        if ids is not None:
+            for i in ids:
+                i = self._stripped(i)
+                n = self._number(i)
+                if n is not None:
+                    numbers.add(n)
+                elif isinstance(i, bytes):
+                    strings.add(i.decode('utf-8'))
+                else:
+                    strings.add(i)
+        self.numbers = frozenset(numbers)
+        self.strings = frozenset(strings)
+
+        self.bitmap = None
+        if len(numbers) > 0:
+            size = (max(numbers) >> 3) + 1
+            if size <= len(numbers) * self.max_bitmap_bytes_per_id:
+                self.bitmap = bytearray(size)
+                for n in numbers:
+                    self.bitmap[n >> 3] |= 1 << (n & 7)
+
+        return
+
+    def _stripped(self, value):
+        strip = self.strip
+        if strip is not None:
+            if isinstance(value, bytes):
+                strip = strip.encode('utf-8')
+            if isinstance(value, (str, bytes)) and value.startswith(strip):
+                return value[len(strip):]
+
+        return value
+
+    @staticmethod
+    def _number(value):
+        """
+        :return: the value as a non-negative int, or None if it isn't one
+        """
+        if type(value) is int:
+            if value >= 0:
+                return value
+        elif isinstance(value, (str, bytes)) and value.isascii() \
+                and value.isdigit():
+            return int(value)
+
+        return None
+
+    def __contains__(self, value):
+        if self.accepts_all:
+            return True
+        value = self._stripped(value)
+        n = self._number(value)
+        if n is None:
+            if isinstance(value, bytes):
+                value = value.decode('utf-8')
+            return value in self.strings
+        if self.bitmap is not None:
+            return (n >> 3) < len(self.bitmap) and \
+                self.bitmap[n >> 3] >> (n & 7) & 1 == 1
+
+        return n in self.numbers
+
+    def __len__(self):
+        return len(self.numbers) + len(self.strings)
+
+    def accept(self, row):
+        """
+        Check a row that has already been split into columns.
+        :param row: a list or tuple of the fields
+        :return: True if the row passes the filter
+        """
+        if self.accepts_all:
+            return True
+        if self.match == 'any':
+            return any(row[c] in self for c in self.columns)
+
+        return all(row[c] in self for c in self.columns)
+
+    def accept_line(self, line):
+        """
+        Check a raw line of a delimited file, before it is decoded.
+        Comment and header lines are rejected by any restrictive filter,
+        since their columns aren't ids.
+        :param line: bytes, or str
+        :return: True if the line passes the filter
+        """
+        if self.accepts_all:
+            return True
+        if isinstance(line, str):
+            line = line.encode('utf-8')
+        if self.columns == (0,):
+            end = line.find(self.line_sep)
+            if end < 0:
+                return line.rstrip(b'\r\n') in self
+            return line[:end] in self
+        last = max(self.columns)
+        row = line.rstrip(b'\r\n').split(self.line_sep, last + 1)
+        if len(row) <= last:
+            return False
+
+        return self.accept(row)
@@ -0,0 +1,254 @@
+import heapq
+import logging
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableMapping
+from dipper import config
+
+__author__ = 'nlw'
+
+logger = logging.getLogger(__name__)
+
+
+class IdTable(MutableMapping):
+    """
+    A compact mapping of integer database keys to string identifiers,
+    for the internal-key joins of the database sources
+    (like MGI's idhash, where '12345' -> 'MGI:97490').
+
+    A dict of such pairs holds two python strings per entry;
+    here the keys are native integers in a sorted array('q'),
+    with a parallel array of offsets into a single utf-8 heap of the ids.
+    New entries are collected in a small dict, and merged into the
+    arrays once it grows past a fraction of them, so that building
+    the table costs O(n log n) overall.
+
+    Keys may be given as ints or as the strings of them,
+    as they come out of the table dumps; both find the same entry,
+    and iteration yields each key as it was last stored.
+    Only the canonical string of an int ('12', not '012' or ' 12')
+    is taken for one; any other key is simply kept in an ordinary dict
+    on the side.
+    Replaced and deleted ids are left in the heap until they add up
+    to half of it, when it is compacted.
+
+    A lookup here bisects the arrays, which takes about twenty times
+    as long as a dict's, so the sources' joins only use IdTables where
+    memory is the limit; see join_table().
+
+    """
+
+    # merge the new entries once there are at least this many,
+    # and at least half as many as in the arrays
+    min_pending = 4096
+
+    @classmethod
+    def join_table(cls):
+        """
+        Make a table for a per-row join of database keys: a plain dict,
+        for speed, unless conf.json asks for compact tables, like:
+          id_tables : {'compact' : true}
+        :return: a dict, or an IdTable
+        """
+        if config.get_config().get('id_tables', {}).get('compact'):
+            return cls()
+
+        return {}
+
+    def __init__(self, mapping=None):
+        self.int_keys = array('q')
+        self.refs = array('q')
+        # 1 where the key was stored as a string
+        self.str_keys = bytearray()
+        # start and end of each id in the heap
+        self.starts = array('q')
+        self.ends = array('q')
+        self.heap = bytearray()
+        # bytes of the heap that no entry refers to any more
+        self.garbage = 0
+        # entries that are not yet merged into the arrays,
+        # as int key -> (id, stored as a string)
+        self.pending = {}
+        # keys that aren't integers
+        self.other = {}
+        if mapping is not None:
+            self.update(mapping)
+
+        return
+
+    @staticmethod
+    def _int_key(key):
+        """
+        :return: the key as an int, or None if it isn't one
+        """
+        k = None
+        if type(key) is int:
+            k = key
+        elif type(key) is str:
+            if key.isdigit() and key.isascii():
+                if key[0] == '0' and len(key) > 1:
+                    return None
+                k = int(key)
+            else:
+                # negative, or not an int at all
+                try:
+                    k = int(key)
+                except ValueError:
+                    return None
+                if str(k) != key:
+                    return None
+        # it must fit in the array
+        if k is not None and not -0x8000000000000000 <= k \
+                <= 0x7fffffffffffffff:
+            return None
+
+        return k
+
+    def _find(self, k):
+        i = bisect_left(self.int_keys, k)
+        if i < len(self.int_keys) and self.int_keys[i] == k:
+            return i
+
+        return -1
+
+    def _add_value(self, value):
+        self.starts.append(len(self.heap))
+        self.heap += value.encode('utf-8')
+        self.ends.append(len(self.heap))
+
+        return len(self.starts) - 1
+
+    def _merge(self):
+        """
+        Fold the pending entries into the sorted arrays.
+        """
+        fresh = []
+        for k in sorted(self.pending):
+            (value, is_str) = self.pending[k]
+            i = self._find(k)
+            if i >= 0:
+                self._drop_value(self.refs[i])
+                self.refs[i] = self._add_value(value)
+                self.str_keys[i] = is_str
+            else:
+                fresh.append((k, self._add_value(value), is_str))
+        self.pending = {}
+        if len(fresh) > 0:
+            # two sorted runs, which the sort merges in one pass
+            merged = list(zip(self.int_keys, self.refs, self.str_keys))
+            merged.extend(fresh)
+            merged.sort()
+            self.int_keys = array('q', [k for (k, ref, is_str) in merged])
+            self.refs = array('q', [ref for (k, ref, is_str) in merged])
+            self.str_keys = bytearray(
+                is_str for (k, ref, is_str) in merged)
+        if self.garbage > len(self.heap) // 2:
+            self._compact()
+
+        return
+
+    def _drop_value(self, ref):
+        self.garbage += self.ends[ref] - self.starts[ref]
+
+        return
+
+    def _compact(self):
+        """
+        Copy the ids that are still referred to into a new heap.
+        """
+        heap = bytearray()
+        starts = array('q')
+        ends = array('q')
+        for (i, ref) in enumerate(self.refs):
+            starts.append(len(heap))
+            heap += self.heap[self.starts[ref]:self.ends[ref]]
+            ends.append(len(heap))
+            self.refs[i] = i
+        (self.heap, self.starts, self.ends) = (heap, starts, ends)
+        self.garbage = 0
+
+        return
+
+    def __getitem__(self, key):
+        value = self.get(key, self)
+        if value is self:
+            raise KeyError(key)
+
+        return value
+
+    def get(self, key, default=None):
+        # this is the per-row join, so it avoids the generic paths
+        k = self._int_key(key)
+        if k is None:
+            return self.other.get(key, default)
+        entry = self.pending.get(k)
+        if entry is not None:
+            return entry[0]
+        keys = self.int_keys
+        i = bisect_left(keys, k)
+        if i == len(keys) or keys[i] != k:
+            return default
+        ref = self.refs[i]
+
+        return self.heap[self.starts[ref]:self.ends[ref]].decode('utf-8')
+
+    def __setitem__(self, key, value):
+        if not isinstance(value, str):
+            raise TypeError(
+                "IdTable values must be strings, not {0}".format(
+                    type(value).__name__))
+        k = self._int_key(key)
+        if k is None:
+            self.other[key] = value
+            return
+        self.pending[k] = (value, type(key) is str)
+        if len(self.pending) >= max(self.min_pending, len(self.int_keys) // 2):
+            self._merge()
+
+        return
+
+    def __delitem__(self, key):
+        k = self._int_key(key)
+        if k is None:
+            del self.other[key]
+            return
+        self._merge()
+        i = self._find(k)
+        if i < 0:
+            raise KeyError(key)
+        self._drop_value(self.refs[i])
+        del self.int_keys[i]
+        del self.refs[i]
+        del self.str_keys[i]
+
+        return
+
+    def __contains__(self, key):
+        k = self._int_key(key)
+        if k is None:
+            return key in self.other
+
+        return k in self.pending or self._find(k) >= 0
+
+    # len() and iteration leave the arrays alone,
+    # so they are safe alongside other readers
+
+    def _new_pending_keys(self):
+        return sorted(k for k in self.pending if self._find(k) < 0)
+
+    def __len__(self):
+        return len(self.int_keys) + len(self._new_pending_keys()) \
+            + len(self.other)
+
+    def __iter__(self):
+        pending = dict(self.pending)
+        merged = heapq.merge(
+            zip(list(self.int_keys), bytes(self.str_keys)),
+            ((k, pending[k][1]) for k in self._new_pending_keys()))
+        for (k, is_str) in merged:
+            if k in pending:
+                # stored again since
+                is_str = pending[k][1]
+            yield str(k) if is_str else k
+        for k in list(self.other):
+            yield k
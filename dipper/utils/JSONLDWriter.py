@@ -0,0 +1,136 @@
+import json
+import logging
+from rdflib import BNode, Literal
+from rdflib.namespace import RDF
+from dipper.utils.TurtleWriter import TurtleWriter
+
+__author__ = 'nlw'
+
+logger = logging.getLogger(__name__)
+
+
+class JSONLDWriter(TurtleWriter):
+    """
+    A streaming JSON-LD writer: a flattened document, with the prefixes
+    as its @context, and a node object in its @graph for each run
+    of triples with the same subject, written as they come:
+        {"@context": {...},
+         "@graph": [
+          {"@id": "NCBIGene:1", "@type": ["owl:Class"],
+           "rdfs:label": [{"@value": "A1BG"}]},
+          ...]}
+    IRIs are written as CURIEs where the TurtleWriter would write
+    a prefixed name.  The empty prefix can't be a JSON-LD term,
+    so it is left out.
+
+    Usage:
+        with JSONLDWriter('out/mgi.jsonld', prefixes=prefixes) as writer:
+            writer.write_graph(graph)
+
+    """
+
+    def __init__(self, file=None, curie_map=None, compress=None,
+                 prefixes=None):
+        """
+        :param file: the path to write to, or None for stdout
+        :param curie_map: dict of prefix -> namespace
+        :param compress: True to gzip, 'gzip', 'zstd' or the CompressedFile
+            settings for one; by default, as the extension of file calls for
+        :param prefixes: dict of prefix -> namespace to use instead of
+            the curie map and the standard ones
+        """
+        super().__init__(file, curie_map, compress, prefixes)
+        self.prefixes.pop('', None)
+        self.namespaces = self._namespace_table(self.prefixes)
+        self.nodes_written = 0
+
+        return
+
+    def write_header(self):
+        """
+        Write the @context, and open the @graph.
+        :return: None
+        """
+        if self.header_written:
+            return
+        self.header_written = True
+        context = {'@version': 1.1}
+        for p in sorted(self.prefixes):
+            namespace = self.prefixes[p]
+            if namespace[-1] in '/#:?':
+                context[p] = namespace
+            else:
+                # only namespaces ending like that are prefixes by default
+                context[p] = {'@id': namespace, '@prefix': True}
+        self._emit(
+            '{"@context": ' + json.dumps(context, indent=1) +
+            ',\n"@graph": [\n')
+
+        return
+
+    def _id(self, node):
+        if isinstance(node, BNode):
+            return '_:' + self.bnode_specials.sub('_', str(node))
+        split = self._split(self.namespaces, str(node))
+        if split is not None:
+            return split[0] + ':' + split[1]
+
+        return str(node)
+
+    def _value(self, node):
+        if isinstance(node, Literal):
+            value = {'@value': str(node)}
+            if node.language is not None:
+                value['@language'] = node.language
+            elif node.datatype is not None:
+                value['@type'] = self._id(node.datatype)
+            return value
+
+        return {'@id': self._id(node)}
+
+    def _write_node(self, s, properties):
+        node = {'@id': self._id(s)}
+        node.update(properties)
+        self._emit(
+            (',\n' if self.nodes_written > 0 else '') +
+            json.dumps(node, ensure_ascii=False))
+        self.nodes_written += 1
+
+        return
+
+    def write_triples(self, triples):
+        """
+        Write triples, as a node object for each run of the same subject.
+        :param triples: iterable of (s, p, o)
+        :return: the number of triples written
+        """
+        self.write_header()
+        count = 0
+        last_s = None
+        properties = {}
+        for (s, p, o) in triples:
+            if s != last_s:
+                if last_s is not None:
+                    self._write_node(last_s, properties)
+                (last_s, properties) = (s, {})
+            if p == RDF['type'] and not isinstance(o, Literal):
+                properties.setdefault('@type', []).append(self._id(o))
+            else:
+                properties.setdefault(self._id(p), []).append(self._value(o))
+            count += 1
+        if last_s is not None:
+            self._write_node(last_s, properties)
+        self.triple_count += count
+
+        return count
+
+    def close(self):
+        """
+        Close the @graph, flush, and close the file (not stdout).
+        :return: None
+        """
+        self.write_header()
+        self._emit('\n]}\n')
+        super().close()
+
+        return
@@ -0,0 +1,52 @@
+import logging
+from dipper.utils.TurtleWriter import TurtleWriter
+
+__author__ = 'nlw'
+
+logger = logging.getLogger(__name__)
+
+
+class NTriplesWriter(TurtleWriter):
+    """
+    A streaming N-Triples writer: one line per triple, with full IRIs,
+    through the same buffer (and optional compression) as the TurtleWriter.
+
+    Usage:
+        with NTriplesWriter('out/mgi.nt.gz') as writer:
+            writer.write_graph(graph)
+
+    """
+
+    def __init__(self, file=None, compress=None):
+        """
+        :param file: the path to write to, or None for stdout
+        :param compress: True to gzip, 'gzip', 'zstd' or the CompressedFile
+            settings for one; by default, as the extension of file calls for
+        """
+        super().__init__(file, compress=compress, prefixes={})
+
+        return
+
+    def write_header(self):
+        """
+        N-Triples has no header.
+        :return: None
+        """
+        self.header_written = True
+
+        return
+
+    def write_triples(self, triples):
+        """
+        :param triples: iterable of (s, p, o)
+        :return: the number of triples written
+        """
+        term = self.term
+        emit = self._emit
+        count = 0
+        for (s, p, o) in triples:
+            emit(term(s) + ' ' + term(p) + ' ' + term(o) + ' .\n')
+            count += 1
+        self.triple_count += count
+
+        return count
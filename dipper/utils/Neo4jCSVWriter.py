@@ -0,0 +1,275 @@
+import csv
+import logging
+from rdflib import URIRef, BNode, Literal
+from rdflib.namespace import RDF, RDFS, OWL, DC
+from dipper.utils.TurtleWriter import TurtleWriter
+from dipper.utils.CurieUtil import CurieUtil
+from dipper.utils.CompressedFile import CompressedFile
+
+__author__ = 'nlw'
+
+logger = logging.getLogger(__name__)
+
+
+class Neo4jCSVWriter(object):
+    """
+    Writes a graph as the node and relationship csv files that
+    `neo4j-admin import` bulk loads, which is much faster than loading
+    the turtle into a graph database a transaction at a time.
+
+    Every IRI or blank node is a node, with its CURIE (or its full IRI,
+    if none of the prefixes fit, or _:label for a blank node) as its id:
+        nodes:          id:ID,iri,label,labels:string[],description,
+                        descriptions:string[],synonyms:string[],
+                        types:string[],:LABEL
+        relationships:  :START_ID,:END_ID,:TYPE,iri
+    The labels, descriptions and synonyms come from the literals of
+    the predicates in literal_properties; other literals are left out.
+    A node with more than one label or description has all of them,
+    in order, in labels or descriptions, and the first in label
+    or description.
+    The rdf:types of a node are in its types, and each is also
+    a relationship, unless it is one of the OWL or RDFS kinds of thing
+    (Class, NamedIndividual, ObjectProperty...), which are given as
+    neo4j labels instead; every node has the label Node.
+    Any other triple with an IRI or blank node object is a relationship,
+    with the CURIE of its predicate as its type.
+
+    It is a single pass over the triples, which should come grouped
+    by subject (write_graph() groups them, as would a sorted shard):
+    a node's row is written when the next subject starts.
+    Nodes that are only objects get a row with just their id and iri,
+    at the end.
+    Array values are separated by the unit separator (U+001F),
+    which is taken out of the values, since labels and synonyms may
+    have any of the printable characters, neo4j-admin's default ';'
+    among them; values may have line breaks too, so import with
+        neo4j-admin import --array-delimiter=U+001F \\
+            --multiline-fields=true ...
+
+    Usage:
+        with Neo4jCSVWriter('out/mgi_nodes.csv.gz',
+                            'out/mgi_relationships.csv.gz', prefixes) as w:
+            w.write_graph(graph)
+
+    """
+
+    node_header = [
+        'id:ID', 'iri', 'label', 'labels:string[]', 'description',
+        'descriptions:string[]', 'synonyms:string[]', 'types:string[]',
+        ':LABEL']
+    relationship_header = [':START_ID', ':END_ID', ':TYPE', 'iri']
+
+    # predicate -> the node property its literals go in
+    literal_properties = {
+        str(RDFS['label']): 'label',
+        str(DC['description']): 'description',
+        'http://purl.obolibrary.org/obo/IAO_0000115': 'description',
+        'http://www.geneontology.org/formats/oboInOwl#hasExactSynonym':
+            'synonyms',
+        'http://www.geneontology.org/formats/oboInOwl#hasRelatedSynonym':
+            'synonyms',
+        'http://www.geneontology.org/formats/oboInOwl#hasNarrowSynonym':
+            'synonyms',
+        'http://www.geneontology.org/formats/oboInOwl#hasBroadSynonym':
+            'synonyms',
+    }
+    # the namespaces of the types that are neo4j labels
+    label_namespaces = (str(OWL), str(RDFS))
+
+    # for --array-delimiter
+    array_separator = '\x1f'
+    # how many ids to remember the text of
+    max_cached_ids = 2**18
+
+    def __init__(self, nodes_file, relationships_file, prefixes=None,
+                 compress=None):
+        """
+        :param nodes_file: the path to write the nodes to;
+            compressed if it ends in .gz or .zst
+        :param relationships_file: the path to write the relationships to
+        :param prefixes: dict of prefix -> namespace, for the CURIEs,
+            along with rdf, rdfs, owl and xsd
+        :param compress: 'gzip', 'zstd' or the CompressedFile settings
+            to compress both files with; by default, as their extensions
+            call for
+        """
+        table = dict(TurtleWriter.standard_prefixes)
+        if prefixes is not None:
+            table.update(prefixes)
+        self.cu = CurieUtil(dict((p, str(ns)) for (p, ns) in table.items()))
+        self.files = (nodes_file, relationships_file)
+        self.outs = [self._open(f, compress) for f in self.files]
+        self.nodes = csv.writer(self.outs[0], lineterminator='\n')
+        self.relationships = csv.writer(self.outs[1], lineterminator='\n')
+        self.nodes.writerow(self.node_header)
+        self.relationships.writerow(self.relationship_header)
+
+        self.id_cache = {}
+        # the ids of the nodes written, and the iris of those
+        # only seen as objects so far, by id
+        self.written = set()
+        self.referenced = {}
+        self.repeated_subjects = 0
+        self.skipped_literals = 0
+        self.node_count = 0
+        self.relationship_count = 0
+
+        return
+
+    @staticmethod
+    def _open(file, compress=None):
+        return CompressedFile.open(file, 'wt', compress, newline='')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+        return False
+
+    def node_id(self, node):
+        """
+        :param node: a URIRef or BNode
+        :return: its CURIE, full IRI, or _:label
+        """
+        node_id = self.id_cache.get(node)
+        if node_id is not None:
+            return node_id
+        if isinstance(node, BNode):
+            node_id = '_:' + str(node)
+        else:
+            node_id = self.cu.compact(str(node))
+        if len(self.id_cache) >= self.max_cached_ids:
+            self.id_cache.clear()
+        self.id_cache[node] = node_id
+
+        return node_id
+
+    def _write_node(self, subject, properties, types, labels):
+        node_id = self.node_id(subject)
+        if node_id in self.written:
+            # neo4j-admin won't take a node twice
+            self.repeated_subjects += 1
+            return
+        self.written.add(node_id)
+        self.referenced.pop(node_id, None)
+        node_labels = sorted(properties.get('label', []))
+        descriptions = sorted(properties.get('description', []))
+        self.nodes.writerow([
+            node_id,
+            str(subject) if isinstance(subject, URIRef) else '',
+            node_labels[0] if len(node_labels) > 0 else '',
+            self._array(node_labels) if len(node_labels) > 1 else '',
+            descriptions[0] if len(descriptions) > 0 else '',
+            self._array(descriptions) if len(descriptions) > 1 else '',
+            self._array(sorted(properties.get('synonyms', []))),
+            self._array(types),
+            self._array(['Node'] + labels)])
+        self.node_count += 1
+
+        return
+
+    def _array(self, values):
+        """
+        :param values: list of str
+        :return: the values of an array field, with the separator
+            taken out of each
+        """
+        sep = self.array_separator
+
+        return sep.join(v.replace(sep, ' ') for v in values)
+
+    def _write_relationship(self, start_id, predicate, o):
+        end_id = self.node_id(o)
+        self.relationships.writerow(
+            [start_id, end_id, self.node_id(predicate), str(predicate)])
+        if end_id not in self.written:
+            self.referenced[end_id] = \
+                str(o) if isinstance(o, URIRef) else ''
+        self.relationship_count += 1
+
+        return
+
+    def write_triples(self, triples):
+        """
+        :param triples: iterable of (s, p, o), grouped by subject
+        :return: None
+        """
+        last_s = None
+        (properties, types, labels) = ({}, [], [])
+        for (s, p, o) in triples:
+            if s != last_s:
+                if last_s is not None:
+                    self._write_node(last_s, properties, types, labels)
+                last_s = s
+                (properties, types, labels) = ({}, [], [])
+            if isinstance(o, Literal):
+                prop = self.literal_properties.get(str(p))
+                if prop is None:
+                    self.skipped_literals += 1
+                else:
+                    properties.setdefault(prop, []).append(str(o))
+                continue
+            start_id = self.node_id(s)
+            if p == RDF['type'] and isinstance(o, URIRef):
+                types.append(self.node_id(o))
+                label = self._kind(o)
+                if label is not None:
+                    labels.append(label)
+                    continue
+            self._write_relationship(start_id, p, o)
+        if last_s is not None:
+            self._write_node(last_s, properties, types, labels)
+
+        return
+
+    def _kind(self, rdf_type):
+        """
+        :return: the neo4j label for an rdf:type, like Class,
+            or None if it isn't one of the label_namespaces
+        """
+        iri = str(rdf_type)
+        for ns in self.label_namespaces:
+            if iri.startswith(ns):
+                return iri[len(ns):]
+
+        return None
+
+    def write_graph(self, graph):
+        """
+        :param graph: an rdflib graph
+        :return: None
+        """
+        self.write_triples(TurtleWriter.grouped_triples(graph))
+
+        return
+
+    def close(self):
+        """
+        Write the nodes that were only objects, and close the files.
+        :return: None
+        """
+        for node_id in sorted(self.referenced):
+            self.nodes.writerow(
+                [node_id, self.referenced[node_id], '', '', '', '', '', '',
+                 'Node'])
+            self.node_count += 1
+        self.referenced = {}
+        for out in self.outs:
+            out.close()
+        if self.repeated_subjects > 0:
+            logger.warning(
+                "Left out %d repeated subjects; their triples were not "
+                "grouped together", self.repeated_subjects)
+        if self.skipped_literals > 0:
+            logger.info(
+                "Left out %d literals that are not node properties",
+                self.skipped_literals)
+        logger.info(
+            "Wrote %d nodes to %s and %d relationships to %s",
+            self.node_count, self.files[0],
+            self.relationship_count, self.files[1])
+
+        return
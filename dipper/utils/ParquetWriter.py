@@ -0,0 +1,270 @@
+import logging
+from rdflib import BNode, Literal
+from rdflib.namespace import RDF, DC
+from dipper.utils.CurieUtil import CurieUtil
+from dipper.utils.CompressedFile import CompressedFile
+from dipper.utils.TurtleWriter import TurtleWriter
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    # optional; only needed to write parquet
+    pyarrow = None
+
+__author__ = 'nlw'
+
+logger = logging.getLogger(__name__)
+
+
+class ParquetWriter(object):
+    """
+    Writes a graph as parquet, for loading into data frames with one
+    columnar read instead of parsing turtle:
+        triples:        subject, predicate, object, object_kind,
+                        datatype, language
+    and, optionally, one row for each OBAN association
+    (as made by dipper.models.assoc.Association):
+        associations:   association, subject, predicate, object,
+                        evidence[], source[], provenance[]
+    The ids are CURIEs where a prefix fits (or full IRIs, or _:label for
+    blank nodes), in dictionary-encoded columns, and a literal object is
+    its lexical form, with its kind 'literal' and its datatype or language.
+
+    The rows are written out in row groups as the triples stream past,
+    grouped by subject (which write_graph() does), so that each
+    association's triples are together.
+
+    The column chunks are compressed with snappy, or with gzip or zstd
+    (at the level of the CompressedFile settings given) if asked to.
+
+    This needs pyarrow, which is an optional dependency
+    (pip install dipper[parquet]).
+
+    Usage:
+        with ParquetWriter('out/mgi.parquet', prefixes,
+                           'out/mgi_associations.parquet') as writer:
+            writer.write_graph(graph)
+
+    """
+
+    # how many rows to write at a time
+    row_group_size = 2**20
+
+    has_subject = 'http://purl.org/oban/association_has_subject'
+    has_object = 'http://purl.org/oban/association_has_object'
+    has_predicate = 'http://purl.org/oban/association_has_object_property'
+    has_evidence = 'http://purl.obolibrary.org/obo/RO_0002558'
+    has_source = str(DC['source'])
+    has_provenance = 'http://purl.org/oban/has_provenance'
+
+    @staticmethod
+    def is_available():
+        """
+        :return: True if pyarrow is installed, to write parquet with
+        """
+
+        return pyarrow is not None
+
+    def __init__(self, file, prefixes=None, associations_file=None,
+                 compression=None):
+        """
+        :param file: the path to write the triples to
+        :param prefixes: dict of prefix -> namespace, for the CURIEs
+        :param associations_file: the path to write the associations to,
+            or None to leave them out
+        :param compression: 'gzip' or 'zstd', or the CompressedFile
+            settings for one (default: snappy)
+        """
+        if pyarrow is None:
+            raise ImportError("pyarrow is needed to write parquet")
+        table = dict(TurtleWriter.standard_prefixes)
+        if prefixes is not None:
+            table.update(prefixes)
+        self.cu = CurieUtil(dict((p, str(ns)) for (p, ns) in table.items()))
+        self.id_cache = {}
+
+        ids = pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+        ids_list = pyarrow.list_(pyarrow.string())
+        self.triples_schema = pyarrow.schema([
+            ('subject', ids), ('predicate', ids), ('object', ids),
+            ('object_kind', ids), ('datatype', ids), ('language', ids)])
+        self.associations_schema = pyarrow.schema([
+            ('association', ids), ('subject', ids), ('predicate', ids),
+            ('object', ids), ('evidence', ids_list), ('source', ids_list),
+            ('provenance', ids_list)])
+
+        options = {'compression': 'snappy'}
+        if compression is not None:
+            if not isinstance(compression, CompressedFile):
+                compression = CompressedFile(compression)
+            options = {
+                'compression': compression.codec,
+                'compression_level': compression.level}
+        self.files = (file, associations_file)
+        self.triples_out = pyarrow.parquet.ParquetWriter(
+            file, self.triples_schema, **options)
+        self.associations_out = None
+        if associations_file is not None:
+            self.associations_out = pyarrow.parquet.ParquetWriter(
+                associations_file, self.associations_schema, **options)
+        self.triples = self._columns(self.triples_schema)
+        self.associations = self._columns(self.associations_schema)
+        self.triple_count = 0
+        self.association_count = 0
+
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+        return False
+
+    @staticmethod
+    def _columns(schema):
+        return dict((name, []) for name in schema.names)
+
+    def node_id(self, node):
+        """
+        :param node: a URIRef or BNode
+        :return: its CURIE, full IRI, or _:label
+        """
+        node_id = self.id_cache.get(node)
+        if node_id is None:
+            if isinstance(node, BNode):
+                node_id = '_:' + str(node)
+            else:
+                node_id = self.cu.compact(str(node))
+            if len(self.id_cache) >= TurtleWriter.max_cached_terms:
+                self.id_cache.clear()
+            self.id_cache[node] = node_id
+
+        return node_id
+
+    def _flush(self, columns, schema, out):
+        """
+        Write the collected rows as a row group.
+        """
+        if len(columns[schema.names[0]]) == 0:
+            return
+        arrays = []
+        for field in schema:
+            array = pyarrow.array(
+                columns[field.name], type=field.type.value_type
+                if pyarrow.types.is_dictionary(field.type) else field.type)
+            if pyarrow.types.is_dictionary(field.type):
+                array = array.dictionary_encode()
+            arrays.append(array)
+            columns[field.name] = []
+        out.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+
+        return
+
+    def _add_triple(self, s, p, o):
+        t = self.triples
+        t['subject'].append(self.node_id(s))
+        t['predicate'].append(self.node_id(p))
+        if isinstance(o, Literal):
+            t['object'].append(str(o))
+            t['object_kind'].append('literal')
+            t['datatype'].append(
+                None if o.datatype is None else self.node_id(o.datatype))
+            t['language'].append(o.language)
+        else:
+            t['object'].append(self.node_id(o))
+            t['object_kind'].append(
+                'bnode' if isinstance(o, BNode) else 'iri')
+            t['datatype'].append(None)
+            t['language'].append(None)
+        self.triple_count += 1
+        if len(t['subject']) >= self.row_group_size:
+            self._flush(t, self.triples_schema, self.triples_out)
+
+        return
+
+    def _add_association(self, s, properties):
+        """
+        Add an association row, if a subject's properties make it one.
+        :param s: the subject
+        :param properties: dict of predicate iri -> list of objects
+        """
+        if self.associations_out is None or \
+                self.has_subject not in properties:
+            return
+        a = self.associations
+        a['association'].append(self.node_id(s))
+        for (column, predicate) in (
+                ('subject', self.has_subject), ('object', self.has_object),
+                ('predicate', self.has_predicate)):
+            objects = properties.get(predicate)
+            a[column].append(
+                None if objects is None else self._value(objects[0]))
+        for (column, predicate) in (
+                ('evidence', self.has_evidence),
+                ('source', self.has_source),
+                ('provenance', self.has_provenance)):
+            a[column].append(
+                [self._value(o) for o in properties.get(predicate, [])])
+        self.association_count += 1
+        if len(a['association']) >= self.row_group_size:
+            self._flush(a, self.associations_schema, self.associations_out)
+
+        return
+
+    def _value(self, node):
+        if isinstance(node, Literal):
+            return str(node)
+
+        return self.node_id(node)
+
+    def write_triples(self, triples):
+        """
+        :param triples: iterable of (s, p, o), grouped by subject
+        :return: None
+        """
+        last_s = None
+        properties = {}
+        for (s, p, o) in triples:
+            if s != last_s:
+                if last_s is not None:
+                    self._add_association(last_s, properties)
+                (last_s, properties) = (s, {})
+            self._add_triple(s, p, o)
+            if p != RDF['type']:
+                properties.setdefault(str(p), []).append(o)
+        if last_s is not None:
+            self._add_association(last_s, properties)
+
+        return
+
+    def write_graph(self, graph):
+        """
+        :param graph: an rdflib graph
+        :return: None
+        """
+        self.write_triples(TurtleWriter.grouped_triples(graph))
+
+        return
+
+    def close(self):
+        """
+        Write the last row groups, and close the files.
+        :return: None
+        """
+        self._flush(self.triples, self.triples_schema, self.triples_out)
+        self.triples_out.close()
+        logger.info(
+            "Wrote %d triples to %s", self.triple_count, self.files[0])
+        if self.associations_out is not None:
+            self._flush(
+                self.associations, self.associations_schema,
+                self.associations_out)
+            self.associations_out.close()
+            logger.info(
+                "Wrote %d associations to %s",
+                self.association_count, self.files[1])
+
+        return
@@ -0,0 +1,163 @@
+import logging
+from dipper.utils.CompressedFile import CompressedFile
+
+__author__ = 'nlw'
+
+logger = logging.getLogger(__name__)
+
+
+class RDFPatch(object):
+    """
+    Makes an RDF Patch of the differences between two builds of a graph,
+    from their canonical N-Triples (see CanonicalNTriplesWriter),
+    so that a triple store can apply the changes instead of reloading
+    the whole graph:
+        TX .
+        D <http://...> <http://...> "old" .
+        A <http://...> <http://...> "new" .
+        TC .
+    The two files are sorted, so they are read side by side, once,
+    like the merge of a merge sort, whatever their size; a triple
+    in only the previous file is deleted (D), and one in only the new
+    file is added (A).  The changes are in the order of the lines.
+    A blank node keeps its label from one build to the next only while
+    what is around it stays the same, so the triples around one that
+    changes are deleted and added again under its new label.
+    In the patch, blank nodes are written as <_:label>, which is how
+    RDF Patch names a blank node by its label, so that a store that
+    takes the patch matches them to those it loaded from the previous
+    build (written as _:label, they would be new blank nodes).
+
+    Usage:
+        RDFPatch.diff(
+            'out/mgi.canonical.previous.nt.gz', 'out/mgi.canonical.nt.gz',
+            'out/mgi.patch.rdfp.gz')
+
+    """
+
+    @staticmethod
+    def _lines(file):
+        """
+        :return: a generator of the lines of a sorted N-Triples file
+        """
+        last = ''
+        with CompressedFile.open(file, 'rt', newline='') as f:
+            for line in f:
+                if line < last:
+                    raise ValueError(file + " is not sorted")
+                last = line
+                yield line
+
+    @staticmethod
+    def _patch_line(line):
+        """
+        :param line: a line of canonical N-Triples
+        :return: the line with its blank nodes written as <_:label>
+        """
+        (s, p, o) = line.split(' ', 2)
+        if s.startswith('_:'):
+            s = '<' + s + '>'
+        if o.startswith('_:'):
+            (o, end) = o.split(' ', 1)
+            o = '<' + o + '> ' + end
+
+        return ' '.join((s, p, o))
+
+    @staticmethod
+    def _triple_line(line):
+        """
+        :param line: a triple of a patch, without its A or D
+        :return: the line of canonical N-Triples it stands for
+        """
+        (s, p, o) = line.split(' ', 2)
+        if s.startswith('<_:'):
+            s = s[1:-1]
+        if o.startswith('<_:'):
+            (o, end) = o.split(' ', 1)
+            o = o[1:-1] + ' ' + end
+
+        return ' '.join((s, p, o))
+
+    @staticmethod
+    def changes(previous, new):
+        """
+        Compare two sorted sequences of lines.
+        :param previous: iterable of the lines of the previous build
+        :param new: iterable of the lines of the new build
+        :return: a generator of ('D', line) and ('A', line)
+        """
+        previous = iter(previous)
+        new = iter(new)
+        old_line = next(previous, None)
+        new_line = next(new, None)
+        while old_line is not None or new_line is not None:
+            if new_line is None or \
+                    (old_line is not None and old_line < new_line):
+                yield ('D', old_line)
+                old_line = next(previous, None)
+            elif old_line is None or new_line < old_line:
+                yield ('A', new_line)
+                new_line = next(new, None)
+            else:
+                old_line = next(previous, None)
+                new_line = next(new, None)
+
+    @classmethod
+    def diff(cls, previous_file, new_file, patch_file, compress=None):
+        """
+        Write the patch that takes one canonical N-Triples file
+        to another.
+        :param previous_file: the previous build
+        :param new_file: the new build
+        :param patch_file: the patch to write (compressed if its name
+            says so)
+        :param compress: the CompressedFile settings to write it with
+            (default: by its extension)
+        :return: (the number of triples added, the number deleted)
+        """
+        counts = {'A': 0, 'D': 0}
+        with CompressedFile.open(
+                patch_file, 'wt', compress, newline='') as out:
+            out.write('TX .\n')
+            for (change, line) in cls.changes(
+                    cls._lines(previous_file), cls._lines(new_file)):
+                out.write(change + ' ' + cls._patch_line(line))
+                counts[change] += 1
+            out.write('TC .\n')
+        logger.info(
+            "Wrote a patch of %d additions and %d deletions to %s",
+            counts['A'], counts['D'], patch_file)
+
+        return (counts['A'], counts['D'])
+
+    @classmethod
+    def apply(cls, previous_file, patch_file, file):
+        """
+        Apply a patch to a canonical N-Triples file, as a triple store
+        would, but in one pass over both, since the patch is sorted too.
+        :param previous_file: the file the patch was made from
+        :param patch_file: the patch
+        :param file: the file to write
+        :return: None
+        """
+        with CompressedFile.open(patch_file, 'rt', newline='') as f:
+            patch = (
+                (line[0], cls._triple_line(line[2:])) for line in f
+                if line[:2] in ('A ', 'D '))
+            with CompressedFile.open(file, 'wt', newline='') as out:
+                (change, changed) = next(patch, (None, None))
+                for line in cls._lines(previous_file):
+                    while changed is not None and changed < line:
+                        if change == 'A':
+                            out.write(changed)
+                        (change, changed) = next(patch, (None, None))
+                    if changed == line and change == 'D':
+                        (change, changed) = next(patch, (None, None))
+                        continue
+                    out.write(line)
+                while changed is not None:
+                    if change == 'A':
+                        out.write(changed)
+                    (change, changed) = next(patch, (None, None))
+
+        return
@@ -0,0 +1,303 @@
+import os
+import pickle
+import sqlite3
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from dipper import config
+
+__author__ = 'nlw'
+
+logger = logging.getLogger(__name__)
+
+
+class SpillDict(MutableMapping):
+    """
+    A dict for large intermediate lookups (like label or id hashes)
+    that keeps at most max_in_memory entries in RAM, the most recently
+    used ones, and spills the rest into a scratch SQLite file,
+    so a source can hold more than fits in memory.
+
+    The budget is configured in conf.json, like:
+      spill : {'max_in_memory' : 2000000, 'dir' : '/scratch'}
+    Without a budget, nothing is ever spilled, so SpillDict() gives
+    a plain dict (with the same bulk_load() and close()) instead,
+    which costs nothing over one.
+
+    Keys and values must be picklable, and values are stored by copy:
+    changing a mutable value in place is not seen once it has been
+    spilled, so store it again after changing it.
+    The scratch file is removed by close(), or when the dict is collected.
+
+    Usage:
+        self.label_hash = SpillDict()
+        self.label_hash.bulk_load(rows)     # faster than item by item
+        labels = self.label_hash.get_many(ids)  # one query a batch
+
+    """
+
+    # how many keys to look up in one query
+    batch_size = 500
+
+    def __new__(cls, max_in_memory=None, spill_dir=None):
+        if cls._budget(max_in_memory) is None:
+            return _InMemoryDict()
+
+        return super().__new__(cls)
+
+    @staticmethod
+    def _budget(max_in_memory):
+        if max_in_memory is None:
+            max_in_memory = \
+                config.get_config().get('spill', {}).get('max_in_memory')
+
+        return max_in_memory
+
+    def __init__(self, max_in_memory=None, spill_dir=None):
+        if spill_dir is None:
+            spill_dir = config.get_config().get('spill', {}).get('dir')
+        self.max_in_memory = self._budget(max_in_memory)
+        self.spill_dir = spill_dir
+
+        # key -> [value, dirty]; dirty entries are not (yet) on disk
+        self.cache = OrderedDict()
+        self.db = None
+        self.dbfile = None
+        # the number of distinct keys, in memory or on disk
+        self.length = 0
+        self.lock = threading.RLock()
+
+        return
+
+    # the scratch database
+
+    def _open_db(self):
+        if self.db is None:
+            (fd, self.dbfile) = tempfile.mkstemp(
+                prefix='spill-', suffix='.db', dir=self.spill_dir)
+            os.close(fd)
+            # the file is scratch space; don't pay for durability
+            self.db = sqlite3.connect(
+                self.dbfile, check_same_thread=False, isolation_level=None)
+            self.db.execute("PRAGMA journal_mode = OFF")
+            self.db.execute("PRAGMA synchronous = OFF")
+            self.db.execute(
+                "CREATE TABLE spill (key BLOB PRIMARY KEY, value BLOB)")
+            logger.info("Spilling to %s", self.dbfile)
+
+        return self.db
+
+    @staticmethod
+    def _dump(obj):
+        return pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+
+    def _write(self, items):
+        db = self._open_db()
+        db.execute("BEGIN")
+        db.executemany(
+            "INSERT OR REPLACE INTO spill VALUES (?, ?)",
+            ((self._dump(k), self._dump(v)) for (k, v) in items))
+        db.execute("COMMIT")
+
+        return
+
+    def _read(self, key):
+        if self.db is None:
+            return None
+        row = self.db.execute(
+            "SELECT value FROM spill WHERE key = ?",
+            (self._dump(key),)).fetchone()
+        if row is None:
+            return None
+
+        # wrapped, so that a stored None is told apart from a miss
+        return (pickle.loads(row[0]),)
+
+    def _cache(self, key, value, dirty):
+        """
+        Put an entry in the cache, evicting the least recently used ones
+        if that goes over the budget.
+        """
+        self.cache[key] = [value, dirty]
+        self.cache.move_to_end(key)
+        if len(self.cache) > self.max_in_memory:
+            evicted = []
+            while len(self.cache) > self.max_in_memory:
+                evicted.append(self.cache.popitem(last=False))
+            self._write(
+                (k, v) for (k, (v, is_dirty)) in evicted if is_dirty)
+
+        return
+
+    # the mapping
+
+    def __getitem__(self, key):
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is not None:
+                self.cache.move_to_end(key)
+                return entry[0]
+            found = self._read(key)
+            if found is None:
+                raise KeyError(key)
+            self._cache(key, found[0], False)
+
+            return found[0]
+
+    def __setitem__(self, key, value):
+        with self.lock:
+            if key not in self.cache and self._read(key) is None:
+                self.length += 1
+            self._cache(key, value, True)
+
+        return
+
+    def __delitem__(self, key):
+        with self.lock:
+            in_cache = self.cache.pop(key, None) is not None
+            on_disk = False
+            if self.db is not None:
+                on_disk = self.db.execute(
+                    "DELETE FROM spill WHERE key = ?",
+                    (self._dump(key),)).rowcount > 0
+            if not (in_cache or on_disk):
+                raise KeyError(key)
+            self.length -= 1
+
+        return
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.cache or self._read(key) is not None
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        """
+        Iterate over a snapshot of the keys.
+        """
+        with self.lock:
+            self.flush()
+            keys = list(self.cache)
+            if self.db is not None:
+                cached = set(keys)
+                for (k,) in self.db.execute("SELECT key FROM spill"):
+                    k = pickle.loads(k)
+                    if k not in cached:
+                        keys.append(k)
+
+        return iter(keys)
+
+    # bulk operations
+
+    def flush(self):
+        """
+        Write any changed entries that are held in memory to disk,
+        if anything has been spilled already.
+        :return: None
+        """
+        with self.lock:
+            if self.db is None:
+                return
+            dirty = [(k, e) for (k, e) in self.cache.items() if e[1]]
+            self._write((k, e[0]) for (k, e) in dirty)
+            for (k, e) in dirty:
+                e[1] = False
+
+        return
+
+    def bulk_load(self, items):
+        """
+        Add many entries at once.  They go straight to disk
+        in a single transaction, rather than through the cache.
+        :param items: an iterable of (key, value)
+        :return: None
+        """
+        with self.lock:
+            # start from everything on disk, so the new entries win
+            self._open_db()
+            self.flush()
+            self.cache.clear()
+            self._write(items)
+            self.length = self.db.execute(
+                "SELECT COUNT(*) FROM spill").fetchone()[0]
+
+        return
+
+    def get_many(self, keys, default=None):
+        """
+        Look up many keys at once, with one query per batch
+        for those that are not in memory.
+        :param keys:
+        :param default: the value for keys that are not found
+        :return: dict of key -> value
+        """
+        result = {}
+        with self.lock:
+            missing = []
+            for k in keys:
+                entry = self.cache.get(k)
+                if entry is not None:
+                    result[k] = entry[0]
+                else:
+                    missing.append(k)
+            if self.db is not None:
+                query = "SELECT key, value FROM spill WHERE key IN ({0})"
+                for i in range(0, len(missing), self.batch_size):
+                    batch = [self._dump(k) for k in
+                             missing[i:i + self.batch_size]]
+                    for (k, v) in self.db.execute(
+                            query.format(','.join('?' * len(batch))), batch):
+                        result[pickle.loads(k)] = pickle.loads(v)
+            for k in missing:
+                result.setdefault(k, default)
+
+        return result
+
+    def close(self):
+        """
+        Drop the contents and remove the scratch file.
+        :return: None
+        """
+        with self.lock:
+            self.cache.clear()
+            self.length = 0
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+                os.remove(self.dbfile)
+
+        return
+
+    def __del__(self):
+        if getattr(self, 'db', None) is not None:
+            self.close()
+
+
+class _InMemoryDict(dict):
+    """
+    What SpillDict() gives without a budget: a plain dict,
+    with the methods of SpillDict that callers use.
+    """
+
+    def bulk_load(self, items):
+        self.update(items)
+
+        return
+
+    def get_many(self, keys, default=None):
+        return dict((k, self.get(k, default)) for k in keys)
+
+    def flush(self):
+        return
+
+    def close(self):
+        self.clear()
+
+        return
+
+
+SpillDict.register(_InMemoryDict)
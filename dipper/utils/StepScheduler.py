@@ -0,0 +1,245 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+__author__ = 'nlw'
+
+logger = logging.getLogger(__name__)
+
+
+class Step:
+    """
+    One unit of a source's parse, such as a _process_* method,
+    along with the lookup tables it consumes (inputs) and
+    builds or adds to (outputs).
+    Lookups are named by the attribute that holds them,
+    qualified by the key where a hash is split by type,
+    like 'label_hash' or 'idhash.allele'.
+
+    """
+
+    def __init__(self, func, args=(), inputs=(), outputs=(), name=None):
+        self.func = func
+        self.args = tuple(args)
+        self.inputs = frozenset(inputs)
+        self.outputs = frozenset(outputs)
+        self.name = name
+        if self.name is None:
+            self.name = func.__name__
+
+        return
+
+    def run(self):
+        return self.func(*self.args)
+
+    def __repr__(self):
+        return "Step({0})".format(self.name)
+
+
+class StepScheduler:
+    """
+    Runs the declared steps of a parse,
+    concurrently where their lookups allow it.
+
+    The steps are listed in an order that works when run one after another,
+    as the parse() methods have always done.  A step must wait for
+    every earlier step that writes a lookup it reads or writes,
+    and for every earlier step that reads a lookup it writes;
+    all other steps are free to run alongside it.
+    The result is then the same as that of the linear order.
+
+    validate() checks that every input is built by an earlier step,
+    or is provided before the steps run (like a mapping file loaded
+    up front), so a reordering that breaks a dependency is reported
+    rather than silently producing an incomplete graph.
+
+    Steps run on threads, since they share the source's lookups and graphs.
+    While steps run concurrently, the stores of the graphs passed to run()
+    are locked around each add, remove, and lookup.
+
+    Usage:
+        steps = [
+            Step(self._process_genes, (limit,), outputs=['id_label_map']),
+            Step(self._process_fish, (limit,), inputs=['id_label_map'])]
+        StepScheduler(steps, workers=4).run([self.graph, self.testgraph])
+
+    """
+
+    # the store methods that are locked while steps run concurrently
+    locked_methods = ('add', 'addN', 'remove', 'triples', '__len__')
+
+    def __init__(self, steps, provided=(), workers=1):
+        self.steps = list(steps)
+        self.provided = frozenset(provided)
+        self.workers = workers
+
+        names = [s.name for s in self.steps]
+        duplicates = set(n for n in names if names.count(n) > 1)
+        if len(duplicates) > 0:
+            raise ValueError(
+                "Duplicate step names: {0}".format(sorted(duplicates)))
+
+        self.dependencies = self._get_dependencies()
+
+        return
+
+    def _get_dependencies(self):
+        """
+        :return: dict of step name -> set of the names of
+            the earlier steps that it must wait for
+        """
+        dependencies = {}
+        for (i, step) in enumerate(self.steps):
+            dependencies[step.name] = set()
+            for earlier in self.steps[:i]:
+                if earlier.outputs & (step.inputs | step.outputs) \
+                        or earlier.inputs & step.outputs:
+                    dependencies[step.name].add(earlier.name)
+
+        return dependencies
+
+    def validate(self):
+        """
+        Check that each step's inputs are built by an earlier step,
+        or provided.
+        :return: None
+        :raises ValueError: listing each input that would be read too early
+        """
+        available = set(self.provided)
+        problems = []
+        for step in self.steps:
+            # a step may read what it is building itself
+            missing = step.inputs - available - step.outputs
+            for lookup in sorted(missing):
+                producers = [
+                    s.name for s in self.steps if lookup in s.outputs]
+                if len(producers) > 0:
+                    problems.append(
+                        "{0} reads {1} before {2} builds it".format(
+                            step.name, lookup, ', '.join(producers)))
+                else:
+                    problems.append(
+                        "{0} reads {1}, which nothing builds".format(
+                            step.name, lookup))
+            available |= step.outputs
+
+        if len(problems) > 0:
+            raise ValueError(
+                "Invalid step order:\n" + '\n'.join(problems))
+
+        return
+
+    def run(self, graphs=()):
+        """
+        Validate, then run all of the steps.
+        The first step to fail stops any more from being started;
+        its exception is raised once the running steps have finished.
+        :param graphs: the graphs the steps write to
+        :return: None
+        """
+        self.validate()
+
+        start = time.time()
+        if self.workers <= 1:
+            for step in self.steps:
+                self._run_step(step)
+        else:
+            lock = threading.RLock()
+            stores = [g.store for g in graphs]
+            for store in stores:
+                self._lock_store(store, lock)
+            try:
+                self._run_concurrently()
+            finally:
+                for store in stores:
+                    self._unlock_store(store)
+
+        logger.info(
+            "Ran %d steps in %.1f sec", len(self.steps), time.time() - start)
+
+        return
+
+    def _run_concurrently(self):
+        pending = list(self.steps)
+        done = set()
+        running = {}
+        error = None
+        logger.info(
+            "Running %d steps on %d threads", len(self.steps), self.workers)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while len(pending) > 0 or len(running) > 0:
+                if error is None:
+                    for step in list(pending):
+                        if len(running) >= self.workers:
+                            break
+                        if self.dependencies[step.name] <= done:
+                            pending.remove(step)
+                            future = executor.submit(self._run_step, step)
+                            running[future] = step
+                if len(running) == 0:
+                    break
+
+                (finished, _) = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    step = running.pop(future)
+                    if future.exception() is not None:
+                        logger.error(
+                            "Step %s failed: %s", step.name, future.exception())
+                        if error is None:
+                            error = future.exception()
+                    else:
+                        done.add(step.name)
+
+        if error is not None:
+            raise error
+
+        return
+
+    @staticmethod
+    def _run_step(step):
+        start = time.time()
+        logger.info("Starting step %s", step.name)
+        step.run()
+        logger.info(
+            "Finished step %s in %.1f sec", step.name, time.time() - start)
+
+        return
+
+    @classmethod
+    def _lock_store(cls, store, lock):
+        """
+        Serialize access to an rdflib store by shadowing its
+        mutating and lookup methods on the instance
+        (Graph calls them as attributes of the store,
+        like store.__len__(context=...)).
+        Matches are collected under the lock, so that a reader
+        never iterates an index that another step is changing.
+        :param store:
+        :param lock:
+        :return: None
+        """
+        for method in cls.locked_methods:
+            setattr(store, method, cls._locked(
+                getattr(store, method), lock, method == 'triples'))
+
+        return
+
+    @staticmethod
+    def _locked(func, lock, collect=False):
+        def locked_func(*args, **kwargs):
+            with lock:
+                result = func(*args, **kwargs)
+                if collect:
+                    result = iter(list(result))
+                return result
+
+        return locked_func
+
+    @classmethod
+    def _unlock_store(cls, store):
+        for method in cls.locked_methods:
+            if method in store.__dict__:
+                delattr(store, method)
+
+        return
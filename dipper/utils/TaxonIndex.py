@@ -0,0 +1,280 @@
+import os
+import re
+import pickle
+import tarfile
+import logging
+from stat import ST_MTIME, ST_SIZE
+
+__author__ = 'nlw'
+
+logger = logging.getLogger(__name__)
+
+
+class TaxonIndex:
+    """
+    An offline index over the NCBI Taxonomy, built from the names.dmp and
+    nodes.dmp members of the NCBI ```taxdump.tar.gz```.
+    This lets sources resolve organism labels (scientific names, common
+    names, synonyms) to NCBITaxon numbers and walk lineages with local
+    dict lookups, instead of an E-utilities request per label
+    (see DipperUtil.get_ncbi_taxon_num_by_label).
+
+    The taxdump is fetched like any other source file, via a Source's
+    fetch_from_url(), into a shared raw directory.  The first load parses
+    the dump and pickles the resulting tables next to it;
+    subsequent loads read the pickle as long as the dump is unchanged.
+
+    Usage:
+        tax_index = TaxonIndex()
+        tax_index.fetch(self, is_dl_forced)     # from a Source.fetch()
+        tax_index.load()                        # from a Source.parse()
+        tax_index.get_taxon_num('Drosophila melanogaster')  # '7227'
+
+    """
+
+    files = {
+        'taxdump': {
+            'file': 'taxdump.tar.gz',
+            'url': 'http://ftp.ncbi.nih.gov/pub/taxonomy/taxdump.tar.gz'}
+    }
+
+    # name classes in names.dmp that we treat as synonyms of a taxon.
+    # others (authority, type material, ...) are not useful for lookups
+    synonym_classes = {
+        'scientific name', 'synonym', 'equivalent name', 'genbank synonym',
+        'common name', 'genbank common name', 'blast name', 'acronym',
+        'genbank acronym', 'includes', 'misspelling', 'misnomer'
+    }
+
+    # bumped whenever the pickled tables change shape
+    cache_version = 2
+
+    def __init__(self, rawdir='raw/ncbitaxon'):
+        self.rawdir = rawdir
+        self.dumpfile = '/'.join((self.rawdir, self.files['taxdump']['file']))
+        self.cachefile = '/'.join((self.rawdir, 'taxon_index.pickle'))
+
+        # scientific name (normalized) -> set of taxon numbers;
+        # a genus name may be used in more than one kingdom
+        self.scientific_names = {}
+        # unique name (normalized) -> taxon number, which tells such
+        # homonyms apart, as in "Drosophila <fruit fly, genus>"
+        self.unique_names = {}
+        # any synonym (normalized) -> set of taxon numbers
+        self.synonyms = {}
+        # taxon number -> (parent taxon number, rank)
+        self.nodes = {}
+        # taxon number -> scientific name, as written in the dump
+        self.labels = {}
+
+        if not os.path.exists(self.rawdir):
+            os.makedirs(self.rawdir)
+
+        return
+
+    def fetch(self, source, is_dl_forced=False):
+        """
+        Fetch the taxdump through the supplied Source,
+        so that it gets the same freshness checks as the source's own files.
+        :param source: the Source doing the fetching
+        :param is_dl_forced:
+        :return: None
+
+        """
+        source.fetch_from_url(
+            self.files['taxdump']['url'], self.dumpfile, is_dl_forced)
+
+        return
+
+    def load(self):
+        """
+        Populate the lookup tables, preferring the pickled cache
+        when it was built from the current taxdump.
+        :return: True if the index is available, otherwise False
+
+        """
+        if not os.path.exists(self.dumpfile):
+            logger.error(
+                "No taxdump at %s; was it fetched?", self.dumpfile)
+            return False
+
+        signature = self._get_dump_signature()
+        if os.path.exists(self.cachefile):
+            with open(self.cachefile, 'rb') as f:
+                cached = pickle.load(f)
+            if cached.get('signature') == signature and \
+                    cached.get('version') == self.cache_version:
+                logger.info("Loading taxon index from %s", self.cachefile)
+                self.scientific_names = cached['scientific_names']
+                self.unique_names = cached['unique_names']
+                self.synonyms = cached['synonyms']
+                self.nodes = cached['nodes']
+                self.labels = cached['labels']
+                return True
+
+        logger.info("Building taxon index from %s", self.dumpfile)
+        with tarfile.open(self.dumpfile, 'r:gz') as tar:
+            self._process_nodes(tar.extractfile('nodes.dmp'))
+            self._process_names(tar.extractfile('names.dmp'))
+
+        with open(self.cachefile, 'wb') as f:
+            pickle.dump({
+                'signature': signature,
+                'version': self.cache_version,
+                'scientific_names': self.scientific_names,
+                'unique_names': self.unique_names,
+                'synonyms': self.synonyms,
+                'nodes': self.nodes,
+                'labels': self.labels}, f, pickle.HIGHEST_PROTOCOL)
+        logger.info(
+            "Indexed %d taxa and %d names",
+            len(self.nodes), len(self.synonyms))
+
+        return True
+
+    def _get_dump_signature(self):
+        st = os.stat(self.dumpfile)
+        return st[ST_SIZE], st[ST_MTIME]
+
+    def _process_nodes(self, fh):
+        """
+        nodes.dmp rows look like:
+        tax_id | parent tax_id | rank | embl code | ...
+        :param fh: a binary file handle
+        :return: None
+
+        """
+        for line in fh:
+            cols = line.decode('utf-8').split('\t|\t')
+            self.nodes[cols[0]] = (cols[1], cols[2])
+
+        return
+
+    def _process_names(self, fh):
+        """
+        names.dmp rows look like:
+        tax_id | name_txt | unique name | name class |
+        :param fh: a binary file handle
+        :return: None
+
+        """
+        for line in fh:
+            (tax_num, name, unique_name, name_class) = \
+                line.decode('utf-8').rstrip('\t|\n').split('\t|\t')
+            if name_class not in self.synonym_classes:
+                continue
+            key = self.normalize(name)
+            if name_class == 'scientific name':
+                self.scientific_names.setdefault(key, set()).add(tax_num)
+                self.labels[tax_num] = name
+            if unique_name != '':
+                self.unique_names[self.normalize(unique_name)] = tax_num
+            self.synonyms.setdefault(key, set()).add(tax_num)
+
+        return
+
+    @staticmethod
+    def normalize(label):
+        """
+        Labels are matched case-insensitively,
+        with underscores and runs of whitespace treated as a single space.
+        :param label:
+        :return: the lookup key for the label
+
+        """
+        return re.sub(r'[\s_]+', ' ', label).strip().lower()
+
+    def get_taxon_num(self, label):
+        """
+        Look up the NCBI Taxon number for a label.
+        An unambiguous scientific name (or unique name, for the
+        homonyms that share a scientific name) wins; otherwise the label
+        must be an unambiguous synonym or common name.
+        Like DipperUtil.get_ncbi_taxon_num_by_label,
+        this will only return a result if there is a unique hit.
+        :param label:
+        :return: the taxon number as a string, or None
+
+        """
+        if label is None:
+            return None
+        key = self.normalize(label)
+        tax_num = self.unique_names.get(key)
+        if tax_num is not None:
+            return tax_num
+        hits = self.scientific_names.get(key)
+        if hits is not None:
+            if len(hits) == 1:
+                return next(iter(hits))
+            logger.warning(
+                "Taxon name \"%s\" is shared by %s; "
+                "use its unique name instead", label, str(sorted(hits)))
+            return None
+        hits = self.synonyms.get(key)
+        if hits is not None and len(hits) == 1:
+            tax_num = next(iter(hits))
+        elif hits is not None:
+            logger.warning(
+                "Taxon label \"%s\" is ambiguous: %s", label, str(hits))
+
+        return tax_num
+
+    def get_taxon_nums(self, labels):
+        """
+        Batch version of get_taxon_num()
+        :param labels: an iterable of labels
+        :return: dict of label -> taxon number (or None if unresolved)
+
+        """
+        return {label: self.get_taxon_num(label) for label in set(labels)}
+
+    def get_taxon_id(self, label):
+        """
+        Convenience to get the NCBITaxon curie for a label
+        :param label:
+        :return: NCBITaxon curie, or None
+
+        """
+        tax_num = self.get_taxon_num(label)
+        if tax_num is None:
+            return None
+
+        return ':'.join(('NCBITaxon', tax_num))
+
+    def get_label(self, tax_num):
+        return self.labels.get(str(tax_num))
+
+    def get_rank(self, tax_num):
+        node = self.nodes.get(str(tax_num))
+        if node is None:
+            return None
+
+        return node[1]
+
+    def get_lineage(self, tax_num):
+        """
+        Walk from the given taxon up to the root of the taxonomy.
+        :param tax_num:
+        :return: list of taxon numbers, starting with tax_num itself,
+                 or an empty list if the taxon is unknown
+
+        """
+        lineage = []
+        tax_num = str(tax_num)
+        while tax_num in self.nodes:
+            lineage.append(tax_num)
+            parent = self.nodes[tax_num][0]
+            if parent == tax_num:  # the root is its own parent
+                break
+            tax_num = parent
+
+        return lineage
+
+    def is_descendant_of(self, tax_num, ancestor_num):
+        """
+        :param tax_num:
+        :param ancestor_num:
+        :return: True if ancestor_num is in the lineage of tax_num
+
+        """
+        return str(ancestor_num) in self.get_lineage(tax_num)
@@ -0,0 +1,256 @@
+import io
+import os
+import re
+import gzip
+import json
+import hashlib
+import logging
+
+__author__ = 'nlw'
+
+logger = logging.getLogger(__name__)
+
+
+class TestIdIndex(object):
+    """
+    An index of where the rows that mention any of the test ids are
+    in a raw file, so that test mode can seek straight to those rows,
+    rather than read and filter the whole file to find a few of them.
+
+    A row is indexed if any of its fields (split on tabs, pipes,
+    commas and semicolons), or the local part of a field after its
+    last ':', is one of the ids, as a string.  So it is a superset
+    of the rows that a source keeps in test mode, as long as the source
+    picks its test rows by an id that is in the row itself;
+    the source still applies its own test filter to the indexed rows.
+
+    The index is kept beside the file, as <file>.testidx, with the
+    file's size, modification time and md5, and a digest of the ids.
+    It is used only if the file (by its checksum) and the ids are
+    the ones it was built for.
+    A gzipped file can't be seeked into without decompressing everything
+    before the offset, so for one the indexed rows themselves are copied
+    to <file>.testidx.rows, and the offsets are into that copy.
+    The file is read once to build the index, checksum included.
+
+    Usage:
+        TestIdIndex(path).build(ids)      # at fetch time
+        ...
+        rows = TestIdIndex(path).read_rows(f, ids)
+        if rows is not None:
+            for line in rows:
+
+    """
+
+    # not a test case, despite the name
+    __test__ = False
+
+    suffix = '.testidx'
+    rows_suffix = '.rows'
+    field_separators = re.compile(rb'[\t|,;\r\n]')
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + self.suffix
+        self.compressed = path.endswith('.gz')
+        self.rows_path = self.index_path + self.rows_suffix
+
+        return
+
+    @staticmethod
+    def _id_tokens(ids):
+        return set(str(i).strip().encode('utf-8') for i in ids)
+
+    @classmethod
+    def _ids_digest(cls, ids):
+        digest = hashlib.sha1()
+        for t in sorted(cls._id_tokens(ids)):
+            digest.update(t + b'\n')
+
+        return digest.hexdigest()
+
+    @classmethod
+    def row_matcher(cls, ids):
+        """
+        :param ids: the test ids
+        :return: a function of a line (bytes or str) that is True
+            if the line mentions any of the ids
+        """
+        tokens = cls._id_tokens(ids)
+        separators = cls.field_separators
+
+        def mentions_ids(line):
+            if isinstance(line, str):
+                line = line.encode('utf-8')
+            for field in separators.split(line):
+                if field in tokens or field.rpartition(b':')[2] in tokens:
+                    return True
+            return False
+
+        return mentions_ids
+
+    def _stat(self):
+        st = os.stat(self.path)
+
+        return {'size': st.st_size, 'mtime': st.st_mtime_ns}
+
+    def _md5(self):
+        md5 = hashlib.md5()
+        with open(self.path, 'rb') as f:
+            for chunk in iter(lambda: f.read(2**20), b''):
+                md5.update(chunk)
+
+        return md5.hexdigest()
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return None
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)
+        except ValueError:
+            logger.warning("Ignoring unreadable index %s", self.index_path)
+
+        return None
+
+    def _current(self, index, ids):
+        """
+        :return: True if the index was built for this file and these ids
+        """
+        if index is None or index['ids'] != self._ids_digest(ids):
+            return False
+        stat = self._stat()
+        if index['size'] != stat['size']:
+            return False
+        if index['mtime'] != stat['mtime'] and index['md5'] != self._md5():
+            return False
+
+        return True
+
+    def build(self, ids):
+        """
+        Scan the file, and write the offsets of the rows that mention
+        any of the ids (and, for a gzipped file, a copy of those rows),
+        unless the index is already current.
+        :param ids: the test ids
+        :return: the number of rows indexed
+        """
+        index = self._load()
+        if self._current(index, ids):
+            logger.info("Test id index of %s is current", self.path)
+            return len(index['offsets'])
+
+        mentions_ids = self.row_matcher(ids)
+        offsets = []
+        offset = 0
+        with open(self.path, 'rb') as raw:
+            # checksum the file in the same pass
+            hashed = _HashingReader(raw)
+            f = gzip.GzipFile(fileobj=hashed, mode='rb') \
+                if self.compressed else hashed
+            rows = open(self.rows_path, 'wb') if self.compressed else None
+            try:
+                for line in f:
+                    if mentions_ids(line):
+                        if rows is not None:
+                            offsets.append(rows.tell())
+                            rows.write(line)
+                        else:
+                            offsets.append(offset)
+                    offset += len(line)
+                hashed.read_to_end()
+            finally:
+                if rows is not None:
+                    rows.close()
+
+        index = self._stat()
+        index['md5'] = hashed.md5.hexdigest()
+        index['ids'] = self._ids_digest(ids)
+        index['offsets'] = offsets
+        with open(self.index_path, 'w') as f:
+            json.dump(index, f)
+        logger.info(
+            "Indexed %d rows with test ids in %s", len(offsets), self.path)
+
+        return len(offsets)
+
+    def get_offsets(self, ids):
+        """
+        :param ids: the test ids
+        :return: the sorted offsets of the rows that mention the ids,
+            or None if there is no current index for them
+        """
+        index = self._load()
+        if not self._current(index, ids):
+            return None
+
+        return index['offsets']
+
+    def read_rows(self, f, ids):
+        """
+        The indexed rows, in the mode that the file is open in:
+        from the copy of them, for a gzipped file,
+        or by seeking to each of them, for a plain one.
+        :param f: the file, open for reading
+        :param ids: the test ids
+        :return: an iterable of the lines, or None if there is
+            no current index for the ids
+        """
+        offsets = self.get_offsets(ids)
+        if offsets is None:
+            return None
+        if not self.compressed:
+            return self.read_lines(f, offsets)
+        if isinstance(f, io.TextIOBase):
+            return self._read_copy('r', encoding=f.encoding)
+
+        return self._read_copy('rb')
+
+    def _read_copy(self, mode, encoding=None):
+        with open(self.rows_path, mode, encoding=encoding) as rows:
+            for line in rows:
+                yield line
+
+        return
+
+    @staticmethod
+    def read_lines(f, offsets):
+        """
+        Read just the rows at the given offsets from an open file,
+        in the mode it was opened with.
+        Text files must be in an encoding without shift states (like utf-8),
+        since their offsets are taken as byte positions.
+        :param f: the open file
+        :param offsets: sorted offsets, from get_offsets
+        :return: a generator of the lines
+        """
+        for offset in offsets:
+            f.seek(offset)
+            yield f.readline()
+
+
+class _HashingReader(object):
+    """
+    A binary file wrapper that takes the md5 of what is read through it.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.md5 = hashlib.md5()
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.md5.update(data)
+        return data
+
+    def readline(self, size=-1):
+        data = self.f.readline(size)
+        self.md5.update(data)
+        return data
+
+    def __iter__(self):
+        return iter(self.readline, b'')
+
+    def read_to_end(self):
+        for chunk in iter(lambda: self.read(2**20), b''):
+            pass
@@ -2,6 +2,9 @@ import os
 import logging
 import sys
 from rdflib import Graph
+from dipper import curie_map
+from dipper.utils.BinaryRDF import BinaryRDFStore
+from dipper.utils.CompressedFile import CompressedFile
 
 logger = logging.getLogger(__name__)
 
@@ -16,8 +19,22 @@ class TestUtils:
 
         return
 
+    def get_namespaces(self):
+        """
+        The prefixes a query may use: those of the curie map,
+        as well as those bound in the graph, since only the prefixes
+        that are used get bound when a graph is written.
+        :return: dict of prefix -> namespace
+        """
+        namespaces = dict(self.graph.namespaces())
+        if curie_map.get() is not None:
+            namespaces.update(curie_map.get())
+
+        return namespaces
+
     def query_graph(self, query, is_formatted=False):
-        query_result = self.graph.query(query)
+        query_result = self.graph.query(
+            query, initNs=self.get_namespaces())
         output = []
         for row in query_result:
             result_set = []
@@ -34,25 +51,82 @@ class TestUtils:
 
     def check_query_syntax(self, query, source):
         source.load_bindings()
-        source.graph.query(query)
+        source.graph.query(query, initNs=source.prefixes)
         return
 
-    def load_graph_from_turtle(self, source):
-        file = source.outdir+'/'+source.name+'.ttl'
-        if not os.path.exists(file):
+    @staticmethod
+    def find_file(file):
+        """
+        :param file: an output file name
+        :return: the name it was written with: as it is,
+            or compressed, with .gz or .zst added; or None if neither
+        """
+        for ext in [''] + sorted(CompressedFile.extensions.values()):
+            if os.path.exists(file + ext):
+                return file + ext
+
+        return None
+
+    def parse_file(self, file):
+        """
+        Parse a (possibly compressed) turtle file into the graph,
+        or exit if it isn't there.
+        :param file: the file name, without any compression extension
+        :return: None
+        """
+        found = self.find_file(file)
+        if found is None:
             logger.error("file: %s does not exist", file)
             sys.exit(1)
         # load turtle file into graph
-        self.graph.parse(file, format="turtle")
+        with CompressedFile.open(found, 'rb') as f:
+            self.graph.parse(f, format="turtle")
 
         return
 
-    def load_testgraph_from_turtle(self, source):
-        file = source.outdir+'/'+source.name+'_test.ttl'
+    def load_graph_from_turtle(self, source):
+        self.parse_file(source.outdir+'/'+source.name+'.ttl')
+
+        return
+
+    def load_graph_from_binary(self, source):
+        """
+        Query a source's binary output where it is, memory-mapped,
+        rather than parsing it into a graph; if there is already a graph
+        to query, the two are merged into memory.
+        :param source:
+        :return: None
+        """
+        file = source.outdir+'/'+source.name+'.rdfb'
         if not os.path.exists(file):
             logger.error("file: %s does not exist", file)
             sys.exit(1)
-        # load turtle file into graph
-        self.graph.parse(file, format="turtle")
+        graph = Graph(store=BinaryRDFStore(file))
+        if len(self.graph) == 0:
+            self.graph = graph
+        else:
+            merged = Graph()
+            merged += self.graph
+            merged += graph
+            self.graph = merged
+
+        return
+
+    def load_graph(self, source):
+        """
+        Load a source's output for querying,
+        from its binary output if there is one, or else its turtle.
+        :param source:
+        :return: None
+        """
+        if os.path.exists(source.outdir+'/'+source.name+'.rdfb'):
+            self.load_graph_from_binary(source)
+        else:
+            self.load_graph_from_turtle(source)
+
+        return
+
+    def load_testgraph_from_turtle(self, source):
+        self.parse_file(source.outdir+'/'+source.name+'_test.ttl')
 
         return
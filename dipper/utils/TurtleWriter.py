@@ -0,0 +1,321 @@
+import io
+import re
+import sys
+import logging
+from rdflib import URIRef, BNode, Literal
+from rdflib.namespace import RDF, RDFS, OWL, XSD
+from dipper.utils.CompressedFile import CompressedFile
+
+__author__ = 'nlw'
+
+logger = logging.getLogger(__name__)
+
+
+class TurtleWriter(object):
+    """
+    A streaming Turtle writer, for graphs that are too big to hand to
+    rdflib's serializer, which sorts the subjects, counts references and
+    builds its prefix table before it writes anything.
+
+    This writes the prefixes once up front (from the curie map, or just
+    the ones that used_prefixes() finds), and then one block per run
+    of triples with the same subject, as it reads them:
+        s p o1, o2 ;
+            p2 o3 .
+    write_triples() takes triples in the order they are given, as from
+    a sorted shard; a subject that comes back later just gets another
+    block, which is still valid Turtle.  write_graph() groups them
+    by subject first, since the stores give them in no order.
+    Blank nodes are written as _:labels, never nested.
+
+    The output goes through a large buffer, and is compressed if the file
+    name ends in .gz or .zst (or if compress is set); see CompressedFile.
+
+    Usage:
+        with TurtleWriter('out/mgi.ttl.gz', curie_map.get()) as writer:
+            writer.write_graph(graph)
+
+    """
+
+    # how much to collect before each write
+    buffer_size = 4 * 2**20
+    # how many terms to remember the text of
+    max_cached_terms = 2**18
+
+    standard_prefixes = {
+        'rdf': str(RDF), 'rdfs': str(RDFS), 'owl': str(OWL), 'xsd': str(XSD)}
+
+    # a local name that needs no escapes
+    local_name = re.compile(r'^[A-Za-z0-9_]([A-Za-z0-9_.\-]*[A-Za-z0-9_\-])?$')
+    # where a namespace may end, looking from the end of an iri
+    namespace_ends = re.compile(r'[/#_:=]')
+    literal_escapes = {
+        '\\': '\\\\', '"': '\\"', '\n': '\\n', '\r': '\\r', '\t': '\\t'}
+    literal_specials = re.compile(r'[\\"\n\r\t]')
+    bnode_specials = re.compile(r'[^A-Za-z0-9_]')
+
+    def __init__(self, file=None, curie_map=None, compress=None,
+                 prefixes=None):
+        """
+        :param file: the path to write to, or None for stdout
+        :param curie_map: dict of prefix -> namespace
+        :param compress: True to gzip, 'gzip', 'zstd' or the CompressedFile
+            settings for one; by default, as the extension of file calls for
+        :param prefixes: dict of prefix -> namespace to use instead of
+            the curie map and the standard ones
+        """
+        self.prefixes = self._prefix_table(curie_map, prefixes)
+        self.namespaces = self._namespace_table(self.prefixes)
+
+        if compress is None:
+            compress = file is not None and CompressedFile.codec_of(file)
+        elif compress is True:
+            compress = 'gzip'
+        self.file = file
+        if file is None:
+            self.out = sys.stdout.buffer
+        elif compress:
+            self.out = io.BufferedWriter(
+                CompressedFile.open(file, 'wb', compress), self.buffer_size)
+        else:
+            self.out = open(file, 'wb', buffering=self.buffer_size)
+
+        self.parts = []
+        self.parts_size = 0
+        self.term_cache = {}
+        self.triple_count = 0
+        self.header_written = False
+
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+        return False
+
+    # prefixes
+
+    @classmethod
+    def _prefix_table(cls, curie_map=None, prefixes=None):
+        if prefixes is None:
+            prefixes = dict(cls.standard_prefixes)
+            if curie_map is not None:
+                prefixes.update(curie_map)
+
+        return dict((p, str(ns)) for (p, ns) in prefixes.items() if ns)
+
+    @staticmethod
+    def _namespace_table(prefixes):
+        """
+        :return: dict of namespace -> prefix;
+            the first prefix wins for a namespace
+        """
+        namespaces = {}
+        for p in sorted(prefixes):
+            namespaces.setdefault(prefixes[p], p)
+
+        return namespaces
+
+    @classmethod
+    def _split(cls, namespaces, iri):
+        """
+        :return: tuple of (prefix, local name) to write an iri with,
+            or None if it needs to be written in full
+        """
+        for m in reversed(list(cls.namespace_ends.finditer(iri))):
+            prefix = namespaces.get(iri[:m.end()])
+            if prefix is not None:
+                local = iri[m.end():]
+                if local == '' or cls.local_name.match(local):
+                    return (prefix, local)
+        # an iri that is a whole namespace, like the ontology itself
+        prefix = namespaces.get(iri)
+        if prefix is not None:
+            return (prefix, '')
+
+        return None
+
+    @classmethod
+    def used_prefixes(cls, triples, curie_map=None, prefixes=None):
+        """
+        Find which of the prefixes writing these triples would use,
+        so that only those need be declared (or bound);
+        writing with just these gives the same prefixed names
+        as writing with all of them.
+        :param triples: iterable of (s, p, o)
+        :param curie_map: dict of prefix -> namespace
+        :param prefixes: dict of prefix -> namespace to use instead of
+            the curie map and the standard ones
+        :return: dict of prefix -> namespace
+        """
+        table = cls._prefix_table(curie_map, prefixes)
+        namespaces = cls._namespace_table(table)
+        used = {}
+        # the nodes of a graph are shared between its triples,
+        # so each one need only be looked at once
+        seen = set()
+        for triple in triples:
+            for node in triple:
+                if isinstance(node, Literal):
+                    node = node.datatype
+                if not isinstance(node, URIRef) or node in seen:
+                    continue
+                if len(seen) >= cls.max_cached_terms:
+                    seen.clear()
+                seen.add(node)
+                split = cls._split(namespaces, str(node))
+                if split is not None:
+                    used[split[0]] = table[split[0]]
+
+        return used
+
+    # terms
+
+    def _iri(self, iri):
+        """
+        :return: the prefixed name of an iri, or <iri>
+        """
+        split = self._split(self.namespaces, iri)
+        if split is not None:
+            return split[0] + ':' + split[1]
+        # escape the characters that can't be in an IRIREF
+        return '<' + re.sub(
+            r'[\x00-\x20<>"{}|^`\\]',
+            lambda c: '\\u%04X' % ord(c.group(0)), iri) + '>'
+
+    def _literal(self, literal):
+        text = '"' + self.literal_specials.sub(
+            lambda c: self.literal_escapes[c.group(0)], str(literal)) + '"'
+        if literal.language is not None:
+            return text + '@' + literal.language
+        if literal.datatype is not None:
+            return text + '^^' + self.term(literal.datatype)
+
+        return text
+
+    def term(self, node):
+        """
+        :param node: a URIRef, BNode or Literal
+        :return: its Turtle text
+        """
+        text = self.term_cache.get(node)
+        if text is not None:
+            return text
+        if isinstance(node, Literal):
+            # literals are seldom repeated, so aren't kept
+            return self._literal(node)
+        if isinstance(node, BNode):
+            text = '_:' + self.bnode_specials.sub('_', str(node))
+        elif isinstance(node, URIRef):
+            text = self._iri(str(node))
+        else:
+            raise ValueError("Can't write {0} in Turtle".format(repr(node)))
+        if len(self.term_cache) >= self.max_cached_terms:
+            self.term_cache.clear()
+        self.term_cache[node] = text
+
+        return text
+
+    # output
+
+    def _emit(self, text):
+        self.parts.append(text)
+        self.parts_size += len(text)
+        if self.parts_size >= self.buffer_size:
+            self.flush()
+
+        return
+
+    def flush(self):
+        """
+        Write out what has been collected so far.
+        :return: None
+        """
+        if len(self.parts) > 0:
+            self.out.write(''.join(self.parts).encode('utf-8'))
+            self.parts = []
+            self.parts_size = 0
+
+        return
+
+    def write_header(self):
+        """
+        Write the prefixes; this is done by the first write, if not before.
+        :return: None
+        """
+        if self.header_written:
+            return
+        self.header_written = True
+        for p in sorted(self.prefixes):
+            self._emit('@prefix {0}: <{1}> .\n'.format(p, self.prefixes[p]))
+        self._emit('\n')
+
+        return
+
+    def write_triples(self, triples):
+        """
+        Write triples, as one block for each run of the same subject.
+        :param triples: iterable of (s, p, o)
+        :return: the number of triples written
+        """
+        self.write_header()
+        term = self.term
+        emit = self._emit
+        count = 0
+        (last_s, last_p) = (None, None)
+        for (s, p, o) in triples:
+            if s != last_s:
+                if last_s is not None:
+                    emit(' .\n')
+                emit(term(s) + ' ' + term(p) + ' ' + term(o))
+                (last_s, last_p) = (s, p)
+            elif p != last_p:
+                emit(' ;\n    ' + term(p) + ' ' + term(o))
+                last_p = p
+            else:
+                emit(',\n        ' + term(o))
+            count += 1
+        if last_s is not None:
+            emit(' .\n')
+        self.triple_count += count
+
+        return count
+
+    @staticmethod
+    def grouped_triples(graph):
+        """
+        :param graph: an rdflib graph
+        :return: a generator of its triples, grouped by subject,
+            and then by predicate
+        """
+        for s in set(graph.subjects()):
+            for (p, o) in sorted(
+                    graph.predicate_objects(s), key=lambda po: po[0]):
+                yield (s, p, o)
+
+    def write_graph(self, graph):
+        """
+        :param graph: an rdflib graph
+        :return: the number of triples written
+        """
+
+        return self.write_triples(self.grouped_triples(graph))
+
+    def close(self):
+        """
+        Flush, and close the file (not stdout).
+        :return: None
+        """
+        self.write_header()
+        self.flush()
+        if self.file is not None:
+            self.out.close()
+            logger.info(
+                "Wrote %d triples to %s", self.triple_count, self.file)
+        else:
+            self.out.flush()
+
+        return
@@ -7,7 +7,9 @@ setup(
     version='0.0.1',
     description='Data Ingest Pipeline',
     packages=find_packages(),
+    python_requires='>=3.7',
     install_requires=[
         'psycopg2', 'rdflib', 'isodate', 'roman', 'python-docx', 'pyyaml',
         'pysftp', 'beautifulsoup4', 'GitPython', 'intermine'],
+    extras_require={'parquet': ['pyarrow'], 'zstd': ['zstandard']},
     include_package_data=True)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import tempfile
+import unittest
+import logging
+from rdflib import Graph, URIRef, BNode, Literal
+from rdflib.namespace import RDF, RDFS, OWL, XSD
+from dipper.utils.BinaryRDF import BinaryRDFWriter, BinaryRDFReader, \
+    BinaryRDFStore
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+class BinaryRDFTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'out.rdfb')
+        self.genes = [
+            URIRef('http://www.ncbi.nlm.nih.gov/gene/' + str(n))
+            for n in range(10)]
+        taxon = URIRef('http://purl.obolibrary.org/obo/NCBITaxon_9606')
+        in_taxon = URIRef('http://purl.obolibrary.org/obo/RO_0002162')
+        self.graph = Graph()
+        for (n, gene) in enumerate(self.genes):
+            self.graph.add((gene, RDF['type'], OWL['Class']))
+            self.graph.add((gene, RDFS['label'], Literal('gene ' + str(n))))
+            if n % 2 == 0:
+                self.graph.add((gene, in_taxon, taxon))
+        self.graph.add((self.genes[0], RDFS['comment'],
+                        Literal('été "0"\n', lang='fr')))
+        self.graph.add((self.genes[0], RDFS['seeAlso'], BNode('b0')))
+        self.graph.add((BNode('b0'), RDFS['label'],
+                        Literal('7', datatype=XSD['integer'])))
+        BinaryRDFWriter(self.path, {
+            'NCBIGene': 'http://www.ncbi.nlm.nih.gov/gene/'}).write_graph(
+                self.graph)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_patterns(self):
+        terms = [None, self.genes[0], self.genes[1], RDF['type'],
+                 RDFS['label'], OWL['Class'], BNode('b0'),
+                 Literal('gene 3'), Literal('7', datatype=XSD['integer']),
+                 URIRef('http://purl.obolibrary.org/obo/NCBITaxon_9606'),
+                 URIRef('http://example.org/missing')]
+        with BinaryRDFReader(self.path) as reader:
+            self.assertEqual(len(reader), len(self.graph))
+            for s in terms:
+                for p in terms:
+                    for o in terms:
+                        self.assertEqual(
+                            set(reader.triples((s, p, o))),
+                            set(self.graph.triples((s, p, o))),
+                            (s, p, o))
+
+    def test_store(self):
+        graph = Graph(store=BinaryRDFStore(self.path))
+        self.assertEqual(len(graph), len(self.graph))
+        result = graph.query(
+            'SELECT ?gene WHERE { ?gene rdfs:label "gene 3" }',
+            initNs={'rdfs': RDFS})
+        self.assertEqual([row[0] for row in result], [self.genes[3]])
+        self.assertIn(
+            ('NCBIGene', URIRef('http://www.ncbi.nlm.nih.gov/gene/')),
+            list(graph.namespaces()))
+        graph.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
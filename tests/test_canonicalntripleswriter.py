@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import tempfile
+import unittest
+import logging
+import multiprocessing
+from rdflib import ConjunctiveGraph, Graph, URIRef, BNode, Literal
+from rdflib.compare import isomorphic
+from rdflib.namespace import RDF, RDFS, OWL
+from dipper.utils.CanonicalNTriplesWriter import CanonicalNTriplesWriter
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+class CanonicalNTriplesWriterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def _graph(self, order, bnode_ids):
+        """
+        The same graph, with its triples added in the given order,
+        and its blank nodes made with the given ids.
+        """
+        triples = []
+        for n in range(30):
+            gene = URIRef('http://www.ncbi.nlm.nih.gov/gene/' + str(n))
+            triples += [
+                (gene, RDF['type'], OWL['Class']),
+                (gene, RDFS['label'], Literal('gene ' + str(n))),
+                (gene, RDFS['comment'], Literal('ä "line"\nnext', lang='en'))]
+        # a chain of blank nodes, and two alike ones
+        (b1, b2, b3, b4) = [BNode(i) for i in bnode_ids]
+        gene = URIRef('http://www.ncbi.nlm.nih.gov/gene/1')
+        triples += [
+            (gene, RDFS['seeAlso'], b1),
+            (b1, RDFS['seeAlso'], b2),
+            (b2, RDFS['label'], Literal('end')),
+            (gene, OWL['sameAs'], b3),
+            (gene, OWL['sameAs'], b4)]
+        graph = ConjunctiveGraph()
+        for i in order(range(len(triples))):
+            graph.add(triples[i])
+        return graph
+
+    def _write(self, graph, name, **kwargs):
+        path = os.path.join(self.dir, name)
+        with CanonicalNTriplesWriter(path, **kwargs) as writer:
+            writer.write_graph(graph)
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def test_stable(self):
+        graph = self._graph(list, ['a', 'b', 'c', 'd'])
+        first = self._write(graph, 'first.nt', workers=1)
+        # another order, other labels, and sorted in runs in parallel
+        other = self._graph(reversed, ['x9', 'y8', 'z7', 'w6'])
+        CanonicalNTriplesWriter.run_size = 500
+        try:
+            second = self._write(other, 'second.nt', workers=2)
+        finally:
+            CanonicalNTriplesWriter.run_size = 2**26
+        self.assertEqual(first, second)
+
+        lines = first.decode('utf-8').splitlines(True)
+        self.assertEqual(lines, sorted(set(lines)))
+        self.assertEqual(len(lines), len(graph))
+        parsed = Graph()
+        parsed.parse(os.path.join(self.dir, 'first.nt'), format='nt')
+        self.assertTrue(isomorphic(parsed, graph))
+        self.assertEqual(os.listdir(self.dir), ['first.nt', 'second.nt'])
+
+    def test_alike_bnodes(self):
+        # two alike blank nodes, each with an alike one of its own
+        gene = URIRef('http://www.ncbi.nlm.nih.gov/gene/1')
+        outputs = set()
+        for (n, ids) in enumerate([
+                ['a', 'b', 'c', 'd'], ['d', 'c', 'b', 'a'],
+                ['q', 'z', 'x', 'e'], ['n7', 'n1', 'n9', 'n3']]):
+            (b1, b2, c1, c2) = [BNode(i) for i in ids]
+            graph = Graph()
+            for triple in [
+                    (gene, OWL['sameAs'], b1), (gene, OWL['sameAs'], b2),
+                    (b1, RDFS['seeAlso'], c1), (b2, RDFS['seeAlso'], c2),
+                    (c1, RDFS['label'], Literal('x')),
+                    (c2, RDFS['label'], Literal('x'))]:
+                graph.add(triple)
+            outputs.add(self._write(graph, str(n) + '.nt', workers=1))
+        self.assertEqual(len(outputs), 1)
+        labels = set(
+            t for line in outputs.pop().decode('utf-8').splitlines()
+            for t in line.split() if t.startswith('_:'))
+        self.assertEqual(len(labels), 4)
+
+    def test_pool_started(self):
+        # before any threads are feeding it
+        path = os.path.join(self.dir, 'out.nt')
+        with CanonicalNTriplesWriter(path, workers=2):
+            self.assertGreaterEqual(len(multiprocessing.active_children()), 2)
+
+    def test_sort_files(self):
+        files = []
+        for (n, text) in enumerate([
+                '<http://x/b> <http://x/p> "1" .\n'
+                '<http://x/a> <http://x/p> "1" .\n',
+                '<http://x/a> <http://x/p> "1" .\n'
+                '<http://x/c> <http://x/p> "1" .']):
+            files.append(os.path.join(self.dir, 'part-{0}.nt'.format(n)))
+            with open(files[-1], 'w') as f:
+                f.write(text)
+        path = os.path.join(self.dir, 'all.nt')
+        count = CanonicalNTriplesWriter.sort_files(files, path, workers=1)
+        self.assertEqual(count, 3)
+        with open(path) as f:
+            self.assertEqual(
+                [line[:12] for line in f],
+                ['<http://x/a>', '<http://x/b>', '<http://x/c>'])
+
+
+if __name__ == '__main__':
+    unittest.main()
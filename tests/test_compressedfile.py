@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+import os
+import gzip
+import shutil
+import tempfile
+import unittest
+import logging
+from rdflib import ConjunctiveGraph, Graph, URIRef, Literal
+from rdflib.compare import isomorphic
+from rdflib.namespace import RDF, RDFS, OWL
+from dipper.utils.CompressedFile import CompressedFile
+from dipper.utils.TurtleWriter import TurtleWriter
+from dipper.utils.GraphUtils import GraphUtils
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+class CompressedFileTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.curie_map = {'NCBIGene': 'http://www.ncbi.nlm.nih.gov/gene/'}
+        self.graph = ConjunctiveGraph()
+        for n in range(20):
+            gene = URIRef('http://www.ncbi.nlm.nih.gov/gene/' + str(n))
+            self.graph.add((gene, RDF['type'], OWL['Class']))
+            self.graph.add((gene, RDFS['label'], Literal('gene ' + str(n))))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def _parse(self, path):
+        graph = Graph()
+        with CompressedFile.open(path, 'rb') as f:
+            graph.parse(f, format='turtle')
+        return graph
+
+    def test_splitext(self):
+        self.assertEqual(
+            CompressedFile.splitext('out/mgi.csv.gz'), ('out/mgi', '.csv.gz'))
+        self.assertEqual(
+            CompressedFile.splitext('out/mgi.ttl.zst'),
+            ('out/mgi', '.ttl.zst'))
+        self.assertEqual(
+            CompressedFile.splitext('out/mgi.ttl'), ('out/mgi', '.ttl'))
+        self.assertIsNone(CompressedFile.codec_of('out/mgi.ttl'))
+
+    def test_gzip(self):
+        path = os.path.join(self.dir, 'out.ttl.gz')
+        with TurtleWriter(path, self.curie_map) as writer:
+            writer.write_graph(self.graph)
+        # it is a plain gzip file
+        with gzip.open(path, 'rt') as f:
+            self.assertIn('NCBIGene:1 ', f.read())
+        self.assertTrue(isomorphic(self._parse(path), self.graph))
+
+    def test_text(self):
+        path = os.path.join(self.dir, 'out.txt.gz')
+        with CompressedFile.open(path, 'wt') as f:
+            f.write('café\n')
+        with CompressedFile.open(path, 'rt') as f:
+            self.assertEqual(f.read(), 'café\n')
+
+    def test_settings(self):
+        fast = CompressedFile('gzip', level=1)
+        path = os.path.join(self.dir, 'out.txt.gz')
+        for (codec, flags) in ((fast, 4), (None, 0)):
+            with CompressedFile.open(path, 'wb', codec) as f:
+                f.write(b'x' * 1000)
+            # the header's extra flags: 4 for the fastest level
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(9)[8], flags)
+        # the defaults are left as they were
+        self.assertEqual(CompressedFile.levels['gzip'], 6)
+        with self.assertRaises(ValueError):
+            CompressedFile('bzip2')
+
+    @unittest.skipUnless(CompressedFile.is_available('zstd'), 'needs zstd')
+    def test_zstd(self):
+        path = os.path.join(self.dir, 'out.ttl.zst')
+        with TurtleWriter(path, self.curie_map) as writer:
+            writer.write_graph(self.graph)
+        with open(path, 'rb') as f:
+            # the zstd frame magic number
+            self.assertEqual(f.read(4), b'\x28\xb5\x2f\xfd')
+        self.assertTrue(isomorphic(self._parse(path), self.graph))
+
+    @unittest.skipUnless(CompressedFile.is_available('zstd'), 'needs zstd')
+    def test_zstd_shards(self):
+        path = os.path.join(self.dir, 'out.ttl.zst')
+        GraphUtils(self.curie_map).write_shards(
+            self.graph, path, 3, workers=1, concatenate=True)
+        self.assertEqual(os.listdir(self.dir), ['out.ttl.zst'])
+        self.assertTrue(isomorphic(self._parse(path), self.graph))
+
+
+if __name__ == '__main__':
+    unittest.main()
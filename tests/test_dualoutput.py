@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+
+import os
+import gzip
+import shutil
+import tempfile
+import unittest
+import logging
+from rdflib import URIRef
+from rdflib.compare import isomorphic
+from dipper.sources.NCBIGene import NCBIGene
+from dipper.utils.SpillDict import SpillDict
+from dipper.utils.GraphUtils import GraphUtils
+from dipper import curie_map
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+GENE = 'http://www.ncbi.nlm.nih.gov/gene/'
+
+
+class DualOutputTestCase(unittest.TestCase):
+    """
+    Writing the test subset from the same parse as the full graph
+    must give the same testgraph as a parse in test mode.
+    """
+
+    # genes 1 and 2 are test genes; 2 and 4 are of a taxon not parsed
+    gene_info = [
+        '#tax_id\tGeneID\tSymbol\tLocusTag\tSynonyms\tdbXrefs\tchromosome'
+        '\tmap_location\tdescription\ttype_of_gene'
+        '\tSymbol_from_nomenclature_authority'
+        '\tFull_name_from_nomenclature_authority\tNomenclature_status'
+        '\tOther_designations\tModification_date',
+        '9606\t1\tA1BG\t-\tA1B|ABG\tMIM:138670|HGNC:HGNC:5\t19\t19q13.4'
+        '\talpha-1-B glycoprotein\tprotein-coding\tA1BG'
+        '\talpha-1-B glycoprotein\tO\tHEL-S-163pA\t20150101',
+        '9615\t2\tA2M\t-\t-\t-\t27\t-\talpha-2-macroglobulin'
+        '\tprotein-coding\t-\t-\t-\t-\t20150101',
+        '9606\t3\tA2MP1\t-\tA2MP\tHGNC:HGNC:8\t12\t12p13.31'
+        '\talpha-2-macroglobulin pseudogene 1\tpseudo\tA2MP1'
+        '\talpha-2-macroglobulin pseudogene 1\tO\t-\t20150101',
+        '9615\t4\tNAT1\t-\t-\t-\t-\t-\tN-acetyltransferase 1'
+        '\tprotein-coding\t-\t-\t-\t-\t20150101']
+    gene_history = [
+        '#tax_id\tGeneID\tDiscontinued_GeneID\tDiscontinued_Symbol'
+        '\tDiscontinue_Date',
+        '9606\t1\t101\tA1BG-old\t20050101',
+        '9615\t2\t102\tA2M-old\t20050101',
+        '9606\t3\t103\tA2MP1-old\t20050101',
+        '9615\t4\t104\tNAT1-old\t20050101']
+    gene2pubmed = [
+        '#tax_id\tGeneID\tPubMed_ID',
+        '9606\t1\t2591067',
+        '9615\t2\t3458201',
+        '9606\t3\t8889548',
+        '9615\t4\t1234567']
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.dir = tempfile.mkdtemp()
+        os.chdir(self.dir)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir)
+
+    def _source(self):
+        source = NCBIGene(tax_ids=[9606])
+        source.gene_ids = [1, 2]
+        for (key, rows) in (('gene_info', self.gene_info),
+                            ('gene_history', self.gene_history),
+                            ('gene2pubmed', self.gene2pubmed)):
+            path = '/'.join((source.rawdir, source.files[key]['file']))
+            with gzip.open(path, 'wt') as f:
+                f.write('\n'.join(rows) + '\n')
+        return source
+
+    @staticmethod
+    def _genes(graph):
+        return set(
+            str(s)[len(GENE):] for s in graph.subjects()
+            if str(s).startswith(GENE))
+
+    def test_same_testgraph(self):
+        test_mode = self._source()
+        test_mode.settestonly(True)
+        test_mode.parse()
+
+        dual = self._source()
+        dual.setdualoutput(True)
+        # looked up from disk, a batch at a time
+        dual.class_or_indiv = SpillDict(max_in_memory=1)
+        dual.parse()
+        dual.class_or_indiv.close()
+
+        self.assertEqual(self._genes(test_mode.testgraph), {
+            '1', '2', '101', '102'})
+        self.assertTrue(isomorphic(test_mode.testgraph, dual.testgraph))
+        # the test gene of another taxon is only in the testgraph
+        self.assertEqual(self._genes(dual.graph), {'1', '3', '101', '103'})
+        self.assertNotIn(
+            (URIRef(GENE + '2'), None, None), dual.graph)
+
+    def test_marked_rows(self):
+        source = self._source()
+        source.setdualoutput(True)
+        marks = []
+        for row in source.test_rows(
+                ['a', 'b', 'c'], 'rows', [], lambda row: row != 'b',
+                lambda row: row != 'c'):
+            marks.append(
+                (row, source.in_test_row(), source.in_test_only_row()))
+        self.assertEqual(marks, [
+            ('a', True, False), ('b', False, False), ('c', True, True)])
+        self.assertFalse(source.in_test_row())
+
+    def test_looked_up_rows(self):
+        source = self._source()
+        source.setdualoutput(True)
+        lookup = SpillDict(max_in_memory=1)
+        for key in 'abc':
+            lookup[key] = key.upper()
+        marks = []
+        for (row, value) in source.looked_up_rows(
+                source.test_rows(
+                    ['a', 'b', 'c', 'x'], 'rows', [], lambda row: row != 'b',
+                    lambda row: row != 'c'),
+                lookup, lambda row: row, size=3):
+            marks.append(
+                (row, value, source.in_test_row(),
+                 source.in_test_only_row()))
+        lookup.close()
+        # the marks of each row, although its batch was read ahead
+        self.assertEqual(marks, [
+            ('a', 'A', True, False), ('b', 'B', False, False),
+            ('c', 'C', True, True), ('x', None, True, False)])
+        self.assertFalse(source.in_test_row())
+
+    def test_helpers_and_quads(self):
+        source = self._source()
+        source.setdualoutput(True)
+        gu = GraphUtils(curie_map.get())
+        graph = source.graph
+        before = len(source.testgraph)
+        for row in source.test_rows(
+                ['1', '2', '3'], 'rows', [], lambda row: row != '2',
+                lambda row: row != '3'):
+            gene = 'NCBIGene:' + row
+            gu.addClassToGraph(graph, gene, 'gene ' + row)
+            node = gu.getNode(gene)
+            graph.addN([
+                (node, URIRef(GENE + 'see'), URIRef(GENE + 'x' + row),
+                 graph.default_context)])
+            graph.add(
+                (node, URIRef(GENE + 'also'), URIRef(GENE + 'y' + row),
+                 graph.default_context))
+        self.assertEqual(self._genes(source.testgraph), {'1', '3'})
+        # type, label and both links of each test gene
+        self.assertEqual(len(source.testgraph) - before, 8)
+        self.assertEqual(self._genes(graph), {'1', '2'})
+        self.assertNotIn((URIRef(GENE + '3'), None, None), graph)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import tempfile
+import unittest
+import logging
+from rdflib import URIRef, BNode, Literal
+from rdflib.compare import isomorphic
+from rdflib.namespace import RDF, RDFS, OWL
+from dipper.sources.Source import Source
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+class ToySource(Source):
+    """
+    Adds a few triples for each of its taxa, one of them to the testgraph.
+    """
+
+    def __init__(self, workers):
+        super().__init__('toy')
+        self.setparseworkers(workers)
+        self.failing = None
+
+    def parse(self, taxa):
+        self.fan_out(self._process_taxon, taxa)
+
+    def _process_taxon(self, taxon):
+        if taxon == self.failing:
+            raise ValueError('bad taxon ' + str(taxon))
+        for n in range(20):
+            gene = URIRef('http://x/gene/{0}-{1}'.format(taxon, n))
+            self.graph.add((gene, RDF['type'], OWL['Class']))
+            self.graph.add((gene, RDFS['label'], Literal('gene ' + str(n))))
+            anchor = BNode()
+            self.graph.add((gene, RDFS['seeAlso'], anchor))
+            self.graph.add((anchor, RDFS['label'], Literal(str(taxon))))
+        self.testgraph.add((gene, RDF['type'], OWL['Class']))
+
+
+class FanOutTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.dir = tempfile.mkdtemp()
+        os.chdir(self.dir)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir)
+
+    def test_same_as_serial(self):
+        taxa = [9606, 10090, 7955, 6239]
+        serial = ToySource(1)
+        serial.parse(taxa)
+        forked = ToySource(2)
+        forked.parse(taxa)
+        # less the ontology declaration, which is timestamped
+        ontology = URIRef('http://data.monarchinitiative.org/ttl/toy.ttl')
+        for source in (serial, forked):
+            source.graph.remove((ontology, None, None))
+            source.testgraph.remove((ontology, None, None))
+        self.assertEqual(len(forked.graph), 4 * 20 * 4)
+        self.assertTrue(isomorphic(serial.graph, forked.graph))
+        self.assertEqual(len(forked.testgraph), 4)
+        self.assertTrue(isomorphic(serial.testgraph, forked.testgraph))
+
+    def test_failing_partition(self):
+        source = ToySource(2)
+        source.failing = 7955
+        with self.assertRaisesRegex(ValueError, 'bad taxon 7955'):
+            source.parse([9606, 10090, 7955, 6239])
+
+
+if __name__ == '__main__':
+    unittest.main()
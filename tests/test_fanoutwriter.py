@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import tempfile
+import unittest
+import logging
+from rdflib import ConjunctiveGraph, Graph, URIRef, BNode, Literal
+from rdflib.compare import isomorphic
+from rdflib.namespace import RDF, RDFS, OWL, XSD
+from dipper.utils.FanOutWriter import FanOutWriter
+from dipper.utils.TurtleWriter import TurtleWriter
+from dipper.utils.NTriplesWriter import NTriplesWriter
+from dipper.utils.JSONLDWriter import JSONLDWriter
+from dipper.utils.GraphUtils import GraphUtils
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+class FailingWriter(object):
+
+    def write_triples(self, triples):
+        for triple in triples:
+            raise IOError("disk full")
+
+
+class FanOutWriterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.curie_map = {
+            'NCBIGene': 'http://www.ncbi.nlm.nih.gov/gene/',
+            'OBO': 'http://purl.obolibrary.org/obo/',
+            'NCBITaxon': 'http://purl.obolibrary.org/obo/NCBITaxon_'}
+        self.graph = ConjunctiveGraph()
+        for n in range(50):
+            gene = URIRef('http://www.ncbi.nlm.nih.gov/gene/' + str(n))
+            for t in [
+                    (gene, RDF['type'], OWL['Class']),
+                    (gene, RDF['type'],
+                        URIRef('http://purl.obolibrary.org/obo/SO_0000704')),
+                    (gene, RDFS['label'], Literal('gene ' + str(n))),
+                    (gene, RDFS['comment'],
+                        Literal('a "quoted"\\ line\nand\ttab', lang='en')),
+                    (gene, URIRef('http://purl.obolibrary.org/obo/RO_0002162'),
+                        URIRef(
+                            'http://purl.obolibrary.org/obo/NCBITaxon_9606')),
+                    (gene, OWL['versionInfo'],
+                        Literal(str(n), datatype=XSD['integer'])),
+                    (gene, RDFS['seeAlso'], BNode('b' + str(n))),
+                    (BNode('b' + str(n)), RDFS['label'],
+                        Literal('node ' + str(n)))]:
+                self.graph.add(t)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def _parse(self, path, fileformat):
+        graph = Graph()
+        graph.parse(path, format=fileformat)
+        return graph
+
+    def test_ntriples(self):
+        path = os.path.join(self.dir, 'out.nt')
+        with NTriplesWriter(path) as writer:
+            writer.write_graph(self.graph)
+        self.assertTrue(isomorphic(self._parse(path, 'nt'), self.graph))
+
+    def test_jsonld(self):
+        path = os.path.join(self.dir, 'out.jsonld')
+        with JSONLDWriter(path, self.curie_map) as writer:
+            writer.write_graph(self.graph)
+        self.assertTrue(
+            isomorphic(self._parse(path, 'json-ld'), self.graph))
+
+    def test_fan_out(self):
+        paths = dict(
+            (f, os.path.join(self.dir, 'out.' + f))
+            for f in ('ttl', 'nt', 'jsonld'))
+        writers = [
+            TurtleWriter(paths['ttl'], self.curie_map),
+            NTriplesWriter(paths['nt']),
+            JSONLDWriter(paths['jsonld'], self.curie_map)]
+        with FanOutWriter(writers) as writer:
+            writer.chunk_size = 7
+            writer.write_graph(self.graph)
+        for (xtn, fileformat) in (
+                ('ttl', 'turtle'), ('nt', 'nt'), ('jsonld', 'json-ld')):
+            self.assertTrue(isomorphic(
+                self._parse(paths[xtn], fileformat), self.graph), xtn)
+
+    def test_writer_error(self):
+        path = os.path.join(self.dir, 'out.nt')
+        writer = FanOutWriter([FailingWriter(), NTriplesWriter(path)])
+        writer.write_graph(self.graph)
+        with self.assertRaises(IOError):
+            writer.close()
+        # the other writer still finished
+        self.assertTrue(isomorphic(self._parse(path, 'nt'), self.graph))
+
+    def test_write_formats(self):
+        files = {
+            'turtle': os.path.join(self.dir, 'out.ttl'),
+            'json-ld': os.path.join(self.dir, 'out.jsonld'),
+            'xml': os.path.join(self.dir, 'out.xml')}
+        GraphUtils(self.curie_map).write_formats(self.graph, files)
+        for (fileformat, path) in (
+                ('turtle', files['turtle']), ('json-ld', files['json-ld']),
+                ('xml', files['xml'])):
+            self.assertTrue(isomorphic(
+                self._parse(path, fileformat), self.graph), fileformat)
+
+
+if __name__ == '__main__':
+    unittest.main()
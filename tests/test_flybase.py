@@ -44,13 +44,12 @@ class FlyBaseTestCase(SourceTestCase):
         raw = '/'.join((self.source.rawdir, 'cvterm'))
         logger.info("processing cvterms")
         cvterms_from_file = {}
-        with open(raw, 'r') as f:
+        with self.source.open_table(raw) as f:
             f.readline()  # read the header row; skip
             filereader = csv.reader(f, delimiter='\t', quotechar='\"')
             for line in filereader:
                 line_counter += 1
-                (cvterm_id, cv_id, definition, dbxref_id, is_obsolete,
-                 is_relationshiptype, name) = line
+                (cvterm_id, dbxref_id, name) = line
 
                 cvterms_from_file[int(cvterm_id)] = name
 
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+import unittest
+import logging
+import pickle
+import multiprocessing
+from dipper.utils.FrozenLookup import FrozenLookup
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+def _lookup_in_worker(args):
+    (table, key) = args
+    return table.get(key)
+
+
+class FrozenLookupTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.ids = {
+            '12345': 'MGI:97490', '2': 'MGI:1', 'ümlaut': 'ZFIN:ZDB-1',
+            '': 'empty key'}
+        self.table = FrozenLookup.build(self.ids)
+
+    def tearDown(self):
+        self.table.unlink()
+        self.table = None
+
+    def test_lookup(self):
+        self.assertEqual(len(self.table), 4)
+        for (k, v) in self.ids.items():
+            self.assertEqual(self.table[k], v)
+        self.assertIsNone(self.table.get('123'))
+        self.assertNotIn(12345, self.table)
+        self.assertEqual(dict(self.table.items()), self.ids)
+
+    def test_multivalued(self):
+        table = FrozenLookup.build(
+            {'P1': ['NCBIGene:1', 'NCBIGene:2'], 'P2': [], 'P3': [''],
+             'P4': ['', '']})
+        try:
+            self.assertEqual(table['P1'], ('NCBIGene:1', 'NCBIGene:2'))
+            self.assertEqual(table['P2'], ())
+            self.assertEqual(table['P3'], ('',))
+            self.assertEqual(table['P4'], ('', ''))
+        finally:
+            table.unlink()
+
+    def test_mixed_values(self):
+        with self.assertRaises(ValueError):
+            FrozenLookup.build({'P1': ['NCBIGene:1'], 'P2': 'NCBIGene:2'})
+        with self.assertRaises(ValueError):
+            FrozenLookup.build({'P1': 'NCBIGene:1', 'P2': ['NCBIGene:2']})
+        with self.assertRaises(ValueError):
+            FrozenLookup.build({'P1': ['a' + FrozenLookup.separator]})
+
+    def test_empty(self):
+        table = FrozenLookup.build({})
+        try:
+            self.assertEqual(len(table), 0)
+            self.assertIsNone(table.get('x'))
+        finally:
+            table.unlink()
+
+    def test_stream(self):
+        pairs = [('P' + str(n % 37), ['NCBIGene:' + str(n)])
+                 for n in range(200)]
+        FrozenLookup.run_size = 16
+        try:
+            table = FrozenLookup.build(iter(pairs))
+        finally:
+            FrozenLookup.run_size = 2**20
+        try:
+            # the last pair for each key wins
+            self.assertEqual(dict(table.items()), dict(
+                (k, tuple(v)) for (k, v) in pairs))
+            self.assertEqual(list(table), sorted(dict(pairs)))
+        finally:
+            table.unlink()
+
+    def test_pickles_by_name(self):
+        self.assertLess(len(pickle.dumps(self.table)), 200)
+        with multiprocessing.get_context('spawn').Pool(1) as pool:
+            self.assertEqual(
+                pool.map(_lookup_in_worker, [(self.table, '12345')]),
+                ['MGI:97490'])
+        # the worker detaching did not free the table
+        self.assertEqual(self.table['2'], 'MGI:1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+import unittest
+import logging
+from dipper.utils.IdFilter import IdFilter
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+class IdFilterTestCase(unittest.TestCase):
+
+    def test_numbers(self):
+        taxa = IdFilter([9606, '10090', 7955])
+        for t in (9606, '9606', b'9606', '10090', 7955):
+            self.assertIn(t, taxa)
+        for t in (9607, '96060', '', 'NCBITaxon:9606', -9606, 10 ** 9):
+            self.assertNotIn(t, taxa)
+        # a few large, sparse ids aren't worth a bitmap
+        self.assertIsNone(taxa.bitmap)
+        self.assertIsNotNone(IdFilter(range(0, 1000, 3)).bitmap)
+        self.assertIn(999, IdFilter(range(0, 1000, 3)))
+        self.assertNotIn(998, IdFilter(range(0, 1000, 3)))
+
+    def test_strings_and_strip(self):
+        diseases = IdFilter(['Orphanet:93', 'OMIM:100100'])
+        self.assertIn('Orphanet:93', diseases)
+        self.assertNotIn('Orphanet:930', diseases)
+        taxa = IdFilter([9606], strip='taxid:')
+        self.assertIn('taxid:9606', taxa)
+        self.assertIn(9606, taxa)
+        self.assertNotIn('taxid:10090', taxa)
+
+    def test_accept_rows(self):
+        pair = IdFilter([1, 2], columns=[0, 2])
+        self.assertTrue(pair.accept(['1', 'x', '2']))
+        self.assertFalse(pair.accept(['1', 'x', '3']))
+        either = IdFilter([1, 2], columns=[0, 2], match='any')
+        self.assertTrue(either.accept(['1', 'x', '3']))
+        everything = IdFilter(None)
+        self.assertTrue(everything.accept(['anything']))
+        self.assertTrue(everything.accept_line(b'#comment'))
+        self.assertIn('x', everything)
+        with self.assertRaises(ValueError):
+            IdFilter([1], match='some')
+
+    def test_accept_lines(self):
+        taxa = IdFilter([9606, 7955])
+        self.assertTrue(taxa.accept_line(b'9606\t1\tA1BG\n'))
+        self.assertFalse(taxa.accept_line(b'96060\t1\tA1BG\n'))
+        self.assertFalse(taxa.accept_line(b'#tax_id\tGeneID\n'))
+        self.assertTrue(taxa.accept_line(b'7955\n'))
+        self.assertFalse(taxa.accept_line(b'795\t1\n'))
+        curies = IdFilter(['NCBITaxon:9606', 'x'], strip='NCBITaxon:')
+        self.assertTrue(curies.accept_line(b'NCBITaxon:9606\t1\n'))
+        self.assertTrue(curies.accept_line(b'x\t1\n'))
+        self.assertFalse(curies.accept_line(b'NCBITaxon:96\t1\n'))
+        genes = IdFilter([1, 17], columns=[1])
+        self.assertTrue(genes.accept_line(b'9606\t17\tX\n'))
+        self.assertTrue(genes.accept_line('9606\t1\n'))
+        self.assertFalse(genes.accept_line(b'9606\t170\tX\n'))
+        self.assertFalse(genes.accept_line(b'9606\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
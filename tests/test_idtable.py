@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+import unittest
+import logging
+import random
+import timeit
+import tracemalloc
+from unittest import mock
+from dipper import config
+from dipper.utils.IdTable import IdTable
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+class IdTableTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.table = IdTable()
+        self.table.min_pending = 8
+
+    def tearDown(self):
+        self.table = None
+
+    def test_matches_dict(self):
+        expected = {}
+        keys = list(range(1000))
+        random.Random(0).shuffle(keys)
+        for k in keys + keys[:100]:
+            self.table[str(k)] = 'MGI:' + str(k * 7)
+            expected[str(k)] = 'MGI:' + str(k * 7)
+        self.table['42'] = 'MGI:replaced'
+        expected['42'] = 'MGI:replaced'
+        self.assertEqual(len(self.table), 1000)
+        self.assertEqual(dict(self.table.items()), expected)
+        self.assertEqual(list(self.table), sorted(expected, key=int))
+        self.assertEqual(dict(self.table), expected)
+
+    def test_str_and_int_keys(self):
+        self.table['12345'] = 'MGI:97490'
+        self.assertEqual(self.table[12345], 'MGI:97490')
+        self.assertIn('12345', self.table)
+        self.assertIsNone(self.table.get('54321'))
+        self.assertNotIn('', self.table)
+
+    def test_key_types_kept(self):
+        self.table['1'] = 'a'
+        self.table[2] = 'b'
+        self.table['-3'] = 'c'
+        self.assertEqual(list(self.table), ['-3', '1', 2])
+        self.table[1] = 'a'
+        self.assertEqual(list(self.table), ['-3', 1, 2])
+
+    def test_non_canonical_keys(self):
+        for key in ('012', ' 12', '12 ', '+12', '1_2', '１２'):
+            self.table[key] = key
+        self.table['12'] = 'twelve'
+        self.assertEqual(len(self.table), 7)
+        self.assertEqual(self.table[12], 'twelve')
+        self.assertEqual(self.table['012'], '012')
+        self.assertEqual(
+            sorted(self.table, key=str),
+            sorted(['012', ' 12', '12 ', '+12', '1_2', '１２', '12']))
+
+    def test_overwrite_reclaims_heap(self):
+        for n in range(50):
+            for k in range(20):
+                self.table[k] = 'MGI:{0}-{1}'.format(k, n)
+        self.table._merge()
+        self.assertLess(len(self.table.heap), 3 * 20 * len('MGI:19-49'))
+        self.assertEqual(self.table[19], 'MGI:19-49')
+        for k in range(15):
+            del self.table[k]
+        self.table[0] = 'MGI:0'
+        self.table._merge()
+        self.assertLess(len(self.table.heap), 3 * 6 * len('MGI:19-49'))
+        self.assertEqual(
+            dict(self.table),
+            {0: 'MGI:0', 15: 'MGI:15-49', 16: 'MGI:16-49',
+             17: 'MGI:17-49', 18: 'MGI:18-49', 19: 'MGI:19-49'})
+
+    def test_other_keys(self):
+        self.table['FBgn0001'] = 'FlyBase:FBgn0001'
+        self.table[2**70] = 'big'
+        self.assertEqual(self.table['FBgn0001'], 'FlyBase:FBgn0001')
+        self.assertEqual(self.table[2**70], 'big')
+        self.assertEqual(len(self.table), 2)
+
+    def test_delete(self):
+        for k in range(20):
+            self.table[k] = str(k)
+        del self.table['3']
+        self.assertNotIn(3, self.table)
+        self.assertEqual(len(self.table), 19)
+        with self.assertRaises(KeyError):
+            del self.table[3]
+
+    def test_join_table(self):
+        with mock.patch.dict(config.get_config(), {'id_tables': {}}):
+            self.assertIs(type(IdTable.join_table()), dict)
+        with mock.patch.dict(
+                config.get_config(), {'id_tables': {'compact': True}}):
+            self.assertIsInstance(IdTable.join_table(), IdTable)
+
+    def test_values_must_be_strings(self):
+        with self.assertRaises(TypeError):
+            self.table[1] = None
+
+
+class IdTableBenchmarkTestCase(unittest.TestCase):
+    """
+    The memory and lookup time of 100k MGI-style keys,
+    in an IdTable and in the table the joins use by default.
+    """
+
+    size = 100000
+
+    def _build(self, table):
+        tracemalloc.start()
+        for k in range(1000000, 1000000 + self.size):
+            table[str(k)] = 'MGI:' + str(k * 3)
+        if isinstance(table, IdTable):
+            table._merge()
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return memory
+
+    def _lookup_time(self, table):
+        keys = [str(k) for k in random.Random(0).sample(
+            range(1000000, 1000000 + self.size), 10000)]
+        get = table.get
+        return min(timeit.repeat(
+            lambda: [get(k) for k in keys], number=1, repeat=5)) / len(keys)
+
+    def test_benchmark(self):
+        compact = IdTable()
+        with mock.patch.dict(config.get_config(), {'id_tables': {}}):
+            join = IdTable.join_table()
+        plain = {}
+        memory = [self._build(t) for t in (compact, join, plain)]
+        seconds = [self._lookup_time(t) for t in (compact, join, plain)]
+        logger.info(
+            "IdTable: %d bytes, %.2fus a lookup; "
+            "join table: %d bytes, %.2fus; dict: %d bytes, %.2fus",
+            memory[0], seconds[0] * 1e6, memory[1], seconds[1] * 1e6,
+            memory[2], seconds[2] * 1e6)
+        # the compact table saves memory where that is the limit
+        self.assertLess(memory[0], memory[2] * 0.7)
+        # and the joins, by default, look up as fast as a dict
+        self.assertLess(seconds[1], seconds[2] * 1.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+import os
+import csv
+import gzip
+import shutil
+import tempfile
+import unittest
+import logging
+from rdflib import ConjunctiveGraph, URIRef, BNode, Literal
+from rdflib.namespace import RDF, RDFS, OWL
+from dipper.utils.Neo4jCSVWriter import Neo4jCSVWriter
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+class Neo4jCSVWriterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.prefixes = {
+            'NCBIGene': 'http://www.ncbi.nlm.nih.gov/gene/',
+            'OBO': 'http://purl.obolibrary.org/obo/',
+            'RO': 'http://purl.obolibrary.org/obo/RO_'}
+        gene = URIRef('http://www.ncbi.nlm.nih.gov/gene/1')
+        self.graph = ConjunctiveGraph()
+        for t in [
+                (gene, RDF['type'], OWL['Class']),
+                (gene, RDF['type'],
+                    URIRef('http://purl.obolibrary.org/obo/SO_0000704')),
+                (gene, RDFS['label'], Literal('A1BG')),
+                (gene, RDFS['label'], Literal('alpha-1-B glycoprotein')),
+                (gene, URIRef(
+                    'http://www.geneontology.org/formats/oboInOwl#'
+                    'hasExactSynonym'), Literal('A1B')),
+                (gene, URIRef(
+                    'http://www.geneontology.org/formats/oboInOwl#'
+                    'hasExactSynonym'), Literal('A1B; ABG\x1f')),
+                (gene, RDFS['comment'], Literal('left out')),
+                (gene, URIRef('http://purl.obolibrary.org/obo/RO_0002162'),
+                    URIRef('http://purl.obolibrary.org/obo/NCBITaxon_9606')),
+                (gene, RDFS['seeAlso'], BNode('b1')),
+                (BNode('b1'), RDFS['label'], Literal('a "b"\nnode'))]:
+            self.graph.add(t)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def _read(self, path):
+        with gzip.open(path, 'rt', newline='') as f:
+            return list(csv.reader(f))
+
+    def test_nodes_and_relationships(self):
+        nodes_file = os.path.join(self.dir, 'nodes.csv.gz')
+        relationships_file = os.path.join(self.dir, 'relationships.csv.gz')
+        with Neo4jCSVWriter(
+                nodes_file, relationships_file, self.prefixes) as writer:
+            writer.write_graph(self.graph)
+        nodes = self._read(nodes_file)
+        self.assertEqual(nodes[0], Neo4jCSVWriter.node_header)
+        nodes = dict((row[0], row) for row in nodes[1:])
+        self.assertEqual(
+            sorted(nodes), ['NCBIGene:1', 'OBO:NCBITaxon_9606',
+                            'OBO:SO_0000704', '_:b1'])
+        gene = nodes['NCBIGene:1']
+        sep = '\x1f'
+        self.assertEqual(gene[:7] + gene[8:], [
+            'NCBIGene:1', 'http://www.ncbi.nlm.nih.gov/gene/1', 'A1BG',
+            'A1BG' + sep + 'alpha-1-B glycoprotein', '', '',
+            'A1B' + sep + 'A1B; ABG ', 'Node' + sep + 'Class'])
+        self.assertEqual(
+            sorted(gene[7].split(sep)),
+            ['OBO:SO_0000704', 'owl:Class'])
+        self.assertEqual(nodes['_:b1'][2], 'a "b"\nnode')
+        self.assertEqual(nodes['_:b1'][3], '')
+        self.assertEqual(nodes['OBO:NCBITaxon_9606'][8], 'Node')
+        self.assertEqual(
+            set(len(row) for row in nodes.values()),
+            {len(Neo4jCSVWriter.node_header)})
+
+        relationships = self._read(relationships_file)
+        self.assertEqual(
+            relationships[0], Neo4jCSVWriter.relationship_header)
+        self.assertEqual(
+            sorted(tuple(r[:3]) for r in relationships[1:]), [
+                ('NCBIGene:1', 'OBO:NCBITaxon_9606', 'RO:0002162'),
+                ('NCBIGene:1', 'OBO:SO_0000704', 'rdf:type'),
+                ('NCBIGene:1', '_:b1', 'rdfs:seeAlso')])
+
+
+if __name__ == '__main__':
+    unittest.main()
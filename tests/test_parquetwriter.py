@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import tempfile
+import unittest
+import logging
+from rdflib import Graph, URIRef, BNode, Literal
+from rdflib.namespace import RDF, RDFS, DC
+from dipper.utils.ParquetWriter import ParquetWriter
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+@unittest.skipUnless(ParquetWriter.is_available(), 'needs pyarrow')
+class ParquetWriterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.prefixes = {
+            'NCBIGene': 'http://www.ncbi.nlm.nih.gov/gene/',
+            'OBO': 'http://purl.obolibrary.org/obo/',
+            'OBAN': 'http://purl.org/oban/',
+            'PMID': 'http://www.ncbi.nlm.nih.gov/pubmed/',
+            'MONARCH': 'http://www.monarchinitiative.org/MONARCH_'}
+        oban = 'http://purl.org/oban/'
+        gene = URIRef('http://www.ncbi.nlm.nih.gov/gene/1')
+        phenotype = URIRef('http://purl.obolibrary.org/obo/HP_0000001')
+        has_phenotype = URIRef('http://purl.obolibrary.org/obo/RO_0002200')
+        assoc = URIRef('http://www.monarchinitiative.org/MONARCH_a1')
+        self.graph = Graph()
+        for t in [
+                (gene, RDFS['label'], Literal('A1BG', lang='en')),
+                (gene, has_phenotype, phenotype),
+                (gene, RDFS['seeAlso'], BNode('b1')),
+                (assoc, RDF['type'], URIRef(oban + 'association')),
+                (assoc, URIRef(oban + 'association_has_subject'), gene),
+                (assoc, URIRef(oban + 'association_has_object'), phenotype),
+                (assoc, URIRef(oban + 'association_has_object_property'),
+                    has_phenotype),
+                (assoc, URIRef('http://purl.obolibrary.org/obo/RO_0002558'),
+                    URIRef('http://purl.obolibrary.org/obo/ECO_0000033')),
+                (assoc, DC['source'],
+                    URIRef('http://www.ncbi.nlm.nih.gov/pubmed/1')),
+                (assoc, DC['source'],
+                    URIRef('http://www.ncbi.nlm.nih.gov/pubmed/2'))]:
+            self.graph.add(t)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_triples_and_associations(self):
+        import pyarrow.parquet
+        path = os.path.join(self.dir, 'out.parquet')
+        associations_path = os.path.join(self.dir, 'out_assoc.parquet')
+        writer = ParquetWriter(path, self.prefixes, associations_path)
+        writer.row_group_size = 4
+        writer.write_graph(self.graph)
+        writer.close()
+
+        triples = pyarrow.parquet.read_table(path)
+        self.assertEqual(triples.num_rows, len(self.graph))
+        self.assertTrue(
+            pyarrow.types.is_dictionary(triples.schema.field('subject').type))
+        rows = set(zip(*[
+            triples.column(c).to_pylist() for c in triples.column_names]))
+        self.assertIn(
+            ('NCBIGene:1', 'rdfs:label', 'A1BG', 'literal', None, 'en'), rows)
+        self.assertIn(
+            ('NCBIGene:1', 'OBO:RO_0002200', 'OBO:HP_0000001', 'iri',
+             None, None), rows)
+        self.assertIn(
+            ('NCBIGene:1', 'rdfs:seeAlso', '_:b1', 'bnode', None, None), rows)
+
+        associations = pyarrow.parquet.read_table(
+            associations_path).to_pylist()
+        self.assertEqual(len(associations), 1)
+        association = associations[0]
+        self.assertEqual(association['association'], 'MONARCH:a1')
+        self.assertEqual(
+            (association['subject'], association['predicate'],
+             association['object']),
+            ('NCBIGene:1', 'OBO:RO_0002200', 'OBO:HP_0000001'))
+        self.assertEqual(association['evidence'], ['OBO:ECO_0000033'])
+        self.assertEqual(sorted(association['source']), ['PMID:1', 'PMID:2'])
+        self.assertEqual(association['provenance'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
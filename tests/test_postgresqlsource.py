@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import gzip
+import shutil
+import tempfile
+import threading
+import unittest
+import logging
+from dipper.sources.PostgreSQLSource import PostgreSQLSource, _TablePipe
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+class FakeCursor(object):
+    """
+    Records the queries run on it, and answers them from a list.
+    """
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.queries = []
+
+    def execute(self, query, params=None):
+        self.queries.append((query, params))
+
+    def fetchone(self):
+        return self.results.pop(0)
+
+
+class FakeConnection(object):
+    """
+    A connection whose COPY writes the given blocks of bytes,
+    then fails if it is given an error.
+    """
+
+    def __init__(self, blocks, error=None):
+        self.blocks = blocks
+        self.error = error
+
+    def cursor(self):
+        return self
+
+    def copy_expert(self, query, file):
+        for block in self.blocks:
+            file.write(block)
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        pass
+
+
+class StreamingSource(PostgreSQLSource):
+
+    def __init__(self, connection):
+        super().__init__('pgtest')
+        self.connection = connection
+
+    def _connect(self, cxn):
+        return self.connection
+
+
+class PostgreSQLSourceTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.dir = tempfile.mkdtemp()
+        os.chdir(self.dir)
+        self.source = PostgreSQLSource('pgtest')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir)
+        self.source = None
+
+    def test_fingerprint_modification_column(self):
+        cur = FakeCursor([(10, '2016-01-01')])
+        (count, fingerprint) = self.source._get_remote_fingerprint(
+            cur, 'marker', ['_marker_key', 'modification_date'])
+        self.assertEqual((count, fingerprint), (10, '10|2016-01-01'))
+        self.assertIn('MAX(x.modification_date)', cur.queries[0][0])
+
+    def test_fingerprint_view_hashes_columns(self):
+        # a view's modification column only follows one of its tables
+        cur = FakeCursor([(10, '12345')])
+        (count, fingerprint) = self.source._get_remote_fingerprint(
+            cur, 'gxd_genotype_view',
+            ['_genotype_key', 'strain', 'modification_date'],
+            ['_genotype_key', 'strain'], is_view=True)
+        self.assertEqual(fingerprint, '10|12345')
+        query = cur.queries[0][0]
+        self.assertNotIn('MAX', query)
+        self.assertIn(
+            'hashtext(ROW(x._genotype_key, x.strain)::text)', query)
+
+    def test_fingerprint_whole_rows(self):
+        cur = FakeCursor([(3, '-42')])
+        self.source._get_remote_fingerprint(cur, 'dbxref', ['dbxref_id'])
+        self.assertIn('hashtext(x::text)', cur.queries[0][0])
+
+    def test_is_view(self):
+        self.assertTrue(self.source._is_view(FakeCursor([('v',)]), 'a'))
+        self.assertFalse(self.source._is_view(FakeCursor([('r',)]), 'b'))
+        self.assertFalse(self.source._is_view(FakeCursor([None]), 'c'))
+
+    def test_manifest(self):
+        raw = '/'.join((self.source.rawdir, 'marker'))
+        with open(raw, 'w') as f:
+            f.write('_marker_key\n1\n')
+        query = 'SELECT * FROM marker'
+        self.assertFalse(
+            self.source._is_local_copy_current(raw, query, '1|x'))
+        self.source._update_manifest(raw, query, '1|x')
+        self.assertTrue(
+            self.source._is_local_copy_current(raw, query, '1|x'))
+        # read back by another instance
+        other = PostgreSQLSource('pgtest')
+        self.assertTrue(other._is_local_copy_current(raw, query, '1|x'))
+        self.assertFalse(other._is_local_copy_current(raw, query, '2|x'))
+        self.assertFalse(other._is_local_copy_current(
+            raw, 'SELECT _marker_key FROM marker', '1|x'))
+        # the file was changed since
+        with open(raw, 'a') as f:
+            f.write('2\n')
+        self.assertFalse(other._is_local_copy_current(raw, query, '1|x'))
+
+    def test_file_len(self):
+        for (name, text, lines) in [
+                ('plain', 'a\nb\nc\n', 3),
+                ('unterminated', 'a\nb\nc', 3),
+                ('empty', '', 0)]:
+            path = os.path.join(self.dir, name)
+            with open(path, 'w') as f:
+                f.write(text)
+            self.assertEqual(self.source.file_len(path), lines, name)
+            with gzip.open(path + '.gz', 'wt') as f:
+                f.write(text)
+            self.assertEqual(self.source.file_len(path + '.gz'), lines, name)
+        # more than one block
+        path = os.path.join(self.dir, 'big.gz')
+        with gzip.open(path, 'wb') as f:
+            f.write(b'x' * 100 + b'\n' * (2**20 + 5))
+        self.assertEqual(self.source.file_len(path), 2**20 + 5)
+
+
+class TablePipeTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.dir = tempfile.mkdtemp()
+        os.chdir(self.dir)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir)
+
+    def _produce(self, pipe, blocks, error=None):
+        def produce():
+            for block in blocks:
+                pipe.feed(block)
+            pipe.finish(error)
+        thread = threading.Thread(target=produce)
+        thread.start()
+        return thread
+
+    def test_backpressure(self):
+        pipe = _TablePipe(2)
+        block = b'x' * _TablePipe.chunk_size
+        thread = self._produce(pipe, [block] * 10)
+        # the producer fills the buffer, then waits for the reader
+        thread.join(0.5)
+        self.assertTrue(thread.is_alive())
+        self.assertEqual(pipe.chunks.qsize(), 2)
+        data = io.BufferedReader(pipe).read()
+        thread.join()
+        self.assertEqual(data, block * 10)
+
+    def test_abandoned(self):
+        pipe = _TablePipe(1)
+        block = b'x' * _TablePipe.chunk_size
+        thread = self._produce(pipe, [block] * 10)
+        pipe.read(10)
+        # the reader stops early; the producer must not block on it
+        pipe.close()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+    def test_error(self):
+        pipe = _TablePipe(2)
+        thread = self._produce(pipe, [b'a\n', b'b\n'], ValueError('lost'))
+        reader = io.TextIOWrapper(io.BufferedReader(pipe))
+        with self.assertRaisesRegex(IOError, 'lost'):
+            reader.read()
+        thread.join()
+
+    def _stream(self, blocks, error=None, compress=False):
+        source = StreamingSource(FakeConnection(blocks, error))
+        source.export_settings['compress'] = compress
+        # a small buffer, so that the COPY waits on the parser
+        source.export_settings['pipeline_buffer'] = _TablePipe.chunk_size
+        raw = '/'.join((source.rawdir, 'marker'))
+        source.deferred_tables[raw] = ({}, 'SELECT * FROM marker', '1|x')
+        return (source, raw)
+
+    def test_stream_matches_saved_table(self):
+        blocks = [
+            '{0}\tmarker {0}\n'.format(n).encode('utf-8')
+            for n in range(50000)]
+        for compress in (False, True):
+            (source, raw) = self._stream(blocks, compress=compress)
+            with source.open_table(raw) as f:
+                streamed = f.read()
+            source.wait_for_table_streams()
+            self.assertEqual(
+                streamed.encode('utf-8'), b''.join(blocks), compress)
+            with source.open_table(raw) as f:
+                self.assertEqual(f.read(), streamed)
+            self.assertTrue(source._is_local_copy_current(
+                raw, 'SELECT * FROM marker', '1|x'))
+
+    def test_stream_error(self):
+        (source, raw) = self._stream([b'1\tm\n'], ValueError('dropped'))
+        with self.assertRaisesRegex(IOError, 'dropped'):
+            with source.open_table(raw) as f:
+                f.read()
+        source.wait_for_table_streams()
+        # nothing half-written is kept or recorded
+        self.assertIsNone(source._get_table_file(raw))
+        self.assertFalse(source._is_local_copy_current(
+            raw, 'SELECT * FROM marker', '1|x'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import tempfile
+import unittest
+import logging
+from unittest import mock
+from rdflib import URIRef, BNode, Literal
+from rdflib.namespace import RDFS
+from dipper.models.Dataset import Dataset
+from dipper.sources.Source import Source
+from dipper.utils.RDFPatch import RDFPatch
+from dipper.utils.GraphUtils import GraphUtils
+from dipper.utils.CompressedFile import CompressedFile
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+class RDFPatchTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.previous = [
+            '<http://x/a> <http://x/p> "1" .\n',
+            '<http://x/b> <http://x/p> "1" .\n',
+            '<http://x/c> <http://x/p> "1" .\n',
+            '<http://x/e> <http://x/p> "1" .\n']
+        self.new = [
+            '<http://x/0> <http://x/p> "1" .\n',
+            '<http://x/b> <http://x/p> "1" .\n',
+            '<http://x/c> <http://x/p> "2" .\n',
+            '<http://x/d> <http://x/p> "1" .\n',
+            '<http://x/e> <http://x/p> "1" .\n',
+            '<http://x/f> <http://x/p> "1" .\n']
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def _write(self, name, lines):
+        path = os.path.join(self.dir, name)
+        with CompressedFile.open(path, 'wt', newline='') as f:
+            f.writelines(lines)
+        return path
+
+    def test_changes(self):
+        self.assertEqual(list(RDFPatch.changes(self.previous, self.new)), [
+            ('A', '<http://x/0> <http://x/p> "1" .\n'),
+            ('D', '<http://x/a> <http://x/p> "1" .\n'),
+            ('D', '<http://x/c> <http://x/p> "1" .\n'),
+            ('A', '<http://x/c> <http://x/p> "2" .\n'),
+            ('A', '<http://x/d> <http://x/p> "1" .\n'),
+            ('A', '<http://x/f> <http://x/p> "1" .\n')])
+        self.assertEqual(list(RDFPatch.changes(self.new, self.new)), [])
+
+    def test_diff_and_apply(self):
+        previous = self._write('previous.nt.gz', self.previous)
+        new = self._write('new.nt.gz', self.new)
+        patch = os.path.join(self.dir, 'patch.rdfp.gz')
+        self.assertEqual(RDFPatch.diff(previous, new, patch), (4, 2))
+        with CompressedFile.open(patch, 'rt') as f:
+            lines = f.readlines()
+        self.assertEqual(lines[0], 'TX .\n')
+        self.assertEqual(lines[-1], 'TC .\n')
+        self.assertEqual(lines[2], 'D <http://x/a> <http://x/p> "1" .\n')
+
+        patched = os.path.join(self.dir, 'patched.nt')
+        RDFPatch.apply(previous, patch, patched)
+        with open(patched) as f:
+            self.assertEqual(f.readlines(), self.new)
+
+    def test_blank_nodes(self):
+        previous = self._write('previous.nt', [
+            '<http://x/a> <http://x/p> _:b1 .\n',
+            '_:b1 <http://x/p> "_:b9 ." .\n'])
+        new = self._write('new.nt', [
+            '<http://x/a> <http://x/p> _:b2 .\n',
+            '_:b2 <http://x/p> "_:b9 ." .\n'])
+        patch = os.path.join(self.dir, 'patch.rdfp')
+        RDFPatch.diff(previous, new, patch)
+        with open(patch) as f:
+            self.assertEqual(f.readlines(), [
+                'TX .\n',
+                'D <http://x/a> <http://x/p> <_:b1> .\n',
+                'A <http://x/a> <http://x/p> <_:b2> .\n',
+                'D <_:b1> <http://x/p> "_:b9 ." .\n',
+                'A <_:b2> <http://x/p> "_:b9 ." .\n',
+                'TC .\n'])
+        patched = os.path.join(self.dir, 'patched.nt')
+        RDFPatch.apply(previous, patch, patched)
+        with open(patched) as f, open(new) as g:
+            self.assertEqual(f.read(), g.read())
+
+    def test_unsorted(self):
+        previous = self._write('previous.nt', reversed(self.previous))
+        new = self._write('new.nt', self.new)
+        with self.assertRaises(ValueError):
+            RDFPatch.diff(
+                previous, new, os.path.join(self.dir, 'patch.rdfp'))
+
+
+class PatchedSource(Source):
+
+    def __init__(self):
+        super().__init__('patched')
+        self.dataset = Dataset(
+            'patched', 'Patched', 'http://x/', None,
+            'http://x/license')
+        self.setcompression('gzip')
+
+
+class SourceWriteTestCase(unittest.TestCase):
+    """
+    A source writing its canonical output over that of a previous build.
+    """
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.dir = tempfile.mkdtemp()
+        os.chdir(self.dir)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir)
+
+    def test_write_patch(self):
+        source = PatchedSource()
+        genes = [URIRef('http://x/gene/' + str(n)) for n in range(10)]
+        for gene in genes:
+            source.graph.add((gene, RDFS['label'], Literal(gene[-1])))
+            anchor = BNode()
+            source.graph.add((gene, RDFS['seeAlso'], anchor))
+            source.graph.add((anchor, RDFS['label'], Literal('x')))
+        source.write(format='canonical')
+        canonical = 'out/patched.canonical.nt.gz'
+        shutil.copy(canonical, 'first.nt.gz')
+        self.assertFalse(os.path.exists('out/patched.patch.rdfp.gz'))
+
+        source.graph.remove((genes[0], RDFS['label'], None))
+        source.graph.add((genes[0], RDFS['label'], Literal('zero')))
+        anchor = source.graph.value(genes[1], RDFS['seeAlso'])
+        source.graph.set((anchor, RDFS['label'], Literal('y')))
+        source.write(format='canonical')
+
+        self.assertEqual(sorted(os.listdir('out')), [
+            'patched.canonical.nt.gz', 'patched.patch.rdfp.gz',
+            'patched_dataset.canonical.nt.gz'])
+        patch = 'out/patched.patch.rdfp.gz'
+        with CompressedFile.open(patch, 'rt') as f:
+            self.assertIn('<_:b', f.read())
+        RDFPatch.apply('first.nt.gz', patch, 'second.nt')
+        with CompressedFile.open(canonical, 'rt') as f, \
+                open('second.nt') as g:
+            self.assertEqual(f.read(), g.read())
+
+    def test_failed_write(self):
+        source = PatchedSource()
+        source.graph.add(
+            (URIRef('http://x/gene/1'), RDFS['label'], Literal('1')))
+        source.write(format='canonical')
+        shutil.copy('out/patched.canonical.nt.gz', 'first.nt.gz')
+
+        source.graph.add(
+            (URIRef('http://x/gene/2'), RDFS['label'], Literal('2')))
+        write = GraphUtils.write
+
+        def fail_partway(gu, graph, fileformat, file):
+            # the dataset is written, then the main graph fails partway
+            write(gu, graph, fileformat, file)
+            if 'patched.canonical' in file:
+                raise OSError('disk full')
+
+        with mock.patch.object(GraphUtils, 'write', fail_partway):
+            with self.assertRaises(OSError):
+                source.write(format='canonical')
+        # the last build's output is where it was, and unchanged
+        self.assertEqual(sorted(os.listdir('out')), [
+            'patched.canonical.nt.gz', 'patched_dataset.canonical.nt.gz'])
+        with CompressedFile.open('out/patched.canonical.nt.gz') as f, \
+                CompressedFile.open('first.nt.gz') as g:
+            self.assertEqual(f.read(), g.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+import unittest
+import logging
+import os
+from dipper.utils.SpillDict import SpillDict
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+class SpillDictTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.d = SpillDict(max_in_memory=10)
+
+    def tearDown(self):
+        self.d.close()
+        self.d = None
+
+    def test_spill_and_reload(self):
+        for i in range(100):
+            self.d[str(i)] = 'MGI:' + str(i)
+        self.assertEqual(len(self.d.cache), 10)
+        self.assertTrue(os.path.exists(self.d.dbfile))
+        self.assertEqual(len(self.d), 100)
+        self.assertEqual(self.d['3'], 'MGI:3')
+        self.assertIn('99', self.d)
+        self.assertNotIn('100', self.d)
+        self.assertIsNone(self.d.get('100'))
+        # updating a spilled entry does not add to the count
+        self.d['3'] = 'MGI:three'
+        self.assertEqual(len(self.d), 100)
+        self.assertEqual(self.d['3'], 'MGI:three')
+        self.assertEqual(sorted(self.d, key=int), [str(i) for i in range(100)])
+
+    def test_delete(self):
+        for i in range(20):
+            self.d[i] = None
+        del self.d[0]
+        del self.d[19]
+        self.assertEqual(len(self.d), 18)
+        self.assertNotIn(0, self.d)
+        self.assertIsNone(self.d[5])
+        with self.assertRaises(KeyError):
+            del self.d[0]
+
+    def test_bulk_load(self):
+        self.d['a'] = 'old'
+        self.d.bulk_load(('k' + str(i), i) for i in range(1000))
+        self.d.bulk_load([('a', 'new')])
+        self.assertEqual(len(self.d), 1001)
+        self.assertEqual(self.d['a'], 'new')
+        self.assertEqual(self.d['k999'], 999)
+        self.assertIsNone(self.d.get('missing'))
+
+    def test_get_many(self):
+        self.d.batch_size = 7
+        for i in range(100):
+            self.d[i] = 'MGI:' + str(i)
+        self.d[3] = 'MGI:three'
+        self.d[99] = 'MGI:ninety-nine'
+        keys = [3, 99, 100] + list(range(10, 60))
+        found = self.d.get_many(keys, 'none')
+        self.assertEqual(set(found), set(keys))
+        self.assertEqual(found[3], 'MGI:three')
+        self.assertEqual(found[99], 'MGI:ninety-nine')
+        self.assertEqual(found[100], 'none')
+        self.assertEqual(found[42], 'MGI:42')
+        self.assertEqual(self.d.get_many([]), {})
+
+    def test_without_budget(self):
+        d = SpillDict()
+        # nothing to spill, so it is just a dict
+        self.assertIs(type(d).__getitem__, dict.__getitem__)
+        self.assertIsInstance(d, SpillDict)
+        for i in range(100):
+            d[i] = i
+        d.bulk_load([(100, 100), (0, 'zero')])
+        self.assertEqual(len(d), 101)
+        self.assertEqual(d[0], 'zero')
+        self.assertEqual(d.get_many([0, 1, 'x']), {0: 'zero', 1: 1, 'x': None})
+        d.close()
+        self.assertEqual(len(d), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+import unittest
+import logging
+import threading
+from rdflib import ConjunctiveGraph, URIRef
+from dipper.utils.StepScheduler import Step, StepScheduler
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+class StepSchedulerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.lookup = {}
+        self.order = []
+        self.order_lock = threading.Lock()
+        self.graph = ConjunctiveGraph()
+
+    def tearDown(self):
+        self.graph = None
+
+    def _build(self, key, value):
+        with self.order_lock:
+            self.order.append(key)
+        self.lookup[key] = value
+        for i in range(100):
+            self.graph.add((
+                URIRef('http://x.org/' + key), URIRef('http://x.org/p'),
+                URIRef('http://x.org/' + str(i))))
+
+    def _use(self, key, used):
+        with self.order_lock:
+            self.order.append('use ' + key)
+        self.lookup[used] = self.lookup[key] + 1
+
+    def _get_steps(self):
+        return [
+            Step(self._build, ('a', 1), outputs=['a'], name='build_a'),
+            Step(self._build, ('b', 2), outputs=['b'], name='build_b'),
+            Step(self._use, ('a', 'c'), inputs=['a'], outputs=['c'],
+                 name='use_a'),
+            Step(self._use, ('c', 'd'), inputs=['c'], name='use_c')]
+
+    def test_dependencies(self):
+        scheduler = StepScheduler(self._get_steps())
+        self.assertEqual(scheduler.dependencies['build_b'], set())
+        self.assertEqual(scheduler.dependencies['use_a'], {'build_a'})
+        self.assertEqual(scheduler.dependencies['use_c'], {'use_a'})
+
+    def test_validate_order(self):
+        steps = self._get_steps()
+        steps.reverse()
+        with self.assertRaises(ValueError):
+            StepScheduler(steps).validate()
+        # fine, if it is loaded up front
+        StepScheduler(
+            [Step(self._use, ('a', 'c'), inputs=['a'])],
+            provided=['a']).validate()
+
+    def test_run_concurrently(self):
+        StepScheduler(self._get_steps(), workers=3).run([self.graph])
+        self.assertEqual(self.lookup['d'], 3)
+        self.assertLess(self.order.index('a'), self.order.index('use a'))
+        self.assertLess(self.order.index('use a'), self.order.index('use c'))
+        self.assertEqual(len(self.graph), 200)
+        # the store is back to normal afterwards
+        self.assertNotIn('add', self.graph.store.__dict__)
+
+    def test_failure_stops_dependents(self):
+        def fail():
+            raise RuntimeError('bad row')
+        steps = [
+            Step(fail, outputs=['a']),
+            Step(self._use, ('a', 'c'), inputs=['a'], name='use_a')]
+        with self.assertRaises(RuntimeError):
+            StepScheduler(steps, workers=2).run()
+        self.assertNotIn('use a', self.order)
+
+
+if __name__ == '__main__':
+    unittest.main()
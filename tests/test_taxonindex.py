@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+import unittest
+import logging
+import tarfile
+import tempfile
+import shutil
+import io
+from dipper.utils.TaxonIndex import TaxonIndex
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+class TaxonIndexTestCase(unittest.TestCase):
+
+    nodes = [
+        ('1', '1', 'no rank'),
+        ('7214', '1', 'family'),
+        ('7215', '7214', 'genus'),
+        ('7227', '7215', 'species'),
+        ('7240', '7215', 'species'),
+        ('9504', '1', 'genus'),
+        ('3850', '1', 'genus'),
+    ]
+
+    names = [
+        ('1', 'root', '', 'scientific name'),
+        ('7214', 'Drosophilidae', '', 'scientific name'),
+        ('7215', 'Drosophila', 'Drosophila <fruit fly, genus>',
+         'scientific name'),
+        ('7227', 'Drosophila melanogaster', '', 'scientific name'),
+        ('7227', 'fruit fly', '', 'genbank common name'),
+        ('7227', 'Meigen, 1830', '', 'authority'),
+        ('7240', 'Drosophila simulans', '', 'scientific name'),
+        ('7240', 'fruit fly', '', 'common name'),
+        ('7240', 'Sophophora simulans', '', 'synonym'),
+        # a genus name used in two kingdoms
+        ('9504', 'Aotus', 'Aotus <primate>', 'scientific name'),
+        ('3850', 'Aotus', 'Aotus <angiosperm>', 'scientific name'),
+    ]
+
+    def setUp(self):
+        self.rawdir = tempfile.mkdtemp()
+        self.tax_index = TaxonIndex(self.rawdir)
+        with tarfile.open(self.tax_index.dumpfile, 'w:gz') as tar:
+            self._add_member(tar, 'nodes.dmp', [
+                '\t|\t'.join(n + ('',)) + '\t|\n' for n in self.nodes])
+            self._add_member(tar, 'names.dmp', [
+                '\t|\t'.join(n) + '\t|\n' for n in self.names])
+        self.assertTrue(self.tax_index.load())
+
+    def tearDown(self):
+        shutil.rmtree(self.rawdir)
+        self.tax_index = None
+
+    @staticmethod
+    def _add_member(tar, name, lines):
+        data = ''.join(lines).encode('utf-8')
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        tar.addfile(info, io.BytesIO(data))
+
+    def test_exact_and_synonym_lookup(self):
+        self.assertEqual(
+            self.tax_index.get_taxon_num('Drosophila melanogaster'), '7227')
+        self.assertEqual(
+            self.tax_index.get_taxon_num('drosophila_MELANOGASTER'), '7227')
+        self.assertEqual(
+            self.tax_index.get_taxon_id('Sophophora simulans'),
+            'NCBITaxon:7240')
+        # authority names are not indexed
+        self.assertIsNone(self.tax_index.get_taxon_num('Meigen, 1830'))
+
+    def test_ambiguous_label(self):
+        self.assertIsNone(self.tax_index.get_taxon_num('fruit fly'))
+
+    def test_homonym(self):
+        self.assertIsNone(self.tax_index.get_taxon_num('Aotus'))
+        self.assertEqual(
+            self.tax_index.get_taxon_num('Aotus <angiosperm>'), '3850')
+        self.assertEqual(
+            self.tax_index.get_taxon_num('aotus <primate>'), '9504')
+        self.assertEqual(
+            self.tax_index.get_taxon_num(
+                'Drosophila <fruit fly, genus>'), '7215')
+
+    def test_batch_lookup(self):
+        self.assertEqual(
+            self.tax_index.get_taxon_nums(['Drosophila', 'unknown']),
+            {'Drosophila': '7215', 'unknown': None})
+
+    def test_lineage(self):
+        self.assertEqual(
+            self.tax_index.get_lineage(7227), ['7227', '7215', '7214', '1'])
+        self.assertTrue(self.tax_index.is_descendant_of('7240', '7214'))
+        self.assertEqual(self.tax_index.get_rank('7215'), 'genus')
+
+    def test_load_from_cache(self):
+        cached_index = TaxonIndex(self.rawdir)
+        self.assertTrue(cached_index.load())
+        self.assertEqual(
+            cached_index.get_label('7240'), 'Drosophila simulans')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+import os
+import gzip
+import shutil
+import tempfile
+import unittest
+import logging
+from dipper.utils.TestIdIndex import TestIdIndex
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+class TestIdIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.rows = [
+            b'#tax_id\tGeneID\tSymbol\n',
+            b'9606\t1\tA1BG\n',
+            b'9606\t17\tNCBIGene:170|OMIM:100100\n',
+            b'10090\t11287\tPzp\n',
+            b'9606\t170\tx;NCBIGene:18\n']
+        self.path = os.path.join(self.dir, 'gene_info.gz')
+        with gzip.open(self.path, 'wb') as f:
+            f.writelines(self.rows)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def _read(self, path, ids, mode='rb'):
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, mode) as f:
+            rows = TestIdIndex(path).read_rows(f, ids)
+            if rows is None:
+                return None
+            return list(rows)
+
+    def test_indexed_rows(self):
+        ids = [1, 18, 'OMIM:100100']
+        self.assertIsNone(self._read(self.path, ids))
+        self.assertEqual(TestIdIndex(self.path).build(ids), 3)
+        self.assertEqual(
+            self._read(self.path, ids),
+            [self.rows[1], self.rows[2], self.rows[4]])
+        self.assertEqual(
+            self._read(self.path, ids, 'rt'),
+            [r.decode() for r in (self.rows[1], self.rows[2], self.rows[4])])
+        # the rows of a gzipped file are read from a copy of them
+        with open(self.path + '.testidx.rows', 'rb') as f:
+            self.assertEqual(
+                f.read(), self.rows[1] + self.rows[2] + self.rows[4])
+
+    def test_checksum(self):
+        index = TestIdIndex(self.path)
+        index.build([1])
+        self.assertEqual(index._load()['md5'], index._md5())
+        path = os.path.join(self.dir, 'plain.txt')
+        with open(path, 'wb') as f:
+            f.writelines(self.rows)
+        index = TestIdIndex(path)
+        index.build([1])
+        self.assertEqual(index._load()['md5'], index._md5())
+
+    def test_plain_text(self):
+        path = os.path.join(self.dir, 'citations.txt')
+        with open(path, 'wb') as f:
+            f.writelines(self.rows)
+        TestIdIndex(path).build([11287])
+        self.assertEqual(
+            self._read(path, [11287], 'r'), [self.rows[3].decode()])
+
+    def test_stale(self):
+        index = TestIdIndex(self.path)
+        index.build([1])
+        # other ids
+        self.assertIsNone(index.get_offsets([1, 2]))
+        # the same content, touched
+        os.utime(self.path, (0, 0))
+        self.assertEqual(len(index.get_offsets([1])), 1)
+        # new content
+        with gzip.open(self.path, 'wb') as f:
+            f.writelines(self.rows[:2])
+        self.assertIsNone(index.get_offsets([1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
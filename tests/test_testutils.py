@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import tempfile
+import unittest
+import logging
+from rdflib import Graph, URIRef, Literal
+from rdflib.namespace import RDF, RDFS, OWL
+from dipper.sources.Source import Source
+from dipper.utils.BinaryRDF import BinaryRDFWriter
+from dipper.utils.CompressedFile import CompressedFile
+from dipper.utils.GraphUtils import GraphUtils
+from dipper.utils.TestUtils import TestUtils
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+class TestUtilsTestCase(unittest.TestCase):
+    """
+    Querying a source's output, as dipper.py --query does.
+    """
+
+    query = 'SELECT ?gene WHERE { ?gene rdfs:label "gene 3" }'
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.dir = tempfile.mkdtemp()
+        os.chdir(self.dir)
+        self.source = Source('genes')
+        self.graph = Graph()
+        for n in range(10):
+            gene = URIRef('http://www.ncbi.nlm.nih.gov/gene/' + str(n))
+            self.graph.add((gene, RDF['type'], OWL['Class']))
+            self.graph.add((gene, RDFS['label'], Literal('gene ' + str(n))))
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir)
+        self.source = None
+
+    def test_query_binary(self):
+        BinaryRDFWriter(
+            os.path.join(self.source.outdir, 'genes.rdfb'),
+            {'NCBIGene': 'http://www.ncbi.nlm.nih.gov/gene/'}).write_graph(
+                self.graph)
+        test_query = TestUtils()
+        test_query.check_query_syntax(self.query, self.source)
+        test_query.load_graph(self.source)
+        self.assertEqual(len(test_query.graph), len(self.graph))
+        self.assertEqual(
+            test_query.query_graph(self.query),
+            [[URIRef('http://www.ncbi.nlm.nih.gov/gene/3')]])
+        test_query.graph.close()
+
+    def _query_turtle(self, codec):
+        file = os.path.join(
+            self.source.outdir, 'genes.ttl' + CompressedFile.extensions[codec])
+        GraphUtils(
+            self.source.prefixes,
+            compression=CompressedFile(codec, level=1)).write(
+                self.graph, 'turtle', file)
+        test_query = TestUtils()
+        test_query.load_graph_from_turtle(self.source)
+        self.assertEqual(len(test_query.graph), len(self.graph))
+        self.assertEqual(
+            test_query.query_graph(self.query),
+            [[URIRef('http://www.ncbi.nlm.nih.gov/gene/3')]])
+
+    def test_query_gzip(self):
+        self._query_turtle('gzip')
+
+    @unittest.skipUnless(CompressedFile.is_available('zstd'), 'needs zstd')
+    def test_query_zstd(self):
+        self._query_turtle('zstd')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+
+import os
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+import logging
+from rdflib import ConjunctiveGraph, Graph, URIRef, BNode, Literal
+from rdflib.compare import isomorphic
+from rdflib.namespace import RDF, RDFS, OWL, XSD
+from dipper.utils.TurtleWriter import TurtleWriter
+from dipper.utils.GraphUtils import GraphUtils, _partition
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+class TurtleWriterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.curie_map = {
+            'NCBIGene': 'http://www.ncbi.nlm.nih.gov/gene/',
+            'RO': 'http://purl.obolibrary.org/obo/RO_',
+            'OBO': 'http://purl.obolibrary.org/obo/',
+            '': 'http://www.monarchinitiative.org/'}
+        gene = URIRef('http://www.ncbi.nlm.nih.gov/gene/1')
+        bnode = BNode('x-1')
+        self.graph = ConjunctiveGraph()
+        for t in [
+                (gene, RDF['type'], OWL['Class']),
+                (gene, RDFS['label'], Literal('A1BG')),
+                (gene, RDFS['comment'],
+                    Literal('a "quoted"\\ line\nand\ttab', lang='en')),
+                (gene, URIRef('http://purl.obolibrary.org/obo/RO_0002162'),
+                    URIRef('http://purl.obolibrary.org/obo/NCBITaxon_9606')),
+                (gene, OWL['sameAs'],
+                    URIRef('http://www.ncbi.nlm.nih.gov/gene/1.')),
+                (gene, OWL['sameAs'],
+                    URIRef('http://example.org/a(b)')),
+                (URIRef('http://www.monarchinitiative.org/MONARCH_1'),
+                    URIRef('http://www.monarchinitiative.org/hasSubject'),
+                    bnode),
+                (bnode, RDFS['label'], Literal('7', datatype=XSD['integer']))]:
+            self.graph.add(t)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def _parse(self, path):
+        graph = Graph()
+        graph.parse(path, format='turtle')
+        return graph
+
+    def test_round_trip(self):
+        path = os.path.join(self.dir, 'out.ttl')
+        with TurtleWriter(path, self.curie_map) as writer:
+            self.assertEqual(writer.write_graph(self.graph), 8)
+        self.assertTrue(isomorphic(self._parse(path), self.graph))
+        with open(path) as f:
+            text = f.read()
+        self.assertIn(
+            '@prefix RO: <http://purl.obolibrary.org/obo/RO_> .', text)
+        self.assertIn('RO:0002162 OBO:NCBITaxon_9606', text)
+        self.assertIn('NCBIGene:1 ', text)
+        self.assertIn('<http://www.ncbi.nlm.nih.gov/gene/1.>', text)
+
+    def test_used_prefixes(self):
+        used = TurtleWriter.used_prefixes(self.graph, self.curie_map)
+        self.assertEqual(
+            sorted(used), ['', 'NCBIGene', 'OBO', 'RO', 'owl', 'rdf', 'rdfs',
+                           'xsd'])
+        path = os.path.join(self.dir, 'out.ttl')
+        with TurtleWriter(path, prefixes=used) as writer:
+            writer.write_graph(self.graph)
+        self.assertTrue(isomorphic(self._parse(path), self.graph))
+
+    def test_gzip(self):
+        path = os.path.join(self.dir, 'out.ttl.gz')
+        with TurtleWriter(path, self.curie_map) as writer:
+            writer.write_graph(self.graph)
+        with gzip.open(path, 'rb') as f:
+            data = f.read()
+        graph = Graph()
+        graph.parse(data=data, format='turtle')
+        self.assertTrue(isomorphic(graph, self.graph))
+
+    def test_repeated_subject(self):
+        path = os.path.join(self.dir, 'out.ttl')
+        a = URIRef('http://www.monarchinitiative.org/a')
+        b = URIRef('http://www.monarchinitiative.org/b')
+        triples = [
+            (a, RDFS['label'], Literal('a')),
+            (a, RDFS['label'], Literal('x')),
+            (b, RDFS['label'], Literal('b')),
+            (a, RDFS['comment'], Literal('a again'))]
+        writer = TurtleWriter(path, self.curie_map)
+        writer.buffer_size = 1
+        writer.write_triples(triples)
+        writer.close()
+        self.assertEqual(set(self._parse(path)), set(triples))
+
+    def test_shards(self):
+        for n in range(20):
+            self.graph.add((
+                URIRef('http://www.monarchinitiative.org/MONARCH_' + str(n)),
+                RDFS['label'], Literal(str(n))))
+        path = os.path.join(self.dir, 'out.ttl')
+        gu = GraphUtils(self.curie_map)
+        gu.write_shards(self.graph, path, 3, workers=2)
+        with open(os.path.join(self.dir, 'out.manifest.json')) as f:
+            manifest = json.load(f)
+        self.assertEqual(
+            [s['file'] for s in manifest['shards']],
+            ['out.part-0001.ttl.gz', 'out.part-0002.ttl.gz',
+             'out.part-0003.ttl.gz'])
+        self.assertEqual(manifest['triples'], len(self.graph))
+        graph = Graph()
+        for shard in manifest['shards']:
+            with gzip.open(os.path.join(self.dir, shard['file'])) as f:
+                graph.parse(data=f.read(), format='turtle')
+        self.assertTrue(isomorphic(graph, self.graph))
+
+        gu.write_shards(self.graph, path, 3, workers=1, concatenate=True)
+        self.assertTrue(isomorphic(self._parse(path), self.graph))
+        self.assertFalse(
+            os.path.exists(os.path.join(self.dir, 'out.part-0001.ttl.gz')))
+
+    def test_shards_of_blank_nodes(self):
+        graph = Graph()
+        previous = None
+        for n in range(30):
+            gene = URIRef('http://www.monarchinitiative.org/MONARCH_' + str(n))
+            # a chain of blank nodes, and one that two genes link to
+            (region, start) = (BNode(), BNode())
+            graph.add((gene, RDFS['seeAlso'], region))
+            graph.add((region, RDFS['seeAlso'], start))
+            graph.add((start, RDFS['label'], Literal(str(n))))
+            if n % 2 == 1:
+                graph.add((previous, RDFS['seeAlso'], start))
+            previous = gene
+        parts = _partition(graph, 4)
+        self.assertEqual(sum(len(part) for part in parts), len(graph))
+        for (shard, part) in enumerate(parts):
+            # spread out, rather than all in the first shard
+            self.assertGreater(len(part), 0)
+            others = set(
+                node for (n, other) in enumerate(parts) if n != shard
+                for triple in other for node in triple)
+            for (s, p, o) in part:
+                for node in (s, o):
+                    if isinstance(node, BNode):
+                        self.assertNotIn(node, others)
+
+        path = os.path.join(self.dir, 'out.ttl')
+        GraphUtils(self.curie_map).write_shards(graph, path, 4, workers=2)
+        parsed = Graph()
+        for shard in range(4):
+            with gzip.open(os.path.join(
+                    self.dir, 'out.part-000{0}.ttl.gz'.format(shard + 1))) \
+                    as f:
+                parsed.parse(data=f.read(), format='turtle')
+        self.assertTrue(isomorphic(parsed, graph))
+
+
+if __name__ == '__main__':
+    unittest.main()
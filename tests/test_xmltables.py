@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import logging
+from dipper.sources.Source import Source, XMLTable
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+class XMLTablesTestCase(unittest.TestCase):
+    """
+    Source.process_xml_tables, on a dump whose tables are not in the
+    order that they depend on each other.
+    """
+
+    dump = '''<?xml version="1.0"?>
+<mysqldump>
+<database name="omia">
+<table_data name="Breed">
+  <row><field name="breed_id">1</field><field name="gb">9913</field></row>
+  <row><field name="breed_id">2</field><field name="gb">9615</field></row>
+  <row><field name="breed_id">3</field><field name="gb">9913</field></row>
+</table_data>
+<table_data name="Unused">
+  <row><field name="x">1</field></row>
+</table_data>
+<table_data name="Species">
+  <row><field name="gb">9913</field></row>
+  <row><field name="gb">9615</field></row>
+  <row><field name="gb">9685</field></row>
+</table_data>
+<table_data name="Late">
+  <row><field name="id">1</field></row>
+</table_data>
+</database>
+</mysqldump>
+'''
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.dir = tempfile.mkdtemp()
+        os.chdir(self.dir)
+        self.source = Source('xmltest')
+        self.calls = []
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir)
+        self.source = None
+
+    def _row(self, table):
+        return lambda row: self.calls.append((table, row))
+
+    def _finish(self, table):
+        return lambda: self.calls.append((table, 'finish'))
+
+    def _tables(self):
+        return [
+            XMLTable('Breed', self._row('Breed'), after=['Species'],
+                     finish=self._finish('Breed')),
+            XMLTable('Species', self._row('Species'),
+                     finish=self._finish('Species')),
+            # waits on a table that isn't in the dump
+            XMLTable('Late', self._row('Late'), after=['Gone'],
+                     finish=self._finish('Late')),
+            XMLTable('Gone', self._row('Gone'), finish=self._finish('Gone'))]
+
+    def test_dependency_order(self):
+        self.source.process_xml_tables(
+            io.StringIO(self.dump), self._tables(), None)
+        self.assertEqual(self.calls, [
+            ('Species', {'gb': '9913'}),
+            ('Species', {'gb': '9615'}),
+            ('Species', {'gb': '9685'}),
+            ('Species', 'finish'),
+            # held until its prerequisite was done
+            ('Breed', {'breed_id': '1', 'gb': '9913'}),
+            ('Breed', {'breed_id': '2', 'gb': '9615'}),
+            ('Breed', {'breed_id': '3', 'gb': '9913'}),
+            ('Breed', 'finish'),
+            ('Gone', 'finish'),
+            ('Late', {'id': '1'}),
+            ('Late', 'finish')])
+
+    def test_limit(self):
+        self.source.process_xml_tables(
+            io.StringIO(self.dump), self._tables(), 1)
+        rows = [(t, r) for (t, r) in self.calls if r != 'finish']
+        finished = [t for (t, r) in self.calls if r == 'finish']
+        # reached_limit() lets each table handle one more than the limit
+        self.assertEqual(
+            [t for (t, r) in rows],
+            ['Species', 'Species', 'Breed', 'Breed', 'Late'])
+        self.assertEqual(finished, ['Species', 'Breed', 'Gone', 'Late'])
+
+
+if __name__ == '__main__':
+    unittest.main()